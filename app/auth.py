@@ -1,13 +1,15 @@
 from datetime import datetime, timedelta, UTC
 from typing import Optional, Dict, Any
 from fastapi import Depends, HTTPException, status
+from fastapi.concurrency import run_in_threadpool
 from fastapi.security import OAuth2PasswordBearer
 from jose import JWTError, jwt
 from passlib.context import CryptContext
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.models.models import TokenData, User
-from app.database import get_db, User as DBUser
+from app.database import get_async_db, User as DBUser
 
 # Configuration
 SECRET_KEY = "your-secret-key-here"  # In production, use a secure secret key from environment variables
@@ -30,15 +32,25 @@ def get_password_hash(password: str) -> str:
     return pwd_context.hash(password)
 
 
-def get_user(db: Session, username: str):
-    return db.query(DBUser).filter(DBUser.username == username).first()
+# bcrypt is deliberately slow, so hash and verify off the event loop
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    return await run_in_threadpool(verify_password, plain_password, hashed_password)
 
 
-def authenticate_user(db: Session, username: str, password: str):
-    user = get_user(db, username)
+async def get_password_hash_async(password: str) -> str:
+    return await run_in_threadpool(get_password_hash, password)
+
+
+async def get_user(db: AsyncSession, username: str):
+    result = await db.execute(select(DBUser).where(DBUser.username == username))
+    return result.scalars().first()
+
+
+async def authenticate_user(db: AsyncSession, username: str, password: str):
+    user = await get_user(db, username)
     if not user:
         return None
-    if not verify_password(password, user.hashed_password):
+    if not await verify_password_async(password, user.hashed_password):
         return None
     return user
 
@@ -58,7 +70,7 @@ def create_access_token(
 
 # Dependency for protected routes
 async def get_current_user(
-    token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)
+    token: str = Depends(oauth2_scheme), db: AsyncSession = Depends(get_async_db)
 ):
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
@@ -73,7 +85,7 @@ async def get_current_user(
         token_data = TokenData(username=username)
     except JWTError as e:
         raise credentials_exception from e
-    user = get_user(db, username=token_data.username)
+    user = await get_user(db, username=token_data.username)
     if user is None:
         raise credentials_exception
     return user
@@ -10,3 +10,92 @@ PINECONE_API_KEY = os.getenv(
     "pcsk_2ETskL_7RRsmCihFTJphq7hZ8UMcxrqJR72idNbJQV4f2EenqkpMBAVZSqgDY4oajCCLqj",
 )
 PINECONE_INDEX_NAME = os.getenv("PINECONE_INDEX_NAME", "prod")
+
+# Postgres connection pool (one engine per process)
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "10"))  # connections kept open
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "20"))  # extra connections for bursts
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))  # seconds to wait for a connection
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))  # seconds before reconnecting
+DB_STATEMENT_TIMEOUT_MS = int(os.getenv("DB_STATEMENT_TIMEOUT_MS", "30000"))  # 0 disables
+DB_CREATE_TABLES = os.getenv("DB_CREATE_TABLES", "false").lower() == "true"  # else use Alembic
+
+# Pinecone HTTP connections kept alive per host, shared by all threads
+PINECONE_POOL_MAXSIZE = int(os.getenv("PINECONE_POOL_MAXSIZE", "32"))
+
+# Vector store configuration
+VECTOR_BACKEND = os.getenv("VECTOR_BACKEND", "pinecone")  # pinecone, local or pgvector
+LOCAL_INDEX_PATH = os.getenv("LOCAL_INDEX_PATH", "local_index")
+LOCAL_INDEX_DTYPE = os.getenv("LOCAL_INDEX_DTYPE", "float32")  # float32, float16 or int8
+LOCAL_INDEX_MMAP = os.getenv("LOCAL_INDEX_MMAP", "true").lower() == "true"  # share pages across workers
+LOCAL_INDEX_REFRESH_SECONDS = float(os.getenv("LOCAL_INDEX_REFRESH_SECONDS", "5"))  # 0 disables
+RESCORE_FACTOR = int(os.getenv("RESCORE_FACTOR", "4"))  # top_k multiple rescored in float32; 0 disables
+LOCAL_INDEX_ANN = os.getenv("LOCAL_INDEX_ANN", "none")  # none (exact), ivf or hnsw
+ANN_MIN_ROWS = int(os.getenv("ANN_MIN_ROWS", "20000"))  # exact search below this many rows
+IVF_NLIST = int(os.getenv("IVF_NLIST", "0"))  # k-means clusters; 0 picks sqrt(rows)
+IVF_NPROBE = int(os.getenv("IVF_NPROBE", "16"))  # clusters scanned per query
+HNSW_M = int(os.getenv("HNSW_M", "16"))  # graph links per node
+HNSW_EF_CONSTRUCTION = int(os.getenv("HNSW_EF_CONSTRUCTION", "100"))
+HNSW_EF_SEARCH = int(os.getenv("HNSW_EF_SEARCH", "64"))  # candidate list size per query
+PGVECTOR_EF_SEARCH = int(os.getenv("PGVECTOR_EF_SEARCH", "100"))  # hnsw.ef_search for pgvector
+
+# Ingestion configuration
+INGEST_BATCH_SIZE = int(os.getenv("INGEST_BATCH_SIZE", "96"))
+INGEST_MAX_WORKERS = int(os.getenv("INGEST_MAX_WORKERS", "4"))
+BULK_INSERT_BATCH_SIZE = int(os.getenv("BULK_INSERT_BATCH_SIZE", "1000"))  # rows per INSERT
+
+# Embedding configuration
+EMBEDDING_BACKEND = os.getenv("EMBEDDING_BACKEND", "pinecone")  # pinecone | local | hashing
+EMBEDDING_MODEL = os.getenv("EMBEDDING_MODEL", "multilingual-e5-large")
+LOCAL_EMBEDDING_MODEL = os.getenv("LOCAL_EMBEDDING_MODEL", "intfloat/multilingual-e5-large")
+EMBEDDING_DIMENSION = int(os.getenv("EMBEDDING_DIMENSION", "1024"))
+EMBEDDING_WORKERS = int(os.getenv("EMBEDDING_WORKERS", "1"))  # threads running the local model
+EMBEDDING_BATCH_SIZE = int(os.getenv("EMBEDDING_BATCH_SIZE", "96"))  # inputs per embed call
+EMBEDDING_CACHE_SIZE = int(os.getenv("EMBEDDING_CACHE_SIZE", "1024"))
+EMBEDDING_CACHE_TTL = float(os.getenv("EMBEDDING_CACHE_TTL", "0"))  # 0 disables expiry
+EMBEDDING_CACHE_PATH = os.getenv("EMBEDDING_CACHE_PATH", "")  # SQLite file shared by workers
+EMBEDDING_CACHE_DISK_SIZE = int(os.getenv("EMBEDDING_CACHE_DISK_SIZE", "100000"))  # rows kept in the SQLite tier
+
+# Micro-batching of concurrent query embeddings
+EMBEDDING_COALESCE = os.getenv("EMBEDDING_COALESCE", "true").lower() == "true"
+EMBEDDING_COALESCE_WAIT_MS = float(os.getenv("EMBEDDING_COALESCE_WAIT_MS", "2"))  # latency budget
+EMBEDDING_COALESCE_MAX_BATCH = int(
+    os.getenv("EMBEDDING_COALESCE_MAX_BATCH", str(EMBEDDING_BATCH_SIZE))
+)
+EMBEDDING_COALESCE_CONCURRENCY = int(os.getenv("EMBEDDING_COALESCE_CONCURRENCY", "4"))
+
+# Search result cache configuration
+SEARCH_CACHE_SIZE = int(os.getenv("SEARCH_CACHE_SIZE", "512"))
+SEARCH_CACHE_TTL = float(os.getenv("SEARCH_CACHE_TTL", "300"))  # 0 disables expiry
+
+# Batch search configuration
+SEARCH_BATCH_MAX_QUERIES = int(os.getenv("SEARCH_BATCH_MAX_QUERIES", "1000"))
+EVALUATION_MAX_CONCURRENCY = int(os.getenv("EVALUATION_MAX_CONCURRENCY", "32"))  # POST /evaluate threads
+
+# Catalog snapshot configuration
+CATALOG_REFRESH_SECONDS = float(os.getenv("CATALOG_REFRESH_SECONDS", "300"))  # 0 disables
+
+# Large result sets and pagination
+SEARCH_MAX_TOP_K = int(os.getenv("SEARCH_MAX_TOP_K", "1000"))  # Pinecone's limit with metadata
+RESULT_PAGES_SIZE = int(os.getenv("RESULT_PAGES_SIZE", "256"))  # ranked result sets kept
+RESULT_PAGES_TTL = float(os.getenv("RESULT_PAGES_TTL", "600"))  # seconds a cursor stays valid
+TESTS_PAGE_SIZE = int(os.getenv("TESTS_PAGE_SIZE", "50"))  # GET /tests/ default limit
+TESTS_PAGE_MAX_SIZE = int(os.getenv("TESTS_PAGE_MAX_SIZE", "500"))
+SIMILAR_NEIGHBORS_K = int(os.getenv("SIMILAR_NEIGHBORS_K", "20"))  # precomputed per test; 0 disables
+
+# Hybrid (BM25 + vector) retrieval
+HYBRID_SEARCH = os.getenv("HYBRID_SEARCH", "true").lower() == "true"
+HYBRID_CANDIDATES = int(os.getenv("HYBRID_CANDIDATES", "50"))  # per retriever, before fusion
+RRF_K = int(os.getenv("RRF_K", "60"))
+
+# Background jobs (embedding and indexing)
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "2"))  # in-process workers; 0 runs none
+JOB_MAX_ATTEMPTS = int(os.getenv("JOB_MAX_ATTEMPTS", "5"))
+JOB_BACKOFF_SECONDS = float(os.getenv("JOB_BACKOFF_SECONDS", "2"))  # doubles per attempt
+JOB_BACKOFF_MAX_SECONDS = float(os.getenv("JOB_BACKOFF_MAX_SECONDS", "300"))
+JOB_POLL_SECONDS = float(os.getenv("JOB_POLL_SECONDS", "1"))
+JOB_LEASE_SECONDS = float(os.getenv("JOB_LEASE_SECONDS", "120"))  # reclaim after a crash
+
+# Instrumentation
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "true").lower() == "true"  # /metrics and stage timings
+OTEL_TRACING = os.getenv("OTEL_TRACING", "false").lower() == "true"  # needs opentelemetry-api
+OTEL_SERVICE_NAME = os.getenv("OTEL_SERVICE_NAME", "shl-rc-engine")
@@ -1,5 +1,4 @@
 from sqlalchemy import (
-    create_engine,
     Column,
     Integer,
     String,
@@ -8,12 +7,31 @@ from sqlalchemy import (
     JSON,
     DateTime,
     ARRAY,
+    Float,
+    Index,
+    ForeignKey,
+    create_engine,
+    event,
+    text,
 )
+from sqlalchemy.engine import make_url
+from sqlalchemy.types import UserDefinedType
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
 from datetime import datetime, UTC
 import os
+import threading
+import numpy as np
 from dotenv import load_dotenv
+from app.config import (
+    DB_POOL_SIZE,
+    DB_MAX_OVERFLOW,
+    DB_POOL_TIMEOUT,
+    DB_POOL_RECYCLE,
+    DB_STATEMENT_TIMEOUT_MS,
+    PGVECTOR_EF_SEARCH,
+)
+from app.services.metrics import REGISTRY, Counter
 
 # Load environment variables
 load_dotenv()
@@ -23,13 +41,108 @@ SQLALCHEMY_DATABASE_URL = os.getenv("DATABASE_URL")
 if not SQLALCHEMY_DATABASE_URL:
     raise ValueError("DATABASE_URL environment variable is not set")
 
-# Create engine
-engine = create_engine(SQLALCHEMY_DATABASE_URL)
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+def _async_engine_args(url: str):
+    """Translate a psycopg2-style URL into asyncpg URL and connect args."""
+    url = make_url(url)
+    connect_args = {}
+    if url.drivername in ("postgresql", "postgresql+psycopg2", "postgres"):
+        sslmode = url.query.get("sslmode")
+        url = url.set(drivername="postgresql+asyncpg").difference_update_query(
+            ["sslmode", "channel_binding"]
+        )
+        if sslmode and sslmode != "disable":
+            connect_args["ssl"] = sslmode
+        if DB_STATEMENT_TIMEOUT_MS > 0:
+            connect_args["server_settings"] = {
+                "statement_timeout": str(DB_STATEMENT_TIMEOUT_MS)
+            }
+    return url, connect_args
+
+
+# The process's only engine: the API, job workers and CLIs all share its pool
+_async_url, _async_connect_args = _async_engine_args(SQLALCHEMY_DATABASE_URL)
+async_engine = create_async_engine(
+    _async_url,
+    pool_size=DB_POOL_SIZE,
+    max_overflow=DB_MAX_OVERFLOW,
+    pool_timeout=DB_POOL_TIMEOUT,
+    pool_recycle=DB_POOL_RECYCLE,
+    pool_pre_ping=True,
+    connect_args=_async_connect_args,
+)
+AsyncSessionLocal = async_sessionmaker(
+    async_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False
+)
+
+DB_CONNECTIONS_OPENED = REGISTRY.register(
+    Counter(
+        "shl_db_connections_opened_total",
+        "New Postgres connections opened by the pool (each pays a TCP/TLS handshake).",
+    )
+)
+
+
+@event.listens_for(async_engine.sync_engine, "connect")
+def _count_connection(dbapi_connection, connection_record):
+    DB_CONNECTIONS_OPENED.inc()
+
+
+def _pool_samples():
+    pool = async_engine.pool
+    yield {"state": "checked_out"}, pool.checkedout()
+    yield {"state": "idle"}, pool.checkedin()
+    yield {"state": "overflow"}, max(pool.overflow(), 0)
+    yield {"state": "capacity"}, pool.size() + DB_MAX_OVERFLOW
+
+
+REGISTRY.add_collector(
+    "shl_db_pool_connections",
+    "gauge",
+    "Postgres pool connections by state; capacity is pool size plus overflow.",
+    _pool_samples,
+)
+
+_sync_engine = None
+_sync_engine_lock = threading.Lock()
+
+
+def get_sync_engine():
+    """A psycopg2 engine for blocking code in worker threads (the pgvector store).
+
+    Built on first use, so processes that never need it keep a single pool.
+    """
+    global _sync_engine
+    with _sync_engine_lock:
+        if _sync_engine is None:
+            url = make_url(SQLALCHEMY_DATABASE_URL)
+            if url.drivername == "postgres":
+                url = url.set(drivername="postgresql")
+            options = [f"-c hnsw.ef_search={PGVECTOR_EF_SEARCH}"]
+            if DB_STATEMENT_TIMEOUT_MS > 0:
+                options.append(f"-c statement_timeout={DB_STATEMENT_TIMEOUT_MS}")
+            _sync_engine = create_engine(
+                url,
+                pool_size=DB_POOL_SIZE,
+                max_overflow=DB_MAX_OVERFLOW,
+                pool_timeout=DB_POOL_TIMEOUT,
+                pool_recycle=DB_POOL_RECYCLE,
+                # No pre-ping: a search should be one round trip; recycling
+                # retires connections before idle-timeouts can drop them
+                pool_pre_ping=False,
+                connect_args={"options": " ".join(options)},
+            )
+            event.listen(_sync_engine, "connect", _count_connection)
+        return _sync_engine
+
 
 Base = declarative_base()
 
 
+# Naive UTC: DateTime columns have no time zone and asyncpg rejects aware values
+def utcnow() -> datetime:
+    return datetime.now(UTC).replace(tzinfo=None)
+
+
 class User(Base):
     __tablename__ = "users"
 
@@ -43,10 +156,16 @@ class User(Base):
 
 class Test(Base):
     __tablename__ = "tests"
+    # GIN indexes serve the array overlap (&&) filters of GET /tests/
+    __table_args__ = (
+        Index("ix_tests_test_type", "test_type", postgresql_using="gin"),
+        Index("ix_tests_job_levels", "job_levels", postgresql_using="gin"),
+        Index("ix_tests_languages", "languages", postgresql_using="gin"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String, index=True)
-    link = Column(String)
+    link = Column(String, unique=True, index=True)  # Natural key for bulk upserts
     remote_testing = Column(String)
     adaptive_irt = Column(String)
     test_type = Column(ARRAY(String))
@@ -54,18 +173,146 @@ class Test(Base):
     full_link = Column(String)
     job_levels = Column(ARRAY(String))
     languages = Column(ARRAY(String))
-    assessment_length = Column(Integer)
-    created_at = Column(DateTime, default=lambda: datetime.now(UTC))
+    assessment_length = Column(Integer, index=True)
+    created_at = Column(DateTime, default=utcnow)
+
+
+
+class Vector(UserDefinedType):
+    """pgvector's vector(n) column, sent and read in its '[x,y,...]' text form."""
+
+    cache_ok = True
+
+    def __init__(self, dimension: int):
+        self.dimension = dimension
+
+    def get_col_spec(self, **kw):
+        return f"vector({self.dimension})"
+
+    def bind_processor(self, dialect):
+        def process(value):
+            if value is None or isinstance(value, str):
+                return value
+            return "[" + ",".join(map(str, np.asarray(value, dtype=np.float32).tolist())) + "]"
+
+        return process
+
+    def result_processor(self, dialect, coltype):
+        def process(value):
+            if value is None or not isinstance(value, str):
+                return value
+            return np.array(value[1:-1].split(","), dtype=np.float32)
+
+        return process
+
+
+class TestEmbedding(Base):
+    """Each test's embedding, for the pgvector backend.
+
+    Searched with an HNSW index on cosine distance and joined to ``tests``,
+    so similarity, filters and hydration are one statement.
+    """
+
+    __tablename__ = "test_embeddings"
+    __table_args__ = (
+        Index(
+            "ix_test_embeddings_embedding_hnsw",
+            "embedding",
+            postgresql_using="hnsw",
+            postgresql_with={"m": 16, "ef_construction": 64},
+            postgresql_ops={"embedding": "vector_cosine_ops"},
+        ),
+    )
+
+    test_id = Column(Integer, ForeignKey("tests.id", ondelete="CASCADE"), primary_key=True)
+    embedding = Column(Vector(1024), nullable=False)  # multilingual-e5-large
+    updated_at = Column(DateTime, default=utcnow, onupdate=utcnow)
+
+
+class VectorSyncState(Base):
+    """What a vector index holds for each test as of the last sync.
+
+    Kept apart from ``tests`` so rows deleted from the catalog can still be
+    found and removed from the index.
+    """
+
+    __tablename__ = "vector_sync_state"
+
+    target = Column(String, primary_key=True)  # Which index, e.g. pinecone:prod/shl-tests
+    test_id = Column(Integer, primary_key=True)
+    content_hash = Column(String(64), nullable=False)
+    embedding_model = Column(String, nullable=False)
+    synced_at = Column(DateTime, default=utcnow)
+
+
+class TestNeighbors(Base):
+    """A test's nearest neighbors in one vector index, for GET /tests/{id}/similar.
+
+    Syncs recompute the lists whose test or neighbors were re-embedded or
+    deleted, so a lookup never needs a vector query.
+    """
+
+    __tablename__ = "test_neighbors"
+    # Finds the lists that mention a changed test
+    __table_args__ = (
+        Index("ix_test_neighbors_neighbor_ids", "neighbor_ids", postgresql_using="gin"),
+    )
+
+    target = Column(String, primary_key=True)  # vector_sync_state target
+    test_id = Column(Integer, ForeignKey("tests.id", ondelete="CASCADE"), primary_key=True)
+    neighbor_ids = Column(ARRAY(Integer), nullable=False)  # Best first
+    scores = Column(ARRAY(Float), nullable=False)
+    embedding_model = Column(String, nullable=False)
+    updated_at = Column(DateTime, default=utcnow, onupdate=utcnow)
+
+
+class Job(Base):
+    """A unit of background work, claimed by workers with SKIP LOCKED."""
+
+    __tablename__ = "jobs"
+    __table_args__ = (Index("ix_jobs_status_run_after", "status", "run_after"),)
+
+    id = Column(Integer, primary_key=True, index=True)
+    kind = Column(String, nullable=False)
+    payload = Column(JSON, nullable=False, default=dict)
+    status = Column(String, nullable=False, default="queued")  # queued|running|succeeded|failed
+    attempts = Column(Integer, nullable=False, default=0)
+    max_attempts = Column(Integer, nullable=False, default=5)
+    run_after = Column(DateTime, nullable=False, default=utcnow)
+    locked_at = Column(DateTime)  # Heartbeat of the worker running the job
+    last_error = Column(Text)
+    result = Column(JSON)
+    created_at = Column(DateTime, default=utcnow)
+    updated_at = Column(DateTime, default=utcnow, onupdate=utcnow)
+
+
+async def create_tables() -> None:
+    """Create missing tables; for scratch databases, Alembic manages the rest.
+
+    test_embeddings is skipped when the server has no pgvector extension.
+    """
+    async with async_engine.begin() as connection:
+        pgvector = await connection.scalar(
+            text("SELECT count(*) FROM pg_available_extensions WHERE name = 'vector'")
+        )
+        if pgvector:
+            await connection.execute(text("CREATE EXTENSION IF NOT EXISTS vector"))
+        tables = [
+            table
+            for table in Base.metadata.sorted_tables
+            if pgvector or table.name != TestEmbedding.__tablename__
+        ]
+        await connection.run_sync(Base.metadata.create_all, tables=tables)
 
 
-# Create tables
-Base.metadata.create_all(bind=engine)
+async def dispose_engine() -> None:
+    """Close pooled connections on shutdown."""
+    await async_engine.dispose()
+    if _sync_engine is not None:
+        _sync_engine.dispose()
 
 
-# Dependency to get DB session
-def get_db():
-    db = SessionLocal()
-    try:
+# Dependency to get an async DB session
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
         yield db
-    finally:
-        db.close()
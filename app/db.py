@@ -28,14 +28,18 @@ import json
 with open("processed_data.json", "r", encoding="utf-8") as file:
     datat = json.load(file)
 
-# Generate embeddings for the descriptions
-for i in range(0,len(datat)):
-    data = datat[i:i+50]
-    embeddings = pc.inference.embed(
-        model="multilingual-e5-large",
-        inputs=[d["description"] for d in data],
-        parameters={"input_type": "passage", "truncate": "END"},
-    )
+import os
+from app.services.embeddings import get_embedding_provider
+from app.services.ingestion import batched, ingest
+from app.services.sync_plan import plan_sync
+
+# Embedding backend chosen by EMBEDDING_BACKEND (Pinecone inference by default)
+embedder = get_embedding_provider()
+
+
+def write_batch(data):
+    # Generate embeddings for one batch of descriptions
+    embeddings = embedder.embed([d["description"] for d in data], "passage")
 
     # Prepare vectors for upserting to Pinecone
     vectors = []
@@ -43,7 +47,7 @@ for i in range(0,len(datat)):
         vectors.append(
             {
                 "id": d["id"],
-                "values": e["values"],
+                "values": e.tolist(),
                 "metadata": {
                     "id": d["id"],
                     "description": d["description"],
@@ -53,20 +57,42 @@ for i in range(0,len(datat)):
 
     # Upsert vectors to Pinecone
     index.upsert(vectors=vectors, namespace="dev")
+    return len(vectors)
+
+
+# Only re-embed records whose content or embedding model changed since the
+# last run, and drop vectors of records that disappeared from the file.
+SYNC_STATE_FILE = "processed_data.sync.json"
+state = {}
+if os.path.exists(SYNC_STATE_FILE):
+    with open(SYNC_STATE_FILE, "r", encoding="utf-8") as file:
+        state = {k: tuple(v) for k, v in json.load(file).items()}
+
+plan = plan_sync(
+    ({**d, "id": str(d["id"])} for d in datat), state, embedder.model
+)
+print(ingest(plan.upserts, write_batch))
+for ids in batched(plan.deletes, 1000):
+    index.delete(ids=ids, namespace="dev")
+print(f"{plan.unchanged} unchanged, {len(plan.deletes)} deleted")
+
+for vector_id in plan.deletes:
+    state.pop(vector_id, None)
+state.update((k, (digest, embedder.model)) for k, digest in plan.hashes.items())
+with open(SYNC_STATE_FILE, "w", encoding="utf-8") as file:
+    json.dump(state, file)
 # print(index.describe_index_stats())
 
 # Example query
 query = "Looking to hire mid-level professionals who are proficient in Python, SQL and Java Script. Need an assessment package that can test all skills with max duration of 60 minutes."
 
 # Generate embedding for the query
-embedding = pc.inference.embed(
-    model="multilingual-e5-large", inputs=[query], parameters={"input_type": "query"}
-)
+embedding = embedder.embed([query], "query")
 
 # Search for similar assessments
 results = index.query(
     namespace="dev",
-    vector=embedding[0]["values"],
+    vector=embedding[0].tolist(),
     top_k=3,
     include_values=False,
     include_metadata=True,
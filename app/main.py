@@ -1,41 +1,131 @@
+import asyncio
+from contextlib import asynccontextmanager
 from datetime import timedelta
-from fastapi import FastAPI, Depends, HTTPException, status
+from fastapi import FastAPI, Depends, Header, HTTPException, Query, Request, Response, status
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse
 from fastapi.security import OAuth2PasswordRequestForm
-from sqlalchemy.orm import Session
-from typing import List
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Annotated, List, Optional, Union
 import os
 import logging
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
 
 from app.models.models import (
     Token,
     User,
     UserCreate,
     TestCreate,
+    BulkTestCreate,
+    BulkTestCreateResponse,
+    ConflictStrategy,
+    JobResponse,
     TestResponseList,
+    TestPage,
+    SearchFilters,
     PineconeQueryRequest,
     PineconeQueryResponse,
-    PineconeMatch,
+    PineconeBatchQueryResponse,
+    SearchEvaluationMetrics,
+    SearchEvaluationRequest,
 )
 from app.auth import (
     authenticate_user,
     create_access_token,
     ACCESS_TOKEN_EXPIRE_MINUTES,
-    get_password_hash,
+    get_password_hash_async,
+)
+from app.database import (
+    get_async_db,
+    AsyncSessionLocal,
+    create_tables,
+    dispose_engine,
+    User as DBUser,
+    Job as DBJob,
+)
+from app.services.vector_store import get_vector_store
+from app.services.embedding_batcher import batcher_stats
+from app.services.embedding_cache import query_embedding_cache
+from app.services.search_cache import search_result_cache
+from app.services.catalog import catalog
+from app.services.result_pages import result_pages
+from app.services.search import build_response, hydrate, retrieve, use_hybrid
+from app.services.neighbors import similar_tests, stored_neighbors
+from app.services.filters import has_filters
+from app.services.evaluation import evaluate
+from app.services.jobs import JobWorkerPool, default_handlers, enqueue
+from app.services.metrics import REGISTRY, TESTS_WRITTEN, MetricsMiddleware, stage
+from app.services.test_import import import_tests, ndjson_lines
+from app.services.test_listing import (
+    InvalidCursorError,
+    etag_matches,
+    list_tests,
+    serialize_page,
+)
+from app.services.test_upsert import DuplicateTestsError, upsert_tests
+from app.config import (
+    SEARCH_BATCH_MAX_QUERIES,
+    CATALOG_REFRESH_SECONDS,
+    DB_CREATE_TABLES,
+    LOCAL_INDEX_REFRESH_SECONDS,
+    TESTS_PAGE_SIZE,
+    TESTS_PAGE_MAX_SIZE,
+    SEARCH_MAX_TOP_K,
 )
-from app.database import get_db, User as DBUser, Test as DBTest
-from app.services.pinecone_db import PineconeDatabase
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-app = FastAPI(title="AI Recommendation Engine")
 
-# Initialize Pinecone database
-pinecone_db = PineconeDatabase()
+async def _refresh_catalog_periodically():
+    """Pick up catalog writes made by other workers."""
+    while True:
+        await asyncio.sleep(CATALOG_REFRESH_SECONDS)
+        try:
+            async with AsyncSessionLocal() as db:
+                if await catalog.load(db):
+                    search_result_cache.invalidate()
+        except Exception:
+            logger.exception("Catalog refresh failed")
+
+
+async def _refresh_vector_store_periodically():
+    """Pick up local index saves made by other workers."""
+    while True:
+        await asyncio.sleep(LOCAL_INDEX_REFRESH_SECONDS)
+        try:
+            if await run_in_threadpool(vector_store.refresh):
+                search_result_cache.invalidate()
+        except Exception:
+            logger.exception("Vector index refresh failed")
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    if DB_CREATE_TABLES:
+        await create_tables()
+    async with AsyncSessionLocal() as db:
+        await catalog.load(db)
+    refreshers = []
+    if CATALOG_REFRESH_SECONDS > 0:
+        refreshers.append(asyncio.create_task(_refresh_catalog_periodically()))
+    if LOCAL_INDEX_REFRESH_SECONDS > 0:
+        refreshers.append(asyncio.create_task(_refresh_vector_store_periodically()))
+    job_workers = JobWorkerPool(default_handlers(vector_store))
+    job_workers.start()
+    yield
+    await job_workers.stop()
+    for refresher in refreshers:
+        refresher.cancel()
+    await dispose_engine()
+
+
+app = FastAPI(title="AI Recommendation Engine", lifespan=lifespan)
+
+# Initialize the configured vector store (Pinecone or local index)
+vector_store = get_vector_store()
 
 # Configure CORS
 origins = os.environ.get("CORS_ORIGINS", "*").split(",")
@@ -46,20 +136,7 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
-
-DATABASE_URL = os.environ.get("DATABASE_URL")
-engine = create_engine(DATABASE_URL, pool_pre_ping=True)
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
-
-
-# Update the `get_db` dependency to use the updated engine
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
-
+app.add_middleware(MetricsMiddleware)
 
 @app.get("/")
 async def root():
@@ -79,15 +156,40 @@ async def health_check():
     }
 
 
+@app.get("/cache/stats")
+async def cache_stats():
+    """
+    Hit/miss counters for the query-embedding and search-result caches, plus
+    how well concurrent query embeddings are being coalesced.
+    """
+    return {
+        "query_embeddings": query_embedding_cache.stats(),
+        "search_results": search_result_cache.stats(),
+        "embedding_batches": batcher_stats(),
+    }
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    """
+    Prometheus metrics: per-stage and per-route latency histograms, stage
+    errors, embedding batch sizes and cache counters.
+    """
+    return PlainTextResponse(
+        REGISTRY.render(), media_type="text/plain; version=0.0.4; charset=utf-8"
+    )
+
+
 @app.post("/token", response_model=Token)
 async def login_for_access_token(
-    form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(get_db)
+    form_data: OAuth2PasswordRequestForm = Depends(),
+    db: AsyncSession = Depends(get_async_db),
 ):
     """
     Login endpoint that authenticates users and returns a JWT token.
     """
     logger.info(f"Login attempt for user: {form_data.username}")
-    user = authenticate_user(db, form_data.username, form_data.password)
+    user = await authenticate_user(db, form_data.username, form_data.password)
     if not user:
         logger.warning(f"Invalid login attempt for user: {form_data.username}")
         raise HTTPException(
@@ -109,11 +211,11 @@ async def login_for_access_token(
 
 
 @app.get("/users/{id}", response_model=User)
-async def read_users_me(id: int, db: Session = Depends(get_db)):
+async def read_users_me(id: int, db: AsyncSession = Depends(get_async_db)):
     """
     Endpoint that returns user information by ID.
     """
-    user = db.query(DBUser).filter(DBUser.id == id).first()
+    user = await db.get(DBUser, id)
     if not user:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail="User not found"
@@ -122,12 +224,13 @@ async def read_users_me(id: int, db: Session = Depends(get_db)):
 
 
 @app.post("/users/", response_model=User, status_code=status.HTTP_201_CREATED)
-async def create_user(user: UserCreate, db: Session = Depends(get_db)):
+async def create_user(user: UserCreate, db: AsyncSession = Depends(get_async_db)):
     """
     Create a new user.
     """
     # Check if username already exists
-    db_user = db.query(DBUser).filter(DBUser.username == user.username).first()
+    result = await db.execute(select(DBUser).where(DBUser.username == user.username))
+    db_user = result.scalars().first()
     if db_user:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -136,7 +239,8 @@ async def create_user(user: UserCreate, db: Session = Depends(get_db)):
 
     # Check if email already exists (if provided)
     if user.email:
-        db_user = db.query(DBUser).filter(DBUser.email == user.email).first()
+        result = await db.execute(select(DBUser).where(DBUser.email == user.email))
+        db_user = result.scalars().first()
         if db_user:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
@@ -144,7 +248,7 @@ async def create_user(user: UserCreate, db: Session = Depends(get_db)):
             )
 
     # Create new user
-    hashed_password = get_password_hash(user.password)
+    hashed_password = await get_password_hash_async(user.password)
     db_user = DBUser(
         username=user.username,
         email=user.email,
@@ -153,114 +257,296 @@ async def create_user(user: UserCreate, db: Session = Depends(get_db)):
     )
 
     db.add(db_user)
-    db.commit()
-    db.refresh(db_user)
+    await db.commit()
+    await db.refresh(db_user)
 
     return db_user
 
 
-@app.post("/tests/", status_code=status.HTTP_201_CREATED)
+def _browse_filters(
+    max_duration: Optional[int] = None,
+    job_levels: Annotated[Optional[List[str]], Query()] = None,
+    languages: Annotated[Optional[List[str]], Query()] = None,
+    test_types: Annotated[Optional[List[str]], Query()] = None,
+    remote_testing: Optional[bool] = None,
+    adaptive_irt: Optional[bool] = None,
+) -> SearchFilters:
+    """SearchFilters from query parameters; list filters repeat the parameter."""
+    return SearchFilters(
+        max_duration=max_duration,
+        job_levels=job_levels,
+        languages=languages,
+        test_types=test_types,
+        remote_testing=remote_testing,
+        adaptive_irt=adaptive_irt,
+    )
+
+
+@app.get("/tests/", response_model=TestPage)
+async def browse_tests(
+    filters: SearchFilters = Depends(_browse_filters),
+    limit: int = Query(TESTS_PAGE_SIZE, ge=1, le=TESTS_PAGE_MAX_SIZE),
+    cursor: Optional[str] = None,
+    if_none_match: Optional[str] = Header(None),
+    db: AsyncSession = Depends(get_async_db),
+):
+    """
+    List tests in id order, filtered like search (list filters match any
+    value). Pass next_cursor back as cursor for the following page. Each
+    page carries an ETag; a matching If-None-Match gets 304 without a body.
+    """
+    try:
+        with stage("tests_list"):
+            page = await list_tests(db, filters, limit, cursor)
+    except InvalidCursorError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor"
+        )
+    body, etag = serialize_page(page)
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if etag_matches(if_none_match, etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
+
+
+@app.get("/tests/{test_id}/similar", response_model=PineconeQueryResponse)
+async def similar(
+    test_id: int,
+    top_k: int = Query(10, ge=1, le=SEARCH_MAX_TOP_K),
+    filters: SearchFilters = Depends(_browse_filters),
+    db: AsyncSession = Depends(get_async_db),
+):
+    """
+    Tests most similar to an existing one, without embedding any text.
+    Unfiltered requests within SIMILAR_NEIGHBORS_K are served from the
+    precomputed neighbor list; otherwise the test's stored vector is
+    queried with the same filters as search.
+    """
+    matches = None
+    if not has_filters(filters):
+        with stage("neighbors_lookup"):
+            matches = await stored_neighbors(db, vector_store, test_id, top_k)
+    if matches is None:
+        with stage("vector_query"):
+            matches = await run_in_threadpool(
+                similar_tests, vector_store, test_id, top_k, filters
+            )
+    if matches is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="Test not found in the index"
+        )
+    with stage("hydration"):
+        hydrated = hydrate(matches, catalog.snapshot)
+    return PineconeQueryResponse(matches=[match for match, _ in hydrated])
+
+
+@app.post(
+    "/tests/",
+    status_code=status.HTTP_201_CREATED,
+    response_model=BulkTestCreateResponse,
+)
 async def create_tests(
-    tests: List[TestCreate],
-    db: Session = Depends(get_db),
+    tests: Union[List[TestCreate], BulkTestCreate],
+    db: AsyncSession = Depends(get_async_db),
+):
+    """
+    Create tests in bulk and return their IDs in request order.
+
+    Accepts a plain list or a BulkTestCreate whose conflict_strategy decides
+    what happens to tests whose link already exists: fail (409, nothing
+    written), skip, or update. Rows are committed before returning; embedding
+    and indexing run in the background job identified by job_id.
+    """
+    if isinstance(tests, BulkTestCreate):
+        items, strategy = tests.tests, tests.conflict_strategy
+    else:
+        items, strategy = tests, ConflictStrategy.FAIL
+
+    try:
+        with stage("tests_upsert"):
+            result = await upsert_tests(db, items, strategy)
+    except DuplicateTestsError as e:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail={"message": "Tests already exist", "links": e.links},
+        )
+
+    TESTS_WRITTEN.inc(result.created, outcome="created")
+    TESTS_WRITTEN.inc(result.updated, outcome="updated")
+    TESTS_WRITTEN.inc(result.skipped, outcome="skipped")
+    test_ids = [row.id for row in result.rows]
+    job_id = None
+    if result.rows:
+        with stage("catalog_add"):
+            catalog.add(result.rows)
+        # Cached responses may hydrate stale rows for updated tests
+        search_result_cache.invalidate()
+        # Embeds only new rows and updated rows whose content changed
+        with stage("job_enqueue"):
+            job = await enqueue(db, "sync_tests", {"test_ids": test_ids})
+        job_id = job.id
+
+    return BulkTestCreateResponse(
+        test_ids=test_ids,
+        created=result.created,
+        updated=result.updated,
+        skipped=result.skipped,
+        job_id=job_id,
+    )
+
+
+_IMPORT_ERROR_STATUS = {
+    "conflict": status.HTTP_409_CONFLICT,
+    "line_too_long": status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+    "malformed": status.HTTP_400_BAD_REQUEST,
+}
+
+
+@app.post("/tests/import")
+async def import_tests_stream(
+    request: Request,
+    conflict_strategy: ConflictStrategy = ConflictStrategy.UPDATE,
 ):
     """
-    Create multiple tests in bulk and return their IDs as an array.
-    """
-    db_tests = [
-        DBTest(
-            name=test.name,
-            link=test.link,
-            remote_testing=test.remote_testing,
-            adaptive_irt=test.adaptive_irt,
-            test_type=test.test_type,
-            description=test.description,
-            full_link=test.full_link,
-            job_levels=test.job_levels,
-            languages=test.languages,
-            assessment_length=test.assessment_length,
+    Import an NDJSON body (one test per line) without buffering it.
+
+    The body is read, validated and written in bounded chunks while earlier
+    chunks are embedded and indexed; progress is logged after each chunk and
+    the final totals are returned. A stopped import answers 409 (link
+    conflict under the fail strategy), 413 (a line over MAX_LINE_BYTES) or
+    400 (other malformed input), with the totals so far as detail.
+    """
+    summary = None
+    async for summary in import_tests(
+        ndjson_lines(request.stream()), vector_store, conflict_strategy
+    ):
+        pass
+    if summary is not None and "error" in summary:
+        raise HTTPException(
+            status_code=_IMPORT_ERROR_STATUS[summary["reason"]], detail=summary
         )
-        for test in tests
-    ]
-
-    db.bulk_save_objects(db_tests)
-    db.commit()
-
-    test_names = [test.name for test in tests]
-    inserted_tests = db.query(DBTest).filter(DBTest.name.in_(test_names)).all()
-    test_ids = [test.id for test in inserted_tests]
-
-    pinecone_data = []
-    for test, db_test in zip(tests, inserted_tests):
-        pinecone_data.append(
-            {
-                "id": str(db_test.id),
-                "name": test.name,
-                "description": test.description,
-                "link": test.link,
-                "remote_testing": test.remote_testing,
-                "adaptive_irt": test.adaptive_irt,
-                "test_type": test.test_type,
-                "full_link": test.full_link,
-                "job_levels": test.job_levels,
-                "languages": test.languages,
-                "assessment_length": test.assessment_length,
-            }
+    return summary
+
+
+@app.post(
+    "/tests/sync",
+    status_code=status.HTTP_202_ACCEPTED,
+    response_model=JobResponse,
+)
+async def sync_vector_index(
+    reconcile: bool = False, db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Queue a job that re-embeds tests changed since the last sync and drops
+    vectors of deleted tests. With reconcile=true the index itself is listed
+    to repair drift. Poll /jobs/{id} for the summary.
+    """
+    return await enqueue(db, "sync_tests", {"reconcile": reconcile})
+
+
+@app.get("/jobs/{job_id}", response_model=JobResponse)
+async def read_job(job_id: int, db: AsyncSession = Depends(get_async_db)):
+    """
+    Status of a background job; result holds its summary once it succeeds.
+    """
+    job = await db.get(DBJob, job_id)
+    if not job:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="Job not found"
         )
+    return job
 
-    if pinecone_data:
-        pinecone_db.add_tests(pinecone_data)
 
-    return {"test_ids": test_ids}
+def _search_cache_key(query_request: PineconeQueryRequest):
+    filters = query_request.filters
+    return search_result_cache.key(
+        query_request.query,
+        query_request.top_k,
+        query_request.time,
+        filters.cache_key() if filters is not None else None,
+        use_hybrid(query_request),
+    )
 
 
 @app.post("/search/", response_model=PineconeQueryResponse)
-async def search_tests(
-    query_request: PineconeQueryRequest,
-    db: Session = Depends(get_db),
-):
+async def search_tests(query_request: PineconeQueryRequest):
     """
     Search for tests using semantic similarity.
     """
-    matches = pinecone_db.query(query_request.query, top_k=query_request.top_k)
+    cache_key = _search_cache_key(query_request)
+    response = search_result_cache.get(cache_key)
+    if response is None:
+        snapshot = catalog.snapshot
+        matches = await run_in_threadpool(
+            retrieve, vector_store, [query_request], snapshot
+        )
+        response = build_response(query_request, matches[0], snapshot)
+        search_result_cache.put(cache_key, response)
+
+    if query_request.page_size:
+        page, next_cursor = result_pages.start(
+            response.matches, query_request.page_size
+        )
+        return PineconeQueryResponse(
+            matches=page, next_cursor=next_cursor, total=len(response.matches)
+        )
+    return response
 
-    test_ids = [int(match.id) for match in matches]
-    tests = db.query(DBTest).filter(DBTest.id.in_(test_ids)).all()
 
-    test_dict = {test.id: test for test in tests}
+@app.get("/search/page", response_model=PineconeQueryResponse)
+async def search_tests_page(cursor: str):
+    """
+    Fetch the next page of a paginated search without re-running it.
 
-    pinecone_matches = []
-    for match in matches:
-        test_id = int(match.id)
-        match_obj = PineconeMatch(
-            id=match.id, score=match.score, metadata=match.metadata
+    Cursors are kept in this worker's memory; one issued by another worker
+    or expired after RESULT_PAGES_TTL gets 410.
+    """
+    page = result_pages.page(cursor)
+    if page is None:
+        raise HTTPException(
+            status_code=status.HTTP_410_GONE,
+            detail="Cursor expired or unknown; repeat the search",
         )
+    matches, next_cursor, total = page
+    return PineconeQueryResponse(matches=matches, next_cursor=next_cursor, total=total)
 
-        if test_id in test_dict:
-            test_data = test_dict[test_id]
-            match_obj.metadata.update(
-                {
-                    "name": test_data.name,
-                    "description": test_data.description,
-                    "link": test_data.link,
-                    "remote_testing": test_data.remote_testing,
-                    "adaptive_irt": test_data.adaptive_irt,
-                    "test_type": test_data.test_type,
-                    "full_link": test_data.full_link,
-                    "job_levels": test_data.job_levels,
-                    "languages": test_data.languages,
-                    "assessment_length": test_data.assessment_length,
-                }
-            )
-            match_score = float(match_obj.score)
-            if test_data.assessment_length:
-                try:
-                    assessment_length = int(test_data.assessment_length)
-                    if assessment_length > query_request.time and match_score>0.5:
-                        continue
-                except (ValueError, TypeError):
-                    pass
-
-        pinecone_matches.append(match_obj)
-
-    return PineconeQueryResponse(matches=pinecone_matches)
+
+@app.post("/search/batch", response_model=PineconeBatchQueryResponse)
+async def search_tests_batch(query_requests: List[PineconeQueryRequest]):
+    """
+    Search for many queries at once. All uncached queries are embedded in
+    batched inference calls, looked up together, and hydrated from the
+    in-memory catalog snapshot. Results are returned in request order.
+    """
+    if len(query_requests) > SEARCH_BATCH_MAX_QUERIES:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"At most {SEARCH_BATCH_MAX_QUERIES} queries per batch",
+        )
+
+    cache_keys = [_search_cache_key(request) for request in query_requests]
+    responses = [search_result_cache.get(key) for key in cache_keys]
+    pending = [i for i, response in enumerate(responses) if response is None]
+
+    if pending:
+        snapshot = catalog.snapshot
+        batch_matches = await run_in_threadpool(
+            retrieve, vector_store, [query_requests[i] for i in pending], snapshot
+        )
+        for i, matches in zip(pending, batch_matches):
+            responses[i] = build_response(query_requests[i], matches, snapshot)
+            search_result_cache.put(cache_keys[i], responses[i])
+
+    return PineconeBatchQueryResponse(results=responses)
+
+
+@app.post("/evaluate", response_model=SearchEvaluationMetrics)
+async def evaluate_search(evaluation_request: SearchEvaluationRequest):
+    """
+    Run a labelled query set through the search pipeline in parallel and
+    report mean recall@k, MAP@k and p50/p95/p99 latency per stage (embed,
+    vector query, hydration, filter). The search-result cache is bypassed.
+    """
+    return await run_in_threadpool(
+        evaluate, vector_store, catalog.snapshot, evaluation_request
+    )
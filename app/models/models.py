@@ -1,7 +1,8 @@
-from typing import Optional, List
-from pydantic import BaseModel
+from typing import Any, Dict, Optional, List
+from pydantic import BaseModel, Field, field_validator, model_validator
 from enum import Enum
 from datetime import datetime
+from app.config import EVALUATION_MAX_CONCURRENCY, SEARCH_MAX_TOP_K
 
 
 class Token(BaseModel):
@@ -68,12 +69,26 @@ class TestCreate(TestBase):
     pass
 
 
+def assessment_minutes(value) -> Optional[int]:
+    """Parse an assessment_length value into whole minutes, if possible."""
+    try:
+        return int(value)
+    except (ValueError, TypeError):
+        return None
+
+
 class TestResponse(TestBase):
     id: int
 
     class Config:
         from_attributes = True
 
+    @field_validator("assessment_length", mode="before")
+    @classmethod
+    def _minutes_as_text(cls, value):
+        # The column stores whole minutes; the API exposes them as text
+        return str(value) if isinstance(value, int) else value
+
 
 class TestResponseList(BaseModel):
     tests: List[TestResponse]
@@ -82,6 +97,11 @@ class TestResponseList(BaseModel):
         from_attributes = True
 
 
+class TestPage(BaseModel):
+    tests: List[TestResponse]
+    next_cursor: Optional[str] = None  # Pass as cursor to get the next page
+
+
 class ConflictStrategy(str, Enum):
     SKIP = "skip"  # Skip tests that already exist
     UPDATE = "update"  # Update existing tests
@@ -93,20 +113,95 @@ class BulkTestCreate(BaseModel):
     conflict_strategy: ConflictStrategy = ConflictStrategy.FAIL
 
 
+class BulkTestCreateResponse(BaseModel):
+    test_ids: List[int]  # Created or updated tests, in request order
+    created: int
+    updated: int
+    skipped: int
+    job_id: Optional[int] = None  # Background job embedding and indexing the rows
+
+
+class JobStatus(str, Enum):
+    QUEUED = "queued"
+    RUNNING = "running"
+    SUCCEEDED = "succeeded"
+    FAILED = "failed"
+
+
+class JobResponse(BaseModel):
+    id: int
+    kind: str
+    status: JobStatus
+    attempts: int
+    max_attempts: int
+    run_after: Optional[datetime] = None  # Earliest time a queued job will run
+    last_error: Optional[str] = None
+    result: Optional[Dict[str, Any]] = None
+    created_at: Optional[datetime] = None
+    updated_at: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
+
+
+class SearchFilters(BaseModel):
+    max_duration: Optional[int] = None  # Maximum assessment_length in minutes
+    job_levels: Optional[List[str]] = None  # Match tests with any of these
+    languages: Optional[List[str]] = None  # Match tests with any of these
+    test_types: Optional[List[str]] = None  # Match tests with any of these
+    remote_testing: Optional[bool] = None
+    adaptive_irt: Optional[bool] = None
+
+    def cache_key(self) -> tuple:
+        """A hashable, order-insensitive form used in cache keys."""
+        return (
+            self.max_duration,
+            tuple(sorted(self.job_levels)) if self.job_levels else None,
+            tuple(sorted(self.languages)) if self.languages else None,
+            tuple(sorted(self.test_types)) if self.test_types else None,
+            self.remote_testing,
+            self.adaptive_irt,
+        )
+
+
 class PineconeQueryRequest(BaseModel):
     query: str
-    top_k: Optional[int] = 1
+    top_k: Optional[int] = Field(default=1, ge=1, le=SEARCH_MAX_TOP_K)
     time: Optional[int] = 30
+    filters: Optional[SearchFilters] = None  # Applied inside the vector query
+    page_size: Optional[int] = Field(default=None, gt=0)  # Paginate results
+    hybrid: Optional[bool] = None  # Fuse BM25 with vector results; None uses HYBRID_SEARCH
+
+    @field_validator("top_k", mode="before")
+    @classmethod
+    def _default_top_k(cls, value):
+        # Clients send top_k: null to mean the default
+        return 1 if value is None else value
 
 
 class PineconeMatch(BaseModel):
     id: str
+    # Vector similarity. Hybrid results are ordered by metadata["rrf_score"]
+    # instead, and hits found only by BM25 have score 0.0.
     score: float
     metadata: dict
 
 
 class PineconeQueryResponse(BaseModel):
     matches: List[PineconeMatch]
+    next_cursor: Optional[str] = None  # Set when more pages remain
+    total: Optional[int] = None  # Size of the full ranked result set when paginated
+
+
+class PineconeBatchQueryResponse(BaseModel):
+    results: List[PineconeQueryResponse]  # One response per query, in request order
+
+
+class StageLatency(BaseModel):
+    p50: float
+    p95: float
+    p99: float
+    mean: float
 
 
 class SearchEvaluationMetrics(BaseModel):
@@ -114,6 +209,9 @@ class SearchEvaluationMetrics(BaseModel):
     mean_average_precision_at_k: float
     k: int
     total_queries: int
+    evaluated_queries: int = 0  # Queries with at least one relevant test ID
+    latency_ms: Dict[str, StageLatency] = {}  # Per pipeline stage, plus "total"
+    seconds: float = 0.0  # Wall-clock time for the whole evaluation
 
 
 class SearchEvaluationRequest(BaseModel):
@@ -121,4 +219,14 @@ class SearchEvaluationRequest(BaseModel):
     relevant_test_ids: List[
         List[int]
     ]  # List of lists, where each inner list contains relevant test IDs for each query
-    k: int = 3  # Default to 3, matching our current top_k
+    k: int = Field(default=3, ge=1, le=SEARCH_MAX_TOP_K)  # Default to 3, matching our current top_k
+    time: Optional[int] = None  # Duration budget as in search; None disables the filter
+    filters: Optional[SearchFilters] = None
+    hybrid: Optional[bool] = None  # None uses HYBRID_SEARCH
+    concurrency: int = Field(default=8, ge=1, le=EVALUATION_MAX_CONCURRENCY)  # Queries run in parallel
+
+    @model_validator(mode="after")
+    def _check_labels(self):
+        if len(self.queries) != len(self.relevant_test_ids):
+            raise ValueError("queries and relevant_test_ids must have the same length")
+        return self
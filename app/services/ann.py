@@ -0,0 +1,344 @@
+import os
+import threading
+from typing import Optional
+import numpy as np
+from app.config import (
+    IVF_NLIST,
+    IVF_NPROBE,
+    HNSW_M,
+    HNSW_EF_CONSTRUCTION,
+    HNSW_EF_SEARCH,
+)
+
+KMEANS_ITERATIONS = 10
+KMEANS_SAMPLE_PER_LIST = 64  # Training rows drawn per cluster
+ASSIGN_CHUNK = 65_536  # Rows scored against the centroids at a time
+RETRAIN_GROWTH = 4  # Retrain IVF clusters once the catalog has grown this much
+
+
+class ANNIndex:
+    """Candidate generator over the rows of a LocalVectorStore matrix.
+
+    Rows are identified by their position in the store's matrix. The store
+    rescores candidates exactly against its own snapshot, so candidates read
+    while a writer is updating the index can cost recall but never return a
+    wrong id or score. All mutating methods are called with the store lock held.
+    """
+
+    @property
+    def ready(self) -> bool:
+        raise NotImplementedError
+
+    def build(self, matrix: np.ndarray) -> None:
+        """Index every row of matrix from scratch."""
+        raise NotImplementedError
+
+    def update(self, matrix: np.ndarray, rows: np.ndarray) -> None:
+        """Index rows just inserted into or replaced in matrix."""
+        raise NotImplementedError
+
+    def compact(self, matrix: np.ndarray, keep: np.ndarray) -> None:
+        """Follow a delete that kept only rows `keep`, renumbered from 0."""
+        raise NotImplementedError
+
+    def candidates(
+        self,
+        query: np.ndarray,
+        top_k: int,
+        size: int,
+        eligible: Optional[np.ndarray] = None,
+    ) -> np.ndarray:
+        """Rows below size likely to hold the query's top_k eligible matches."""
+        raise NotImplementedError
+
+    def save(self, path: str) -> None:
+        raise NotImplementedError
+
+    def load(self, path: str, rows: int) -> bool:
+        """Read a persisted index; False if missing or out of date."""
+        raise NotImplementedError
+
+
+def _nearest(centroids: np.ndarray, vectors: np.ndarray) -> np.ndarray:
+    """Index of the most similar centroid for each (normalised) vector."""
+    labels = np.empty(len(vectors), dtype=np.int32)
+    for start in range(0, len(vectors), ASSIGN_CHUNK):
+        chunk = vectors[start : start + ASSIGN_CHUNK]
+        labels[start : start + len(chunk)] = np.argmax(chunk @ centroids.T, axis=1)
+    return labels
+
+
+class IVFIndex(ANNIndex):
+    """Inverted-file index: rows bucketed under their nearest k-means centroid.
+
+    A query scans the nprobe clusters whose centroids score highest, so
+    nprobe trades recall for latency. New rows are assigned to the existing
+    centroids; the clusters are retrained when the catalog has grown
+    RETRAIN_GROWTH-fold since they were fitted.
+    """
+
+    kind = "ivf"
+
+    def __init__(self, nlist: int = None, nprobe: int = None):
+        self.nlist = IVF_NLIST if nlist is None else nlist
+        self.nprobe = nprobe or IVF_NPROBE
+        self.trained_rows = 0
+        # (centroids, row assignments) replaced as one tuple for lock-free readers
+        self._state = None
+        self._lists = (None, None, None)
+
+    @property
+    def ready(self) -> bool:
+        return self._state is not None
+
+    def train(self, matrix: np.ndarray) -> np.ndarray:
+        """Spherical k-means over a sample of the rows."""
+        rng = np.random.default_rng(0)
+        nlist = min(self.nlist or max(1, int(np.sqrt(len(matrix)))), len(matrix))
+        sample_size = min(len(matrix), nlist * KMEANS_SAMPLE_PER_LIST)
+        sample = matrix[np.sort(rng.choice(len(matrix), sample_size, replace=False))]
+        centroids = sample[rng.choice(sample_size, nlist, replace=False)].copy()
+        for _ in range(KMEANS_ITERATIONS):
+            labels = _nearest(centroids, sample)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, labels, sample)
+            empty = np.bincount(labels, minlength=nlist) == 0
+            # Reseed clusters that lost every row so nlist stays meaningful
+            sums[empty] = sample[rng.choice(sample_size, int(empty.sum()))]
+            norms = np.linalg.norm(sums, axis=1, keepdims=True)
+            norms[norms == 0] = 1.0
+            centroids = (sums / norms).astype(np.float32)
+        return centroids
+
+    def build(self, matrix: np.ndarray) -> None:
+        centroids = self.train(matrix)
+        self._state = (centroids, _nearest(centroids, matrix))
+        self.trained_rows = len(matrix)
+
+    def update(self, matrix: np.ndarray, rows: np.ndarray) -> None:
+        if not self.nlist and len(matrix) >= RETRAIN_GROWTH * self.trained_rows:
+            self.build(matrix)
+            return
+        centroids, old = self._state
+        assignments = np.empty(len(matrix), dtype=np.int32)
+        kept = min(len(old), len(matrix))
+        assignments[:kept] = old[:kept]
+        assignments[rows] = _nearest(centroids, matrix[rows])
+        self._state = (centroids, assignments)
+
+    def compact(self, matrix: np.ndarray, keep: np.ndarray) -> None:
+        centroids, assignments = self._state
+        self._state = (centroids, assignments[keep])
+
+    def _inverted_lists(self):
+        """Rows grouped by cluster (CSR order + offsets), rebuilt after writes."""
+        state = self._state
+        built_for, order, offsets = self._lists
+        if built_for is not state:
+            centroids, assignments = state
+            order = np.argsort(assignments, kind="stable")
+            offsets = np.searchsorted(assignments[order], np.arange(len(centroids) + 1))
+            self._lists = (state, order, offsets)
+        return state[0], order, offsets
+
+    def candidates(self, query, top_k, size, eligible=None):
+        centroids, order, offsets = self._inverted_lists()
+        ranked = np.argsort(-(centroids @ query))
+        parts, found, probed, nprobe = [], 0, 0, self.nprobe
+        # Probe more clusters when filters leave fewer than top_k candidates
+        while True:
+            for cluster in ranked[probed:nprobe]:
+                rows = order[offsets[cluster] : offsets[cluster + 1]]
+                rows = rows[rows < size]
+                if eligible is not None:
+                    rows = rows[eligible[rows]]
+                parts.append(rows)
+                found += len(rows)
+            probed = min(nprobe, len(ranked))
+            if found >= top_k or probed >= len(ranked):
+                break
+            nprobe *= 2
+        return np.concatenate(parts) if parts else np.empty(0, dtype=np.int64)
+
+    def save(self, path: str) -> None:
+        centroids, assignments = self._state
+        target = os.path.join(path, "ivf.npz")
+        tmp = target + ".tmp.npz"
+        np.savez(
+            tmp,
+            centroids=centroids,
+            assignments=assignments,
+            trained_rows=self.trained_rows,
+        )
+        os.replace(tmp, target)
+
+    def load(self, path: str, rows: int) -> bool:
+        target = os.path.join(path, "ivf.npz")
+        if not os.path.exists(target):
+            return False
+        with np.load(target) as stored:
+            if len(stored["assignments"]) != rows:
+                return False
+            if self.nlist and len(stored["centroids"]) != self.nlist:
+                return False
+            self._state = (stored["centroids"], stored["assignments"])
+            self.trained_rows = int(stored["trained_rows"])
+        return True
+
+
+class HNSWIndex(ANNIndex):
+    """Hierarchical navigable small-world graph built with hnswlib.
+
+    ef_search sets how many candidates a query keeps while walking the
+    graph, trading recall for latency. Inserts and updates go straight into
+    the graph; deleted rows are tombstoned until they outnumber live ones,
+    at which point the graph is rebuilt.
+    """
+
+    kind = "hnsw"
+
+    def __init__(
+        self,
+        dimension: int,
+        m: int = None,
+        ef_construction: int = None,
+        ef_search: int = None,
+    ):
+        try:
+            import hnswlib
+        except ImportError as e:
+            raise ImportError(
+                "LOCAL_INDEX_ANN=hnsw requires hnswlib: pip install hnswlib"
+            ) from e
+        self._hnswlib = hnswlib
+        self.dimension = dimension
+        self.m = m or HNSW_M
+        self.ef_construction = ef_construction or HNSW_EF_CONSTRUCTION
+        self.ef_search = ef_search or HNSW_EF_SEARCH
+        # ef is global to the graph, so queries and writes take turns
+        self._lock = threading.Lock()
+        self._index = None
+        self._row_labels = np.empty(0, dtype=np.int64)  # row -> graph label
+        self._label_rows = np.empty(0, dtype=np.int64)  # graph label -> row, -1 if deleted
+
+    @property
+    def ready(self) -> bool:
+        return self._index is not None
+
+    def _new_graph(self, capacity: int):
+        graph = self._hnswlib.Index(space="ip", dim=self.dimension)
+        graph.init_index(
+            max_elements=max(capacity, 1024),
+            M=self.m,
+            ef_construction=self.ef_construction,
+            random_seed=0,
+        )
+        return graph
+
+    def build(self, matrix: np.ndarray) -> None:
+        graph = self._new_graph(len(matrix))
+        labels = np.arange(len(matrix), dtype=np.int64)
+        if len(matrix):
+            graph.add_items(matrix, labels)
+        with self._lock:
+            self._index = graph
+            self._row_labels = labels
+            self._label_rows = labels.copy()
+
+    def update(self, matrix: np.ndarray, rows: np.ndarray) -> None:
+        rows = np.asarray(rows, dtype=np.int64)
+        existing = rows < len(self._row_labels)
+        labels = np.empty(len(rows), dtype=np.int64)
+        labels[existing] = self._row_labels[rows[existing]]
+        added = int((~existing).sum())
+        next_label = len(self._label_rows)
+        labels[~existing] = np.arange(next_label, next_label + added)
+
+        row_labels = np.empty(len(matrix), dtype=np.int64)
+        row_labels[: len(self._row_labels)] = self._row_labels
+        row_labels[rows] = labels
+        label_rows = np.full(next_label + added, -1, dtype=np.int64)
+        label_rows[:next_label] = self._label_rows
+        label_rows[labels] = rows
+        with self._lock:
+            needed = self._index.get_current_count() + added
+            if needed > self._index.get_max_elements():
+                self._index.resize_index(max(needed, 2 * self._index.get_max_elements()))
+            self._index.add_items(matrix[rows], labels)
+            self._row_labels = row_labels
+            self._label_rows = label_rows
+
+    def compact(self, matrix: np.ndarray, keep: np.ndarray) -> None:
+        removed = np.ones(len(self._row_labels), dtype=bool)
+        removed[keep] = False
+        row_labels = self._row_labels[keep]
+        if self._index.get_current_count() > 2 * len(row_labels):
+            self.build(matrix)
+            return
+        label_rows = np.full(len(self._label_rows), -1, dtype=np.int64)
+        label_rows[row_labels] = np.arange(len(row_labels))
+        with self._lock:
+            for label in self._row_labels[removed]:
+                self._index.mark_deleted(int(label))
+            self._row_labels = row_labels
+            self._label_rows = label_rows
+
+    def candidates(self, query, top_k, size, eligible=None):
+        live = len(self._row_labels)
+        share = 1.0 if eligible is None else np.count_nonzero(eligible) / max(len(eligible), 1)
+        # Over-fetch so post-filtering still leaves about top_k eligible rows
+        k = min(live, int(np.ceil(top_k / max(share, 1e-6))) * (1 if eligible is None else 2))
+        if k <= 0:
+            return np.empty(0, dtype=np.int64)
+        with self._lock:
+            self._index.set_ef(max(self.ef_search, k))
+            try:
+                labels, _ = self._index.knn_query(query, k=k, num_threads=1)
+            except RuntimeError:
+                # Too few reachable nodes for k; the store falls back to exact search
+                return np.empty(0, dtype=np.int64)
+            label_rows = self._label_rows
+        rows = label_rows[labels[0]]
+        rows = rows[(rows >= 0) & (rows < size)]
+        if eligible is not None:
+            rows = rows[eligible[rows]]
+        return rows
+
+    def save(self, path: str) -> None:
+        target = os.path.join(path, "hnsw.bin")
+        with self._lock:
+            self._index.save_index(target + ".tmp")
+            np.savez(os.path.join(path, "hnsw.tmp.npz"), row_labels=self._row_labels)
+        os.replace(target + ".tmp", target)
+        os.replace(os.path.join(path, "hnsw.tmp.npz"), os.path.join(path, "hnsw.npz"))
+
+    def load(self, path: str, rows: int) -> bool:
+        target = os.path.join(path, "hnsw.bin")
+        labels_file = os.path.join(path, "hnsw.npz")
+        if not (os.path.exists(target) and os.path.exists(labels_file)):
+            return False
+        with np.load(labels_file) as stored:
+            row_labels = stored["row_labels"]
+        if len(row_labels) != rows:
+            return False
+        graph = self._hnswlib.Index(space="ip", dim=self.dimension)
+        graph.load_index(target)
+        label_rows = np.full(graph.get_current_count(), -1, dtype=np.int64)
+        label_rows[row_labels] = np.arange(rows)
+        with self._lock:
+            self._index = graph
+            self._row_labels = row_labels
+            self._label_rows = label_rows
+        return True
+
+
+def get_ann_index(kind: str, dimension: int) -> Optional[ANNIndex]:
+    """Build the ANN index selected by LOCAL_INDEX_ANN, or None for exact search."""
+    kind = (kind or "none").lower()
+    if kind in ("none", "exact"):
+        return None
+    if kind == "ivf":
+        return IVFIndex()
+    if kind == "hnsw":
+        return HNSWIndex(dimension)
+    raise ValueError(f"Unknown ANN index: {kind}")
@@ -0,0 +1,104 @@
+import re
+from collections import Counter
+from typing import Dict, Iterable, List, Optional, Tuple
+import numpy as np
+from app.models.models import SearchFilters
+from app.services.filters import FilterIndex
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+(?:[+#]+|\.[a-z0-9]+)*")
+STOPWORDS = frozenset(
+    "a an and are as at be but by for from has have in is it its of on or that "
+    "the their this to was were which will with who can able need our your".split()
+)
+
+
+def tokenize(text: Optional[str]) -> List[str]:
+    """Lowercase word tokens, keeping skill names such as c++, c# and node.js."""
+    if not text:
+        return []
+    return [t for t in TOKEN_PATTERN.findall(text.lower()) if t not in STOPWORDS]
+
+
+class BM25Index:
+    """An Okapi BM25 inverted index stored as CSR arrays.
+
+    Each posting carries its precomputed BM25 impact, so scoring a query is
+    a concatenation of its terms' posting slices and one ``np.bincount``.
+    """
+
+    def __init__(self, records: Iterable, k1: float = 1.2, b: float = 0.75):
+        """Index the name and description of each catalog record."""
+        records = list(records)
+        self.ids = np.asarray([record.id for record in records], dtype=np.int64)
+        self.filter_index = FilterIndex([record.as_metadata() for record in records])
+        self.vocab: Dict[str, int] = {}
+
+        term_ids: List[int] = []
+        doc_ids: List[int] = []
+        freqs: List[int] = []
+        lengths = np.zeros(len(records), dtype=np.float32)
+        for doc, record in enumerate(records):
+            tokens = tokenize(record.name) + tokenize(record.description)
+            lengths[doc] = len(tokens)
+            for term, count in Counter(tokens).items():
+                term_ids.append(self.vocab.setdefault(term, len(self.vocab)))
+                doc_ids.append(doc)
+                freqs.append(count)
+
+        term_ids = np.asarray(term_ids, dtype=np.int64)
+        order = np.argsort(term_ids, kind="stable")
+        self.docs = np.asarray(doc_ids, dtype=np.int32)[order]
+        tf = np.asarray(freqs, dtype=np.float32)[order]
+        doc_freq = np.bincount(term_ids, minlength=len(self.vocab))
+        self.offsets = np.zeros(len(self.vocab) + 1, dtype=np.int64)
+        np.cumsum(doc_freq, out=self.offsets[1:])
+
+        n_docs = max(len(records), 1)
+        avg_length = float(lengths.mean()) if len(records) else 1.0
+        idf = np.log1p((n_docs - doc_freq + 0.5) / (doc_freq + 0.5)).astype(np.float32)
+        norm = k1 * (1 - b + b * lengths[self.docs] / max(avg_length, 1.0))
+        self.weights = (
+            np.repeat(idf, doc_freq) * tf * (k1 + 1) / (tf + norm)
+        ).astype(np.float32)
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def scores(self, query: str) -> np.ndarray:
+        """BM25 score of every document for the query."""
+        slices = [
+            slice(self.offsets[t], self.offsets[t + 1])
+            for t in {self.vocab[term] for term in tokenize(query) if term in self.vocab}
+        ]
+        if not slices:
+            return np.zeros(len(self.ids), dtype=np.float32)
+        docs = np.concatenate([self.docs[s] for s in slices])
+        weights = np.concatenate([self.weights[s] for s in slices])
+        return np.bincount(docs, weights=weights, minlength=len(self.ids))
+
+    def search(
+        self, query: str, top_k: int, filters: Optional[SearchFilters] = None
+    ) -> List[Tuple[int, float]]:
+        """(test id, score) for the top_k matching tests, best first."""
+        if not len(self.ids) or top_k <= 0:
+            return []
+        scores = self.scores(query)
+        eligible = self.filter_index.mask(filters)
+        if eligible is not None:
+            scores = np.where(eligible, scores, 0.0)
+        hits = np.flatnonzero(scores > 0)
+        if len(hits) > top_k:
+            hits = hits[np.argpartition(-scores[hits], top_k - 1)[:top_k]]
+        hits = hits[np.argsort(-scores[hits], kind="stable")]
+        return [(int(self.ids[doc]), float(scores[doc])) for doc in hits]
+
+
+def reciprocal_rank_fusion(
+    rankings: List[List[str]], k: int = 60
+) -> List[Tuple[str, float]]:
+    """Fuse ranked id lists: score(d) = sum over lists of 1 / (k + rank)."""
+    fused: Dict[str, float] = {}
+    for ranking in rankings:
+        for rank, doc_id in enumerate(ranking, start=1):
+            fused[doc_id] = fused.get(doc_id, 0.0) + 1.0 / (k + rank)
+    return sorted(fused.items(), key=lambda item: item[1], reverse=True)
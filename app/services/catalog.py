@@ -0,0 +1,122 @@
+import logging
+import threading
+from typing import Any, Dict, Iterable, Optional
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.database import Test as DBTest
+
+logger = logging.getLogger(__name__)
+
+TEST_FIELDS = (
+    "id",
+    "name",
+    "link",
+    "remote_testing",
+    "adaptive_irt",
+    "test_type",
+    "description",
+    "full_link",
+    "job_levels",
+    "languages",
+    "assessment_length",
+)
+
+
+class TestRecord:
+    """A compact, read-only copy of one row of the tests table."""
+
+    __slots__ = TEST_FIELDS
+
+    def __init__(self, **values: Any):
+        for field in TEST_FIELDS:
+            value = values.get(field)
+            if isinstance(value, list):
+                value = tuple(value)
+            object.__setattr__(self, field, value)
+
+    def __setattr__(self, name: str, value: Any):
+        raise AttributeError("TestRecord is immutable")
+
+    def __eq__(self, other: Any) -> bool:
+        return isinstance(other, TestRecord) and all(
+            getattr(self, field) == getattr(other, field) for field in TEST_FIELDS
+        )
+
+    @classmethod
+    def from_row(cls, row: DBTest) -> "TestRecord":
+        return cls(**{field: getattr(row, field) for field in TEST_FIELDS})
+
+    def as_metadata(self) -> Dict[str, Any]:
+        """The fields search responses merge into each match's metadata."""
+        return {
+            "name": self.name,
+            "description": self.description,
+            "link": self.link,
+            "remote_testing": self.remote_testing,
+            "adaptive_irt": self.adaptive_irt,
+            "test_type": list(self.test_type) if self.test_type is not None else None,
+            "full_link": self.full_link,
+            "job_levels": list(self.job_levels) if self.job_levels is not None else None,
+            "languages": list(self.languages) if self.languages is not None else None,
+            "assessment_length": self.assessment_length,
+        }
+
+
+class CatalogSnapshot:
+    """An immutable id -> TestRecord mapping; replaced, never mutated."""
+
+    __slots__ = ("_records",)
+
+    def __init__(self, records: Iterable[TestRecord] = ()):
+        self._records: Dict[int, TestRecord] = {record.id: record for record in records}
+
+    def __len__(self) -> int:
+        return len(self._records)
+
+    def __contains__(self, test_id: int) -> bool:
+        return test_id in self._records
+
+    def __eq__(self, other: Any) -> bool:
+        return isinstance(other, CatalogSnapshot) and self._records == other._records
+
+    def get(self, test_id: int) -> Optional[TestRecord]:
+        return self._records.get(test_id)
+
+    def records(self) -> Iterable[TestRecord]:
+        return self._records.values()
+
+    def with_records(self, records: Iterable[TestRecord]) -> "CatalogSnapshot":
+        """A new snapshot with records added or replaced."""
+        merged = CatalogSnapshot()
+        merged._records = dict(self._records)
+        merged._records.update((record.id, record) for record in records)
+        return merged
+
+
+class Catalog:
+    """Holds the current snapshot; writers publish a new one by reference swap."""
+
+    def __init__(self):
+        self.snapshot = CatalogSnapshot()
+        self._lock = threading.Lock()
+
+    async def load(self, db: AsyncSession) -> bool:
+        """Reload every test row; returns True if the catalog changed."""
+        result = await db.execute(select(DBTest))
+        snapshot = CatalogSnapshot(TestRecord.from_row(row) for row in result.scalars())
+        with self._lock:
+            changed = snapshot != self.snapshot
+            if changed:
+                # Keep the old object otherwise: indexes built from it key on identity
+                self.snapshot = snapshot
+        logger.info("Loaded catalog snapshot with %d tests", len(snapshot))
+        return changed
+
+    def add(self, rows: Iterable[DBTest]) -> None:
+        """Publish a snapshot that includes freshly written rows."""
+        records = [TestRecord.from_row(row) for row in rows]
+        with self._lock:
+            self.snapshot = self.snapshot.with_records(records)
+
+
+catalog = Catalog()
@@ -0,0 +1,143 @@
+import logging
+import queue
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+from app.config import (
+    EMBEDDING_COALESCE,
+    EMBEDDING_COALESCE_WAIT_MS,
+    EMBEDDING_COALESCE_MAX_BATCH,
+    EMBEDDING_COALESCE_CONCURRENCY,
+)
+from app.services.embeddings import EmbeddingProvider
+from app.services.ingestion import batched
+from app.services.metrics import observe_batch
+
+logger = logging.getLogger(__name__)
+
+
+class EmbeddingBatcher:
+    """Coalesces concurrent query-embedding calls into shared model calls.
+
+    A collector thread takes the first waiting request, keeps gathering
+    arrivals until max_batch_size texts are queued or max_wait_ms has
+    passed, embeds the distinct texts in one call and fans the vectors back
+    to each caller. At most ``concurrency`` batches are in flight; while all
+    slots are busy new requests queue up and form the next, larger batch.
+    """
+
+    def __init__(
+        self,
+        embedder: EmbeddingProvider,
+        max_wait_ms: float = None,
+        max_batch_size: int = None,
+        concurrency: int = None,
+    ):
+        self.embedder = embedder
+        self.max_wait = (
+            max_wait_ms if max_wait_ms is not None else EMBEDDING_COALESCE_WAIT_MS
+        ) / 1000.0
+        self.max_batch_size = max_batch_size or EMBEDDING_COALESCE_MAX_BATCH
+        concurrency = concurrency or EMBEDDING_COALESCE_CONCURRENCY
+        self._slots = threading.BoundedSemaphore(concurrency)
+        self._executor = ThreadPoolExecutor(
+            max_workers=concurrency, thread_name_prefix="embedding-batch"
+        )
+        self._queue: "queue.Queue[Tuple[List[str], Future]]" = queue.Queue()
+        self._lock = threading.Lock()
+        self._collector: Optional[threading.Thread] = None
+        self.batches = 0
+        self.texts = 0
+        self.largest_batch = 0
+
+    def embed(self, texts: List[str]) -> List[np.ndarray]:
+        """Embed query texts, blocking until their shared batch completes."""
+        if not texts:
+            return []
+        self._start()
+        future: Future = Future()
+        self._queue.put((list(texts), future))
+        return future.result()
+
+    def _start(self) -> None:
+        if self._collector is not None:
+            return
+        with self._lock:
+            if self._collector is None:
+                self._collector = threading.Thread(
+                    target=self._collect, name="embedding-batcher", daemon=True
+                )
+                self._collector.start()
+
+    def _collect(self) -> None:
+        while True:
+            self._slots.acquire()
+            pending = [self._queue.get()]
+            size = len(pending[0][0])
+            deadline = time.monotonic() + self.max_wait
+            while size < self.max_batch_size:
+                remaining = deadline - time.monotonic()
+                try:
+                    item = (
+                        self._queue.get(timeout=remaining)
+                        if remaining > 0
+                        else self._queue.get_nowait()
+                    )
+                except queue.Empty:
+                    break
+                pending.append(item)
+                size += len(item[0])
+            self._executor.submit(self._flush, pending)
+
+    def _flush(self, pending: List[Tuple[List[str], Future]]) -> None:
+        try:
+            unique = list(dict.fromkeys(text for texts, _ in pending for text in texts))
+            vectors: Dict[str, np.ndarray] = {}
+            for batch in batched(unique, self.max_batch_size):
+                observe_batch(len(batch), "query")
+                vectors.update(zip(batch, self.embedder.embed(batch, "query")))
+            with self._lock:
+                self.batches += 1
+                self.texts += len(unique)
+                self.largest_batch = max(self.largest_batch, len(unique))
+            for texts, future in pending:
+                future.set_result([vectors[text] for text in texts])
+        except Exception as e:
+            logger.warning("Embedding batch of %d requests failed: %s", len(pending), e)
+            for _, future in pending:
+                if not future.done():
+                    future.set_exception(e)
+        finally:
+            self._slots.release()
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            return {
+                "batches": self.batches,
+                "texts": self.texts,
+                "avg_batch_size": round(self.texts / self.batches, 2) if self.batches else 0.0,
+                "largest_batch": self.largest_batch,
+                "max_wait_ms": self.max_wait * 1000.0,
+            }
+
+
+_batchers: Dict[int, EmbeddingBatcher] = {}
+_batchers_lock = threading.Lock()
+
+
+def query_batcher(embedder: EmbeddingProvider) -> Optional[EmbeddingBatcher]:
+    """The shared batcher for an embedder, or None when coalescing is off."""
+    if not EMBEDDING_COALESCE:
+        return None
+    with _batchers_lock:
+        if id(embedder) not in _batchers:
+            _batchers[id(embedder)] = EmbeddingBatcher(embedder)
+        return _batchers[id(embedder)]
+
+
+def batcher_stats() -> Dict[str, Dict[str, float]]:
+    """Stats for every batcher, keyed by embedding model."""
+    with _batchers_lock:
+        return {b.embedder.model: b.stats() for b in _batchers.values()}
@@ -0,0 +1,220 @@
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional, Tuple
+import numpy as np
+from app.config import (
+    EMBEDDING_CACHE_SIZE,
+    EMBEDDING_CACHE_TTL,
+    EMBEDDING_CACHE_PATH,
+    EMBEDDING_CACHE_DISK_SIZE,
+)
+
+PRUNE_EVERY = 256  # SQLite writes between sweeps of expired and surplus rows
+
+
+def normalize_query(text: str) -> str:
+    """Collapse whitespace and case so trivially different queries share a key."""
+    return " ".join(text.split()).lower()
+
+
+class EmbeddingCache:
+    """A bounded LRU cache of query embeddings with optional TTL.
+
+    When ``path`` is set, entries are also written to a SQLite file so that
+    several uvicorn workers on one host reuse each other's embeddings. The
+    file expires rows on the same TTL and keeps at most ``disk_size``, the
+    least recently used going first, swept every PRUNE_EVERY writes.
+    """
+
+    def __init__(
+        self,
+        max_size: int = None,
+        ttl: float = None,
+        path: Optional[str] = None,
+        disk_size: int = None,
+    ):
+        """Create the in-memory tier and, if configured, the SQLite tier."""
+        self.max_size = EMBEDDING_CACHE_SIZE if max_size is None else max_size
+        self.ttl = EMBEDDING_CACHE_TTL if ttl is None else ttl
+        self.path = EMBEDDING_CACHE_PATH if path is None else path
+        self.disk_size = EMBEDDING_CACHE_DISK_SIZE if disk_size is None else disk_size
+        self._writes = 0
+        self._entries: "OrderedDict[Tuple[str, str], Tuple[float, np.ndarray]]" = (
+            OrderedDict()
+        )
+        self._lock = threading.Lock()
+        self._db = self._connect() if self.path else None
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self._miss_seconds = 0.0
+
+    def _connect(self) -> sqlite3.Connection:
+        db = sqlite3.connect(self.path, check_same_thread=False, timeout=5)
+        db.execute("PRAGMA journal_mode=WAL")
+        db.execute(
+            "CREATE TABLE IF NOT EXISTS query_embeddings ("
+            "model TEXT, query TEXT, created REAL, vector BLOB, "
+            "PRIMARY KEY (model, query))"
+        )
+        columns = {row[1] for row in db.execute("PRAGMA table_info(query_embeddings)")}
+        if "used" not in columns:
+            # Files written before eviction: treat every row as last used when created
+            db.execute("ALTER TABLE query_embeddings ADD COLUMN used REAL")
+            db.execute("UPDATE query_embeddings SET used = created")
+        db.execute(
+            "CREATE INDEX IF NOT EXISTS ix_query_embeddings_used ON query_embeddings (used)"
+        )
+        db.commit()
+        self._prune(db)
+        return db
+
+    def _prune(self, db: sqlite3.Connection) -> None:
+        """Delete expired rows and all but the disk_size most recently used."""
+        if self.ttl:
+            db.execute("DELETE FROM query_embeddings WHERE created < ?", (time.time() - self.ttl,))
+        db.execute(
+            "DELETE FROM query_embeddings WHERE rowid IN ("
+            "SELECT rowid FROM query_embeddings ORDER BY used DESC LIMIT -1 OFFSET ?)",
+            (max(self.disk_size, 0),),
+        )
+        db.commit()
+
+    def _expired(self, created: float) -> bool:
+        return bool(self.ttl) and time.time() - created > self.ttl
+
+    def _read_disk(self, key: Tuple[str, str]) -> Optional[Tuple[float, np.ndarray]]:
+        row = self._db.execute(
+            "SELECT created, vector FROM query_embeddings WHERE model = ? AND query = ?",
+            key,
+        ).fetchone()
+        if row is None:
+            return None
+        if self._expired(row[0]):
+            self._db.execute(
+                "DELETE FROM query_embeddings WHERE model = ? AND query = ?", key
+            )
+            self._db.commit()
+            return None
+        self._db.execute(
+            "UPDATE query_embeddings SET used = ? WHERE model = ? AND query = ?",
+            (time.time(), *key),
+        )
+        self._db.commit()
+        return row[0], np.frombuffer(row[1], dtype=np.float32)
+
+    def _write_disk(self, key: Tuple[str, str], created: float, vector: np.ndarray):
+        self._db.execute(
+            "INSERT OR REPLACE INTO query_embeddings (model, query, created, vector, used) "
+            "VALUES (?, ?, ?, ?, ?)",
+            (*key, created, vector.tobytes(), created),
+        )
+        self._db.commit()
+        self._writes += 1
+        if self._writes % PRUNE_EVERY == 0:
+            self._prune(self._db)
+
+    def _remember(self, key: Tuple[str, str], created: float, vector: np.ndarray):
+        self._entries[key] = (created, vector)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def get(self, model: str, query: str) -> Optional[np.ndarray]:
+        """Return a cached embedding, checking memory before SQLite."""
+        key = (model, normalize_query(query))
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and not self._expired(entry[0]):
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            if entry is not None:
+                del self._entries[key]
+            if self._db is not None:
+                entry = self._read_disk(key)
+                if entry is not None:
+                    self._remember(key, *entry)
+                    self.hits += 1
+                    self.disk_hits += 1
+                    return entry[1]
+            return None
+
+    def put(self, model: str, query: str, vector: np.ndarray) -> None:
+        """Store an embedding in every configured tier."""
+        key = (model, normalize_query(query))
+        vector = np.asarray(vector, dtype=np.float32)
+        created = time.time()
+        with self._lock:
+            if self.max_size > 0:
+                self._remember(key, created, vector)
+            if self._db is not None:
+                self._write_disk(key, created, vector)
+
+    def get_or_compute(
+        self, model: str, query: str, compute: Callable[[], np.ndarray]
+    ) -> np.ndarray:
+        """Return the cached embedding or compute, time and store it."""
+        vector = self.get(model, query)
+        if vector is not None:
+            return vector
+        start = time.perf_counter()
+        vector = np.asarray(compute(), dtype=np.float32)
+        elapsed = time.perf_counter() - start
+        with self._lock:
+            self.misses += 1
+            self._miss_seconds += elapsed
+        self.put(model, query, vector)
+        return vector
+
+    def get_or_compute_many(
+        self,
+        model: str,
+        queries: List[str],
+        compute: Callable[[List[str]], List[np.ndarray]],
+    ) -> List[np.ndarray]:
+        """Batch variant of get_or_compute: embed only the misses, in one call."""
+        vectors: List[Optional[np.ndarray]] = [self.get(model, q) for q in queries]
+        missing: Dict[str, List[int]] = {}
+        for position, (query, vector) in enumerate(zip(queries, vectors)):
+            if vector is None:
+                missing.setdefault(normalize_query(query), []).append(position)
+        if missing:
+            texts = [queries[positions[0]] for positions in missing.values()]
+            start = time.perf_counter()
+            computed = compute(texts)
+            elapsed = time.perf_counter() - start
+            with self._lock:
+                self.misses += len(texts)
+                self._miss_seconds += elapsed
+            for text, positions, vector in zip(texts, missing.values(), computed):
+                vector = np.asarray(vector, dtype=np.float32)
+                self.put(model, text, vector)
+                for position in positions:
+                    vectors[position] = vector
+        return vectors
+
+    def clear(self) -> None:
+        """Drop every in-memory entry (the SQLite tier is left intact)."""
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, float]:
+        """Hit/miss counters plus the embedding time saved by hits."""
+        with self._lock:
+            avg_miss = self._miss_seconds / self.misses if self.misses else 0.0
+            return {
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "hits": self.hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "avg_embed_seconds": round(avg_miss, 6),
+                "estimated_seconds_saved": round(avg_miss * self.hits, 3),
+            }
+
+
+# Shared by every vector-store backend in this process
+query_embedding_cache = EmbeddingCache()
@@ -0,0 +1,145 @@
+import threading
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from typing import List
+import numpy as np
+from app.config import (
+    EMBEDDING_BACKEND,
+    EMBEDDING_MODEL,
+    LOCAL_EMBEDDING_MODEL,
+    EMBEDDING_DIMENSION,
+    EMBEDDING_BATCH_SIZE,
+    EMBEDDING_WORKERS,
+)
+from app.services.bm25 import tokenize
+from app.services.ingestion import batched
+from app.services.metrics import stage
+
+
+class EmbeddingProvider:
+    """Turns text into vectors; one instance is shared for the process lifetime."""
+
+    model: str
+    dimension: int
+
+    def embed(self, inputs: List[str], input_type: str) -> np.ndarray:
+        """Embed texts ("query" or "passage") into a float32 matrix."""
+        raise NotImplementedError
+
+
+class PineconeEmbeddingProvider(EmbeddingProvider):
+    """Pinecone's hosted inference API (multilingual-e5-large by default)."""
+
+    def __init__(self, api_key: str = None, model: str = None, dimension: int = None):
+        from app.services.pinecone_client import pinecone_client
+
+        self.pc = pinecone_client(api_key)
+        self.model = model or EMBEDDING_MODEL
+        self.dimension = dimension or EMBEDDING_DIMENSION
+
+    def embed(self, inputs: List[str], input_type: str) -> np.ndarray:
+        if not inputs:
+            return np.empty((0, self.dimension), dtype=np.float32)
+        parameters = {"input_type": input_type}
+        if input_type == "passage":
+            parameters["truncate"] = "END"
+        vectors = []
+        for batch in batched(inputs, EMBEDDING_BATCH_SIZE):
+            with stage("pinecone_embed"):
+                response = self.pc.inference.embed(
+                    model=self.model, inputs=batch, parameters=parameters
+                )
+            vectors.extend(embedding["values"] for embedding in response)
+        return np.asarray(vectors, dtype=np.float32).reshape(len(inputs), -1)
+
+
+class SentenceTransformerProvider(EmbeddingProvider):
+    """A local CPU/GPU model loaded once and kept warm.
+
+    Inference runs on a small dedicated thread pool so concurrent requests
+    are batched by the model instead of contending for it. Requires the
+    optional ``sentence-transformers`` package.
+    """
+
+    def __init__(self, model: str = None, workers: int = None):
+        try:
+            from sentence_transformers import SentenceTransformer
+        except ImportError as e:
+            raise ImportError(
+                "EMBEDDING_BACKEND=local requires sentence-transformers: "
+                "pip install sentence-transformers"
+            ) from e
+        self.model = model or LOCAL_EMBEDDING_MODEL
+        self._model = SentenceTransformer(self.model, device=None)
+        self.dimension = self._model.get_sentence_embedding_dimension()
+        self._executor = ThreadPoolExecutor(
+            max_workers=workers or EMBEDDING_WORKERS, thread_name_prefix="embed"
+        )
+        # Warm up so the first request does not pay for lazy initialisation
+        self._encode(["warm up"], "query")
+
+    def _encode(self, inputs: List[str], input_type: str) -> np.ndarray:
+        # e5 models expect these prefixes; other models ignore them harmlessly
+        prefix = "query: " if input_type == "query" else "passage: "
+        return self._model.encode(
+            [prefix + text for text in inputs],
+            batch_size=EMBEDDING_BATCH_SIZE,
+            convert_to_numpy=True,
+            normalize_embeddings=True,
+        ).astype(np.float32)
+
+    def embed(self, inputs: List[str], input_type: str) -> np.ndarray:
+        if not inputs:
+            return np.empty((0, self.dimension), dtype=np.float32)
+        return self._executor.submit(self._encode, inputs, input_type).result()
+
+
+class HashingEmbeddingProvider(EmbeddingProvider):
+    """Deterministic signed feature hashing of word unigrams and bigrams.
+
+    No model, no network: meant for tests, benchmarks and offline
+    development, not for relevance.
+    """
+
+    def __init__(self, dimension: int = None):
+        self.dimension = dimension or EMBEDDING_DIMENSION
+        self.model = f"hashing-{self.dimension}"
+
+    def _features(self, text: str) -> List[int]:
+        tokens = tokenize(text)
+        grams = tokens + [f"{a} {b}" for a, b in zip(tokens, tokens[1:])]
+        return [zlib.crc32(gram.encode("utf-8")) for gram in grams]
+
+    def embed(self, inputs: List[str], input_type: str) -> np.ndarray:
+        rows, hashes = [], []
+        for row, text in enumerate(inputs):
+            features = self._features(text)
+            rows.extend([row] * len(features))
+            hashes.extend(features)
+        hashes = np.asarray(hashes, dtype=np.uint32)
+        signs = np.where(hashes & 0x80000000, -1.0, 1.0).astype(np.float32)
+        matrix = np.zeros((len(inputs), self.dimension), dtype=np.float32)
+        np.add.at(matrix, (np.asarray(rows, dtype=np.int64), hashes % self.dimension), signs)
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return matrix / norms
+
+
+_providers = {}
+_providers_lock = threading.Lock()
+
+
+def get_embedding_provider(backend: str = None) -> EmbeddingProvider:
+    """The process-wide provider selected by EMBEDDING_BACKEND."""
+    backend = (backend or EMBEDDING_BACKEND).lower()
+    with _providers_lock:
+        if backend not in _providers:
+            if backend == "pinecone":
+                _providers[backend] = PineconeEmbeddingProvider()
+            elif backend == "local":
+                _providers[backend] = SentenceTransformerProvider()
+            elif backend == "hashing":
+                _providers[backend] = HashingEmbeddingProvider()
+            else:
+                raise ValueError(f"Unknown embedding backend: {backend}")
+        return _providers[backend]
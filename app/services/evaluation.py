@@ -0,0 +1,164 @@
+import argparse
+import asyncio
+import json
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from time import perf_counter
+from typing import Dict, List, Set, Tuple
+import numpy as np
+from app.config import HYBRID_SEARCH
+from app.models.models import (
+    PineconeQueryRequest,
+    SearchEvaluationMetrics,
+    SearchEvaluationRequest,
+    StageLatency,
+)
+from app.services.catalog import CatalogSnapshot
+from app.services.metrics import recorded_stages, stage
+from app.services.search import build_response, retrieve
+from app.services.vector_store import VectorStore
+
+logger = logging.getLogger(__name__)
+
+# The search pipeline in order; each query's time in each is reported
+STAGES = ("embed", "vector_query", "lexical", "hydration", "filter")
+
+
+def recall_at_k(ranked: List[int], relevant: Set[int], k: int) -> float:
+    """Share of the relevant tests found in the top k."""
+    return len(set(ranked[:k]) & relevant) / len(relevant)
+
+
+def average_precision_at_k(ranked: List[int], relevant: Set[int], k: int) -> float:
+    """Mean of precision@i over the ranks i <= k that hold a relevant test."""
+    hits, total = 0, 0.0
+    for rank, test_id in enumerate(ranked[:k], start=1):
+        if test_id in relevant:
+            hits += 1
+            total += hits / rank
+    return total / min(len(relevant), k)
+
+
+def latency_summary(seconds: List[float]) -> StageLatency:
+    """p50/p95/p99/mean in milliseconds."""
+    values = np.asarray(seconds, dtype=np.float64) * 1000
+    if values.size == 0:
+        return StageLatency(p50=0.0, p95=0.0, p99=0.0, mean=0.0)
+    p50, p95, p99 = np.percentile(values, [50, 95, 99])
+    return StageLatency(
+        p50=round(float(p50), 3),
+        p95=round(float(p95), 3),
+        p99=round(float(p99), 3),
+        mean=round(float(values.mean()), 3),
+    )
+
+
+def run_query(
+    store: VectorStore, snapshot: CatalogSnapshot, query_request: PineconeQueryRequest
+) -> Tuple[List[int], Dict[str, float]]:
+    """Run one query through the POST /search/ pipeline, timing every stage.
+
+    The query is embedded with embed_query_texts, past the query embedding
+    cache, and the search-result cache is not consulted, so every run pays
+    for every stage.
+    """
+    with recorded_stages() as timings:
+        start = perf_counter()
+        with stage("embed"):
+            vector = store.embed_query_texts([query_request.query])[0]
+        matches = retrieve(store, [query_request], snapshot, [vector])[0]
+        response = build_response(query_request, matches, snapshot)
+        timings["total"] = perf_counter() - start
+    return [int(match.id) for match in response.matches], timings
+
+
+def evaluate(
+    store: VectorStore,
+    snapshot: CatalogSnapshot,
+    request: SearchEvaluationRequest,
+) -> SearchEvaluationMetrics:
+    """Run a labelled query set in parallel and score it against the labels.
+
+    Recall@k and MAP@k are averaged over the queries that have at least one
+    relevant test ID; latency is reported per stage and end to end.
+    """
+    start = perf_counter()
+    k = request.k
+    hybrid = HYBRID_SEARCH if request.hybrid is None else request.hybrid
+
+    def run(query: str) -> Tuple[List[int], Dict[str, float]]:
+        query_request = PineconeQueryRequest(
+            query=query, top_k=k, time=request.time, filters=request.filters, hybrid=hybrid
+        )
+        return run_query(store, snapshot, query_request)
+
+    with ThreadPoolExecutor(max_workers=request.concurrency) as pool:
+        results = list(pool.map(run, request.queries))
+
+    recalls, precisions = [], []
+    timings: Dict[str, List[float]] = {name: [] for name in (*STAGES, "total")}
+    for (ranked, query_timings), relevant in zip(results, request.relevant_test_ids):
+        for name, seconds in query_timings.items():
+            timings.setdefault(name, []).append(seconds)
+        relevant = set(relevant)
+        if relevant:
+            recalls.append(recall_at_k(ranked, relevant, k))
+            precisions.append(average_precision_at_k(ranked, relevant, k))
+
+    metrics = SearchEvaluationMetrics(
+        mean_recall_at_k=round(float(np.mean(recalls)), 4) if recalls else 0.0,
+        mean_average_precision_at_k=(
+            round(float(np.mean(precisions)), 4) if precisions else 0.0
+        ),
+        k=k,
+        total_queries=len(request.queries),
+        evaluated_queries=len(recalls),
+        # lexical is only timed for hybrid runs
+        latency_ms={
+            name: latency_summary(values) for name, values in timings.items() if values
+        },
+        seconds=round(perf_counter() - start, 3),
+    )
+    logger.info(
+        "Evaluated %d queries: recall@%d=%.4f MAP@%d=%.4f",
+        metrics.total_queries,
+        k,
+        metrics.mean_recall_at_k,
+        k,
+        metrics.mean_average_precision_at_k,
+    )
+    return metrics
+
+
+async def _main(path: str, overrides: Dict) -> None:
+    from app.database import AsyncSessionLocal
+    from app.services.catalog import catalog
+    from app.services.vector_store import get_vector_store
+
+    with open(path) as file:
+        request = SearchEvaluationRequest.model_validate(
+            {**json.load(file), **overrides}
+        )
+    store = get_vector_store()
+    async with AsyncSessionLocal() as db:
+        await catalog.load(db)
+    metrics = await asyncio.to_thread(evaluate, store, catalog.snapshot, request)
+    print(metrics.model_dump_json(indent=2))
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    parser = argparse.ArgumentParser(
+        description="Score search relevance and latency on a labelled query set."
+    )
+    parser.add_argument("path", help="JSON file shaped like SearchEvaluationRequest")
+    parser.add_argument("--k", type=int)
+    parser.add_argument("--concurrency", type=int)
+    parser.add_argument("--hybrid", action=argparse.BooleanOptionalAction)
+    args = parser.parse_args()
+    overrides = {
+        field: value
+        for field, value in vars(args).items()
+        if field != "path" and value is not None
+    }
+    asyncio.run(_main(args.path, overrides))
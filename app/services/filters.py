@@ -0,0 +1,154 @@
+from typing import Any, Dict, Iterable, List, Optional
+import numpy as np
+from app.models.models import SearchFilters, assessment_minutes
+
+# SearchFilters list fields -> metadata keys holding list values
+LIST_FILTERS = {
+    "job_levels": "job_levels",
+    "languages": "languages",
+    "test_types": "test_type",
+}
+# SearchFilters boolean fields -> metadata keys holding "Yes"/"No"
+FLAG_FILTERS = {
+    "remote_testing": "remote_testing",
+    "adaptive_irt": "adaptive_irt",
+}
+
+
+def _flag(value: bool) -> str:
+    return "Yes" if value else "No"
+
+
+def has_filters(filters: Optional[SearchFilters]) -> bool:
+    return filters is not None and any(
+        value is not None and value != [] for value in filters.model_dump().values()
+    )
+
+
+def pinecone_filter(filters: Optional[SearchFilters]) -> Optional[Dict[str, Any]]:
+    """Translate SearchFilters into a Pinecone metadata filter expression."""
+    if not has_filters(filters):
+        return None
+    clauses: List[Dict[str, Any]] = []
+    if filters.max_duration is not None:
+        clauses.append({"assessment_minutes": {"$lte": filters.max_duration}})
+    for field, key in LIST_FILTERS.items():
+        values = getattr(filters, field)
+        if values:
+            clauses.append({key: {"$in": list(values)}})
+    for field, key in FLAG_FILTERS.items():
+        value = getattr(filters, field)
+        if value is not None:
+            clauses.append({key: {"$eq": _flag(value)}})
+    return clauses[0] if len(clauses) == 1 else {"$and": clauses}
+
+
+class FilterIndex:
+    """Precomputed per-value row bitmasks over a local index's metadata.
+
+    A filter is answered by OR-ing the masks of the requested values within
+    a field and AND-ing across fields, without touching per-row metadata.
+
+    Rows are added or replaced in place with update(); arrays grow
+    geometrically, so an append costs O(1) amortised. Lock-free readers
+    pass their snapshot's row count to mask() and never see later rows;
+    replacing rows they can see needs a copy() first.
+    """
+
+    def __init__(self, metadata: List[Dict[str, Any]] = ()):
+        self.rows = 0
+        self.minutes = np.empty(0, dtype=np.float32)
+        self.postings: Dict[str, Dict[str, np.ndarray]] = {
+            key: {} for key in [*LIST_FILTERS.values(), *FLAG_FILTERS.values()]
+        }
+        self.update(range(len(metadata)), metadata)
+
+    def copy(self) -> "FilterIndex":
+        """An independent copy whose updates leave this index untouched."""
+        clone = FilterIndex()
+        clone.rows = self.rows
+        clone.minutes = self.minutes.copy()
+        clone.postings = {
+            key: {value: posting.copy() for value, posting in postings.items()}
+            for key, postings in self.postings.items()
+        }
+        return clone
+
+    def _reserve(self, rows: int) -> None:
+        capacity = len(self.minutes)
+        if rows <= capacity:
+            return
+        capacity = max(rows, 2 * capacity)
+        minutes = np.full(capacity, np.inf, dtype=np.float32)
+        minutes[: self.rows] = self.minutes[: self.rows]
+        self.minutes = minutes
+        for postings in self.postings.values():
+            for value, posting in postings.items():
+                grown = np.zeros(capacity, dtype=bool)
+                grown[: self.rows] = posting[: self.rows]
+                postings[value] = grown
+
+    def _mark(self, row: int, meta: Dict[str, Any], present: bool) -> None:
+        for key, postings in self.postings.items():
+            values = meta.get(key)
+            if values is None:
+                continue
+            if isinstance(values, str):
+                values = [values]
+            for value in values:
+                if value not in postings:
+                    if not present:
+                        continue
+                    postings[value] = np.zeros(len(self.minutes), dtype=bool)
+                postings[value][row] = present
+
+    def update(
+        self,
+        rows: Iterable[int],
+        metadata: List[Dict[str, Any]],
+        previous: Optional[List[Optional[Dict[str, Any]]]] = None,
+    ) -> None:
+        """Set the metadata of rows, clearing previous[i] where a row is replaced."""
+        rows = list(rows)
+        if not rows:
+            return
+        end = max(rows) + 1
+        self._reserve(end)
+        for i, (row, meta) in enumerate(zip(rows, metadata)):
+            if previous is not None and previous[i] is not None:
+                self._mark(row, previous[i], False)
+            minutes = assessment_minutes(meta.get("assessment_length"))
+            self.minutes[row] = np.inf if minutes is None else minutes
+            self._mark(row, meta, True)
+        self.rows = max(self.rows, end)
+
+    def _any_of(self, key: str, values: List[str], rows: int) -> np.ndarray:
+        mask = np.zeros(rows, dtype=bool)
+        for value in values:
+            posting = self.postings[key].get(value)
+            if posting is not None:
+                mask |= posting[:rows]
+        return mask
+
+    def mask(
+        self, filters: Optional[SearchFilters], rows: Optional[int] = None
+    ) -> Optional[np.ndarray]:
+        """Boolean mask of eligible rows, or None when nothing is filtered.
+
+        It covers the first rows rows, or every row when rows is None.
+        """
+        if not has_filters(filters):
+            return None
+        rows = self.rows if rows is None else rows
+        mask = np.ones(rows, dtype=bool)
+        if filters.max_duration is not None:
+            mask &= self.minutes[:rows] <= filters.max_duration
+        for field, key in LIST_FILTERS.items():
+            values = getattr(filters, field)
+            if values:
+                mask &= self._any_of(key, values, rows)
+        for field, key in FLAG_FILTERS.items():
+            value = getattr(filters, field)
+            if value is not None:
+                mask &= self._any_of(key, [_flag(value)], rows)
+        return mask
@@ -0,0 +1,137 @@
+import threading
+from typing import List, Optional
+import numpy as np
+from app.config import HYBRID_CANDIDATES, RRF_K, SEARCH_MAX_TOP_K
+from app.models.models import SearchFilters
+from app.services.bm25 import BM25Index, reciprocal_rank_fusion
+from app.services.catalog import CatalogSnapshot
+from app.services.metrics import stage
+from app.services.search_cache import search_result_cache
+from app.services.vector_store import VectorMatch, VectorStore
+
+_lock = threading.Lock()
+_lexical = (None, None)
+_building = None
+
+
+def _build(snapshot: CatalogSnapshot) -> BM25Index:
+    global _lexical, _building
+    index = BM25Index(snapshot.records())
+    with _lock:
+        replaced = _lexical[1] is not None
+        _lexical = (snapshot, index)
+        _building = None
+    if replaced:
+        # Responses fused with the previous index may miss tests it lacked;
+        # the version bump also keeps in-flight ones out of the cache
+        search_result_cache.invalidate()
+    return index
+
+
+def lexical_index(snapshot: CatalogSnapshot) -> BM25Index:
+    """The BM25 index for a catalog snapshot.
+
+    After a catalog change the previous index keeps serving while the new
+    one is built in the background, so a write never stalls searches; only
+    the very first build happens inline. Publishing the new index
+    invalidates the search-result cache.
+    """
+    global _building
+    built_for, index = _lexical
+    if built_for is snapshot:
+        return index
+    with _lock:
+        built_for, index = _lexical
+        if built_for is snapshot:
+            return index
+        if index is not None:
+            if _building is not snapshot:
+                _building = snapshot
+                threading.Thread(target=_build, args=(snapshot,), daemon=True).start()
+            return index
+    return _build(snapshot)
+
+
+def _fuse(vector_matches, lexical_hits, top_k: int) -> List[VectorMatch]:
+    """Merge both rankings with RRF, best fused rank first.
+
+    score stays the vector similarity, which the time-budget filter reads,
+    so hits found only by BM25 score 0.0; the fused order is carried by
+    metadata["rrf_score"].
+    """
+    by_id = {str(match.id): match for match in vector_matches}
+    bm25 = {str(test_id): score for test_id, score in lexical_hits}
+    fused = reciprocal_rank_fusion(
+        [list(by_id), list(bm25)], k=RRF_K
+    )[:top_k]
+    results = []
+    for test_id, rrf_score in fused:
+        match = by_id.get(test_id)
+        metadata = dict(match.metadata or {}) if match is not None else {}
+        metadata["rrf_score"] = round(rrf_score, 6)
+        metadata["bm25_score"] = round(bm25.get(test_id, 0.0), 4)
+        score = float(match.score) if match is not None else 0.0
+        results.append(VectorMatch(test_id, score, metadata))
+    return results
+
+
+def hybrid_query_batch(
+    store: VectorStore,
+    snapshot: CatalogSnapshot,
+    queries: List[str],
+    top_ks: List[int],
+    filters: Optional[List[Optional[SearchFilters]]] = None,
+) -> List[List[VectorMatch]]:
+    """Vector and BM25 retrieval fused with reciprocal rank fusion.
+
+    The vector side embeds all queries together.
+    """
+    if not queries:
+        return []
+    with stage("embed"):
+        vectors = store.embed_queries(queries)
+    return hybrid_search_batch(store, snapshot, queries, vectors, top_ks, filters)
+
+
+def hybrid_search_batch(
+    store: VectorStore,
+    snapshot: CatalogSnapshot,
+    queries: List[str],
+    vectors: List[np.ndarray],
+    top_ks: List[int],
+    filters: Optional[List[Optional[SearchFilters]]] = None,
+) -> List[List[VectorMatch]]:
+    """hybrid_query_batch for queries that are already embedded."""
+    filters = filters or [None] * len(queries)
+    with stage("vector_query"):
+        vector_results = store.search_many(
+            vectors, [candidate_pool(top_k) for top_k in top_ks], filters
+        )
+    with stage("lexical"):
+        return fuse_lexical(snapshot, queries, top_ks, filters, vector_results)
+
+
+def candidate_pool(top_k: int) -> int:
+    """How many candidates each retriever contributes to a hybrid top_k."""
+    return min(max(top_k, HYBRID_CANDIDATES), SEARCH_MAX_TOP_K)
+
+
+def fuse_lexical(
+    snapshot: CatalogSnapshot,
+    queries: List[str],
+    top_ks: List[int],
+    filters: List[Optional[SearchFilters]],
+    vector_results: List[List[VectorMatch]],
+) -> List[List[VectorMatch]]:
+    """Run BM25 for each query and fuse it with that query's vector matches."""
+    index = lexical_index(snapshot)
+    return [
+        _fuse(
+            vector_matches,
+            index.search(query, candidate_pool(top_k), query_filters),
+            top_k,
+        )
+        for query, top_k, query_filters, vector_matches in zip(
+            queries, top_ks, filters, vector_results
+        )
+    ]
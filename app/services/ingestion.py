@@ -0,0 +1,56 @@
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterator, List
+from app.config import INGEST_BATCH_SIZE, INGEST_MAX_WORKERS
+
+logger = logging.getLogger(__name__)
+
+
+def batched(items: List[Any], batch_size: int) -> Iterator[List[Any]]:
+    """Yield fixed-size, non-overlapping slices of items."""
+    if batch_size <= 0:
+        raise ValueError("batch_size must be positive")
+    for start in range(0, len(items), batch_size):
+        yield items[start : start + batch_size]
+
+
+def ingest(
+    data: List[Any],
+    write_batch: Callable[[List[Any]], int],
+    batch_size: int = None,
+    max_workers: int = None,
+) -> Dict[str, Any]:
+    """Run write_batch over every batch with bounded parallelism.
+
+    write_batch embeds and upserts one batch and returns the number of
+    vectors written, so embedding calls and upserts of different batches
+    overlap while at most max_workers requests are in flight.
+    """
+    batch_size = batch_size or INGEST_BATCH_SIZE
+    max_workers = max_workers or INGEST_MAX_WORKERS
+    batches = list(batched(data, batch_size))
+
+    start = time.perf_counter()
+    written = 0
+    if batches:
+        with ThreadPoolExecutor(max_workers=min(max_workers, len(batches))) as pool:
+            for count in pool.map(write_batch, batches):
+                written += count
+    elapsed = time.perf_counter() - start
+
+    summary = {
+        "vectors_written": written,
+        "batches": len(batches),
+        "batch_size": batch_size,
+        "seconds": round(elapsed, 3),
+        "vectors_per_second": round(written / elapsed, 1) if elapsed > 0 else 0.0,
+    }
+    logger.info(
+        "Ingested %d vectors in %d batches (%.3fs, %.1f vectors/s)",
+        written,
+        len(batches),
+        elapsed,
+        summary["vectors_per_second"],
+    )
+    return summary
@@ -0,0 +1,210 @@
+import asyncio
+import logging
+import os
+import random
+import socket
+from datetime import timedelta
+from functools import partial
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+from sqlalchemy import and_, or_, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.config import (
+    JOB_WORKERS,
+    JOB_MAX_ATTEMPTS,
+    JOB_BACKOFF_SECONDS,
+    JOB_BACKOFF_MAX_SECONDS,
+    JOB_POLL_SECONDS,
+    JOB_LEASE_SECONDS,
+)
+from app.database import AsyncSessionLocal, Job, utcnow
+from app.services.sync import sync_job
+from app.services.vector_store import VectorStore
+
+logger = logging.getLogger(__name__)
+
+Handler = Callable[[AsyncSession, Dict[str, Any]], Awaitable[Dict[str, Any]]]
+
+# Set when this process enqueues work so idle local workers wake at once
+_wakeup = asyncio.Event()
+
+
+def backoff_seconds(attempts: int) -> float:
+    """Exponential backoff with 10% jitter for the given attempt number."""
+    delay = JOB_BACKOFF_SECONDS * 2 ** max(attempts - 1, 0)
+    delay = min(JOB_BACKOFF_MAX_SECONDS, delay)
+    return delay * random.uniform(0.9, 1.1)
+
+
+async def enqueue(
+    db: AsyncSession,
+    kind: str,
+    payload: Dict[str, Any],
+    max_attempts: int = None,
+) -> Job:
+    """Queue a job and commit; returns it with its id populated."""
+    job = Job(
+        kind=kind, payload=payload, max_attempts=max_attempts or JOB_MAX_ATTEMPTS
+    )
+    db.add(job)
+    await db.commit()
+    _wakeup.set()
+    return job
+
+
+async def claim(db: AsyncSession, kinds: List[str]) -> Optional[Job]:
+    """Atomically take the oldest runnable job of one of these kinds, or None.
+
+    Queued jobs whose run_after has passed are runnable, as are running
+    jobs whose worker stopped heartbeating for JOB_LEASE_SECONDS.
+    """
+    now = utcnow()
+    runnable = (
+        select(Job.id)
+        .where(
+            Job.kind.in_(kinds),
+            or_(
+                and_(Job.status == "queued", Job.run_after <= now),
+                and_(
+                    Job.status == "running",
+                    Job.locked_at < now - timedelta(seconds=JOB_LEASE_SECONDS),
+                ),
+            ),
+        )
+        .order_by(Job.id)
+        .limit(1)
+        .with_for_update(skip_locked=True)
+        .scalar_subquery()
+    )
+    result = await db.execute(
+        update(Job)
+        .where(Job.id == runnable)
+        .values(status="running", attempts=Job.attempts + 1, locked_at=now, updated_at=now)
+        .returning(Job)
+        .execution_options(synchronize_session=False)
+    )
+    job = result.scalars().first()
+    await db.commit()
+    return job
+
+
+async def _heartbeat(job_id: int) -> None:
+    while True:
+        await asyncio.sleep(JOB_LEASE_SECONDS / 3)
+        async with AsyncSessionLocal() as db:
+            await db.execute(
+                update(Job).where(Job.id == job_id).values(locked_at=utcnow())
+            )
+            await db.commit()
+
+
+async def run_job(job: Job, handlers: Dict[str, Handler]) -> None:
+    """Run a claimed job and record success, a retry, or failure."""
+    heartbeat = asyncio.create_task(_heartbeat(job.id))
+    values: Dict[str, Any]
+    try:
+        handler = handlers.get(job.kind)
+        if handler is None:
+            raise ValueError(f"No handler for job kind {job.kind!r}")
+        async with AsyncSessionLocal() as db:
+            result = await handler(db, job.payload or {})
+        values = {"status": "succeeded", "result": result, "last_error": None}
+        logger.info("Job %d (%s) succeeded: %s", job.id, job.kind, result)
+    except Exception as e:
+        error = f"{type(e).__name__}: {e}"
+        if job.attempts < job.max_attempts:
+            delay = backoff_seconds(job.attempts)
+            values = {
+                "status": "queued",
+                "run_after": utcnow() + timedelta(seconds=delay),
+                "last_error": error,
+            }
+            logger.warning(
+                "Job %d (%s) attempt %d failed, retrying in %.1fs: %s",
+                job.id, job.kind, job.attempts, delay, error,
+            )
+        else:
+            values = {"status": "failed", "last_error": error}
+            logger.error(
+                "Job %d (%s) failed after %d attempts: %s",
+                job.id, job.kind, job.attempts, error,
+            )
+    finally:
+        heartbeat.cancel()
+    async with AsyncSessionLocal() as db:
+        await db.execute(
+            update(Job)
+            .where(Job.id == job.id)
+            .values(locked_at=None, updated_at=utcnow(), **values)
+        )
+        await db.commit()
+
+
+def default_handlers(store: VectorStore) -> Dict[str, Handler]:
+    """Job kinds this process can run; a read-only local index takes none."""
+    if not store.writable:
+        return {}
+    return {"sync_tests": partial(sync_job, store=store)}
+
+
+class JobWorkerPool:
+    """asyncio workers that claim and run jobs from the jobs table."""
+
+    def __init__(self, handlers: Dict[str, Handler], workers: int = None):
+        self.handlers = handlers
+        self.workers = JOB_WORKERS if workers is None else workers
+        self.name = f"{socket.gethostname()}:{os.getpid()}"
+        self._tasks: List[asyncio.Task] = []
+
+    async def _work(self, index: int) -> None:
+        while True:
+            try:
+                async with AsyncSessionLocal() as db:
+                    job = await claim(db, list(self.handlers))
+                if job is not None:
+                    await run_job(job, self.handlers)
+                    continue
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Job worker %s/%d failed", self.name, index)
+            _wakeup.clear()
+            try:
+                await asyncio.wait_for(_wakeup.wait(), JOB_POLL_SECONDS)
+            except asyncio.TimeoutError:
+                pass
+
+    def start(self) -> None:
+        if not self.handlers:
+            logger.info("No job kinds to run in %s; leaving jobs to other processes", self.name)
+            return
+        self._tasks = [
+            asyncio.create_task(self._work(index)) for index in range(self.workers)
+        ]
+        if self._tasks:
+            logger.info("Started %d job workers in %s", len(self._tasks), self.name)
+
+    async def stop(self) -> None:
+        """Cancel workers; an interrupted job is reclaimed once its lease expires."""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+
+async def _main(workers: int) -> None:
+    from app.services.vector_store import get_vector_store
+
+    handlers = default_handlers(get_vector_store())
+    if not handlers:
+        raise SystemExit("The local index is in use by another process, which runs its jobs")
+    pool = JobWorkerPool(handlers, workers)
+    pool.start()
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await pool.stop()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(_main(max(JOB_WORKERS, 1)))
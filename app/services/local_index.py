@@ -0,0 +1,791 @@
+import fcntl
+import io
+import json
+import mmap
+import os
+import threading
+from contextlib import contextmanager
+from typing import List, Dict, Any, Optional
+import numpy as np
+from app.config import (
+    PINECONE_INDEX_NAME,
+    LOCAL_INDEX_PATH,
+    LOCAL_INDEX_DTYPE,
+    LOCAL_INDEX_MMAP,
+    RESCORE_FACTOR,
+    LOCAL_INDEX_ANN,
+    ANN_MIN_ROWS,
+)
+from app.models.models import SearchFilters
+from app.services.ann import ANNIndex, get_ann_index
+from app.services.embeddings import EmbeddingProvider, get_embedding_provider
+from app.services.filters import FilterIndex
+from app.services.pinecone_client import pinecone_index
+from app.services.quantization import VectorCodec, get_codec
+from app.services.vector_store import VectorStore, VectorMatch, test_metadata
+
+
+def _write_npy_rows(file: str, array: np.ndarray, rows: np.ndarray) -> bool:
+    """Write array[rows] into the .npy file, growing its shape to len(array) in place.
+
+    Rows are written before the header, so a reader never sees a shape
+    covering rows that are not there yet. Returns False, having written
+    nothing, if the file does not match array or its header cannot grow.
+    """
+    with open(file, "r+b") as handle:
+        version = np.lib.format.read_magic(handle)
+        if version == (1, 0):
+            shape, fortran_order, dtype = np.lib.format.read_array_header_1_0(handle)
+            write_header = np.lib.format.write_array_header_1_0
+        elif version == (2, 0):
+            shape, fortran_order, dtype = np.lib.format.read_array_header_2_0(handle)
+            write_header = np.lib.format.write_array_header_2_0
+        else:
+            return False
+        offset = handle.tell()
+        if fortran_order or dtype != array.dtype or shape[1:] != array.shape[1:]:
+            return False
+        header = io.BytesIO()
+        write_header(
+            header,
+            {
+                "descr": np.lib.format.dtype_to_descr(dtype),
+                "fortran_order": False,
+                "shape": array.shape,
+            },
+        )
+        if header.tell() != offset:
+            return False
+        row_bytes = array[0].nbytes if len(array) else 0
+        # One write per run of consecutive rows; appends form a single run
+        for run in np.split(rows, np.flatnonzero(np.diff(rows) != 1) + 1):
+            if len(run):
+                handle.seek(offset + int(run[0]) * row_bytes)
+                handle.write(np.ascontiguousarray(array[run[0] : run[-1] + 1]).tobytes())
+        if len(array) != shape[0]:
+            handle.flush()
+            handle.seek(0)
+            handle.write(header.getvalue())
+    return True
+
+
+class LocalVectorStore(VectorStore):
+    """An in-process cosine index backed by a contiguous float32 matrix.
+
+    Rows are L2-normalised on insert so a query is a single matrix-vector
+    product followed by argpartition. The index is persisted under ``path``
+    and loaded on start: ``vectors.npy`` plus a ``metadata.json`` checkpoint
+    and a ``metadata.log`` of rows written since it. A save writes only the
+    rows written since the last one, in place; the checkpoint is rewritten
+    once the log outgrows it, and everything after a delete compacts rows.
+
+    With a codec (LOCAL_INDEX_DTYPE) queries scan float16 or int8 codes
+    saved next to the matrix instead, and the best candidates are rescored
+    against the float32 rows. Files are memory-mapped (LOCAL_INDEX_MMAP), so
+    worker processes share one page-cache copy and only the codes a query
+    scans need to stay resident.
+
+    With an ANN index (LOCAL_INDEX_ANN) and at least ANN_MIN_ROWS rows, a
+    query scores only the candidates the ANN index proposes instead of the
+    whole matrix. It is saved with each checkpoint and catches up on the
+    logged rows when loaded.
+
+    Other processes serving the same files call refresh() to pick up what
+    this one saved. Saves hold an exclusive flock on ``index.lock`` and
+    reads a shared one, so no process maps a half-written save. Only the
+    first process to open the index, which holds ``writer.lock`` for its
+    lifetime, is writable; the others read and refresh.
+    """
+
+    def __init__(
+        self,
+        path: str = None,
+        embedder: EmbeddingProvider = None,
+        ann: Optional[ANNIndex] = None,
+        codec: Optional[VectorCodec] = None,
+    ):
+        """Load the index from disk, starting empty if nothing is stored."""
+        self.path = path or LOCAL_INDEX_PATH
+        self.sync_target = f"local:{os.path.abspath(self.path)}"
+        self.embedder = embedder or get_embedding_provider()
+        self.dimension = self.embedder.dimension
+        self._lock = threading.Lock()
+        # ids, metadata and the id -> row map grow in place; readers only
+        # look at the first len(vectors) rows of their view.
+        self.ids: List[str] = []
+        self.metadata: List[Dict] = []
+        self._rows: Dict[str, int] = {}
+        self._buffer = np.empty((0, self.dimension), dtype=np.float32)
+        self.vectors = self._buffer
+        self.codec = codec if codec is not None else get_codec(LOCAL_INDEX_DTYPE)
+        self._codes_buffer = None
+        if self.codec is not None:
+            self._codes_buffer = np.empty((0, self.dimension), dtype=self.codec.dtype)
+        self.codes = self._codes_buffer
+        self.filters = FilterIndex()
+        self._publish()
+        self._dirty = set()  # Rows written since the last save
+        self._rewrite = True  # Files must be rewritten rather than appended to
+        self._checkpoint = 0
+        self._log_entries = 0
+        self._log_offset: Optional[int] = None  # Bytes of metadata.log applied; None to ignore it
+        self._seen = None  # _stamp() of the files as last loaded or saved
+        self.ann = ann if ann is not None else get_ann_index(LOCAL_INDEX_ANN, self.dimension)
+        self._writer_lock = self._claim_writer()
+        self.writable = self._writer_lock is not None
+        self.load()
+
+    def _claim_writer(self):
+        """The held writer.lock handle, or None if another process owns the index."""
+        os.makedirs(self.path, exist_ok=True)
+        handle = open(os.path.join(self.path, "writer.lock"), "a")
+        try:
+            fcntl.flock(handle, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            handle.close()
+            return None
+        return handle
+
+    @property
+    def _vectors_file(self) -> str:
+        return os.path.join(self.path, "vectors.npy")
+
+    @property
+    def _metadata_file(self) -> str:
+        return os.path.join(self.path, "metadata.json")
+
+    @property
+    def _log_file(self) -> str:
+        return os.path.join(self.path, "metadata.log")
+
+    @property
+    def _codes_file(self) -> str:
+        return os.path.join(self.path, f"vectors.{self.codec.kind}.npy")
+
+    def _publish(self) -> None:
+        # Readers take this tuple without locking; one assignment publishes
+        # ids, metadata, vectors, codes with the codec that encoded them,
+        # filter bitmasks and row map together.
+        self._view = (
+            self.ids,
+            self.metadata,
+            self.vectors,
+            self.codes,
+            self.codec,
+            self.filters,
+            self._rows,
+        )
+
+    @contextmanager
+    def _file_lock(self, exclusive: bool):
+        """Hold a flock on the index directory against saves by other processes."""
+        os.makedirs(self.path, exist_ok=True)
+        with open(os.path.join(self.path, "index.lock"), "a") as handle:
+            fcntl.flock(handle, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+            yield
+
+    def _stamp(self):
+        """Identity of the checkpoint and length of the log, to spot saves."""
+        try:
+            checkpoint = os.stat(self._metadata_file)
+        except FileNotFoundError:
+            return None
+        try:
+            log = os.stat(self._log_file)
+        except FileNotFoundError:
+            return (checkpoint.st_ino, checkpoint.st_mtime_ns, None), 0
+        return (checkpoint.st_ino, checkpoint.st_mtime_ns, log.st_ino), log.st_size
+
+    def load(self) -> None:
+        """Read the persisted checkpoint and replay the log, if present."""
+        if not os.path.exists(self._vectors_file):
+            return
+        with self._file_lock(exclusive=False):
+            self._load()
+
+    def _load(self) -> None:
+        if not os.path.exists(self._vectors_file):
+            return
+        vectors = self._map(self._vectors_file, random_access=self.codec is not None)
+        if vectors.shape[1] != self.dimension:
+            raise ValueError(
+                f"Local index at {self.path} holds {vectors.shape[1]}-dimensional "
+                f"vectors but the {self.embedder.model} embedder produces "
+                f"{self.dimension}; rebuild the index"
+            )
+        with open(self._metadata_file, "r", encoding="utf-8") as file:
+            stored = json.load(file)
+        ids, metadata = stored["ids"], stored["metadata"]
+        checkpoint = stored.get("checkpoint", 0)
+        checkpoint_rows = len(ids)
+        replayed, log_offset = self._replay(ids, metadata, checkpoint)
+        if len(vectors) < len(ids):
+            raise ValueError(
+                f"Local index at {self.path} lists {len(ids)} rows but "
+                f"vectors.npy holds {len(vectors)}; rebuild the index"
+            )
+        self.ids = ids
+        self.metadata = metadata
+        self._rows = {vector_id: row for row, vector_id in enumerate(ids)}
+        self._buffer = np.ascontiguousarray(vectors[: len(ids)], dtype=np.float32)
+        self.vectors = self._buffer
+        self._dirty.clear()
+        self._rewrite = False
+        self._checkpoint = checkpoint
+        self._log_entries = len(replayed)
+        self._log_offset = log_offset
+        self._seen = self._stamp()
+        if self.codec is not None:
+            self._load_codes(checkpoint_rows)
+        self.filters = FilterIndex(self.metadata)
+        self._publish()
+        if self.ann is None:
+            return
+        if self.ann.load(self.path, checkpoint_rows):
+            self._index_rows(np.asarray(sorted(replayed), dtype=np.int64))
+        elif self.ann.ready:
+            # Reloaded after another process rewrote the files
+            self.ann.build(self.vectors)
+        else:
+            self._index_rows(np.arange(len(self.ids)))
+
+    def _replay(self, ids: List[str], metadata: List[Dict], checkpoint: int):
+        """Apply metadata.log on top of the checkpoint.
+
+        Returns the rows it wrote and the log offset read up to. A log from
+        another checkpoint is ignored (offset None), as is a last line cut
+        short by a crash.
+        """
+        replayed = set()
+        if not os.path.exists(self._log_file):
+            return replayed, None
+        with open(self._log_file, "rb") as file:
+            first = file.readline()
+        header = json.loads(first) if first.endswith(b"\n") else None
+        if not isinstance(header, dict) or header.get("checkpoint") != checkpoint:
+            return replayed, None
+        entries, offset = self._read_log(len(first))
+        for row, vector_id, meta in entries:
+            if row == len(ids):
+                ids.append(vector_id)
+                metadata.append(meta)
+            else:
+                ids[row] = vector_id
+                metadata[row] = meta
+            replayed.add(row)
+        return replayed, offset
+
+    def _read_log(self, offset: int):
+        """Complete log entries from offset on, and the offset after them."""
+        with open(self._log_file, "rb") as file:
+            file.seek(offset)
+            data = file.read()
+        end = data.rfind(b"\n") + 1
+        return [json.loads(line) for line in data[:end].splitlines()], offset + end
+
+    def refresh(self) -> bool:
+        """Pick up rows another process saved since these files were last read.
+
+        A new checkpoint is loaded from scratch; rows appended to the log
+        are applied on top of the current rows, re-mapping the grown files.
+        A store with unsaved upserts of its own keeps them. Returns whether
+        anything changed.
+        """
+        if not os.path.exists(self._vectors_file):
+            return False
+        with self._lock, self._file_lock(exclusive=False):
+            stamp = self._stamp()
+            if stamp is None or stamp == self._seen or self._dirty:
+                return False
+            if self._seen is None or stamp[0] != self._seen[0]:
+                self._load()
+                return True
+            if self._log_offset is None:
+                self._seen = stamp
+                return False
+            entries, offset = self._read_log(self._log_offset)
+            if entries and not self._apply_log(entries):
+                self._load()
+                return True
+            self._log_offset = offset
+            self._seen = stamp
+            return bool(entries)
+
+    def _apply_log(self, entries: List) -> bool:
+        """Apply logged rows whose vectors another process appended (lock held).
+
+        Returns False, changing nothing, if the files do not hold them.
+        """
+        vectors = self._map(self._vectors_file, random_access=self.codec is not None)
+        codes = self._map(self._codes_file) if self.codec is not None else None
+        rows = max(len(self.ids), max(row for row, _, _ in entries) + 1)
+        if len(vectors) < rows or (codes is not None and len(codes) < rows):
+            return False
+        if any(row < len(self.ids) for row, _, _ in entries):
+            self._detach(vectors=False)
+        previous = {}
+        for row, vector_id, meta in entries:
+            if row == len(self.ids):
+                self._rows[vector_id] = row
+                self.ids.append(vector_id)
+                self.metadata.append(meta)
+                previous[row] = None
+            else:
+                previous.setdefault(row, self.metadata[row])
+                self.metadata[row] = meta
+        self._buffer = np.ascontiguousarray(vectors[:rows], dtype=np.float32)
+        self.vectors = self._buffer
+        if codes is not None:
+            self._codes_buffer = codes[:rows]
+            self.codes = self._codes_buffer
+        self.filters.update(
+            previous, [self.metadata[row] for row in previous], list(previous.values())
+        )
+        self._publish()
+        self._index_rows(np.fromiter(previous, dtype=np.int64, count=len(previous)))
+        self._log_entries += len(entries)
+        return True
+
+    def save(self) -> None:
+        """Persist rows written since the last save (lock held).
+
+        Their vectors and codes are written in place, growing the files, and
+        their ids and metadata are appended to the log. The checkpoint is
+        rewritten instead once the log would hold more entries than there
+        are rows, so each row is rewritten O(1) times amortised; after a
+        delete or an int8 refit every file is rewritten.
+        """
+        if not self.writable:
+            raise RuntimeError(f"Local index at {self.path} is owned by another process")
+        with self._file_lock(exclusive=True):
+            self._save()
+            self._seen = self._stamp()
+
+    def _save(self) -> None:
+        if self._rewrite or not os.path.exists(self._metadata_file):
+            self._save_all()
+            return
+        rows = np.asarray(sorted(self._dirty), dtype=np.int64)
+        if not len(rows):
+            return
+        if not _write_npy_rows(self._vectors_file, self.vectors, rows) or (
+            self.codec is not None
+            and not _write_npy_rows(self._codes_file, self.codes, rows)
+        ):
+            self._save_all()
+            return
+        if self._log_entries + len(rows) > len(self.ids) or not os.path.exists(self._log_file):
+            self._save_checkpoint()
+        else:
+            with open(self._log_file, "a", encoding="utf-8") as file:
+                file.writelines(
+                    json.dumps([int(row), self.ids[row], self.metadata[row]]) + "\n"
+                    for row in rows
+                )
+            self._log_entries += len(rows)
+            self._log_offset = os.path.getsize(self._log_file)
+        self._dirty.clear()
+
+    def _save_all(self) -> None:
+        """Atomically rewrite the matrix and codes, then checkpoint."""
+        tmp_vectors = self._vectors_file + ".tmp.npy"
+        np.save(tmp_vectors, self.vectors)
+        os.replace(tmp_vectors, self._vectors_file)
+        if self.codec is not None:
+            tmp_codes = self._codes_file + ".tmp.npy"
+            np.save(tmp_codes, self.codes)
+            os.replace(tmp_codes, self._codes_file)
+        self._save_checkpoint()
+        self._rewrite = False
+        self._dirty.clear()
+        if LOCAL_INDEX_MMAP:
+            # Swap the private in-memory copy for the shared file mapping
+            self._buffer = self._map(self._vectors_file, random_access=self.codec is not None)
+            self.vectors = self._buffer
+            if self.codec is not None:
+                self._codes_buffer = self._map(self._codes_file)
+                self.codes = self._codes_buffer
+            self._publish()
+
+    def _save_checkpoint(self) -> None:
+        """Write ids, metadata, codec and ANN state for the current rows and empty the log."""
+        self._checkpoint += 1
+        tmp_metadata = self._metadata_file + ".tmp"
+        with open(tmp_metadata, "w", encoding="utf-8") as file:
+            json.dump(
+                {"ids": self.ids, "metadata": self.metadata, "checkpoint": self._checkpoint},
+                file,
+            )
+        os.replace(tmp_metadata, self._metadata_file)
+        if self.codec is not None:
+            self.codec.save(self.path, len(self.ids))
+        if self.ann is not None and self.ann.ready:
+            self.ann.save(self.path)
+        tmp_log = self._log_file + ".tmp"
+        with open(tmp_log, "w", encoding="utf-8") as file:
+            file.write(json.dumps({"checkpoint": self._checkpoint}) + "\n")
+        os.replace(tmp_log, self._log_file)
+        self._log_entries = 0
+        self._log_offset = os.path.getsize(self._log_file)
+
+    @staticmethod
+    def _map(file: str, random_access: bool = False) -> np.ndarray:
+        """Map a .npy file copy-on-write, or read it if LOCAL_INDEX_MMAP is off.
+
+        In-place updates to a mapping stay private to this process.
+        """
+        if not LOCAL_INDEX_MMAP:
+            return np.load(file)
+        array = np.load(file, mmap_mode="c")
+        mapping = getattr(array, "_mmap", None)
+        if random_access and mapping is not None and hasattr(mmap, "MADV_RANDOM"):
+            # Rescoring reads scattered rows; readahead would page in the whole file
+            mapping.madvise(mmap.MADV_RANDOM)
+        return array
+
+    def _load_codes(self, checkpoint_rows: int) -> None:
+        """Map the persisted codes, re-encoding the matrix if they are stale."""
+        codes = None
+        codec = self.codec.load(self.path, checkpoint_rows)
+        if os.path.exists(self._codes_file) and codec is not None:
+            codes = self._map(self._codes_file)
+            if codes.shape[1:] != self.vectors.shape[1:] or len(codes) < len(self.vectors):
+                codes = None
+            else:
+                codes = codes[: len(self.vectors)]
+                self.codec = codec
+        if codes is None:
+            self.codec = self.codec.fit(self.vectors)
+            codes = self.codec.encode(self.vectors)
+            self._rewrite = True
+        self._codes_buffer = codes
+        self.codes = codes
+
+    def _encode_rows(self, rows: np.ndarray) -> None:
+        """Write codes for rows just stored in the matrix (lock held)."""
+        if self.codec.needs_refit(len(self.ids)):
+            # A new codec, published with its codes; readers keep the old pair
+            self.codec = self.codec.fit(self.vectors)
+            self._codes_buffer = self.codec.encode(self.vectors)
+            self._rewrite = True
+        else:
+            self._codes_buffer = self._grow(self._codes_buffer, len(self.codes), len(self.ids))
+            self._codes_buffer[rows] = self.codec.encode(self.vectors[rows])
+        self.codes = self._codes_buffer[: len(self.ids)]
+
+    def _detach(self, vectors: bool) -> None:
+        """Stop sharing the published rows before some are replaced (lock held).
+
+        Metadata and filter bitmasks, and with vectors the matrix and codes
+        too, are copied so the current view keeps its old rows until the
+        next one is published. The ids and row map are left shared: a
+        replaced row keeps its id.
+        """
+        self.metadata = list(self.metadata)
+        self.filters = self.filters.copy()
+        if vectors:
+            self._buffer = np.array(self._buffer)
+            if self._codes_buffer is not None:
+                self._codes_buffer = np.array(self._codes_buffer)
+
+    @staticmethod
+    def _grow(buffer: np.ndarray, used: int, rows: int) -> np.ndarray:
+        """buffer, or a copy with room for rows if it is too small.
+
+        Growing geometrically means bulk loads copy the matrix O(log n)
+        times; appends land in spare rows that no reader can see.
+        """
+        if rows <= len(buffer):
+            return buffer
+        grown = np.empty((max(rows, 2 * len(buffer)), buffer.shape[1]), dtype=buffer.dtype)
+        grown[:used] = buffer[:used]
+        return grown
+
+    def _index_rows(self, rows: np.ndarray) -> None:
+        """Bring the ANN index up to date after rows were written (lock held).
+
+        The index is built once the catalog reaches ANN_MIN_ROWS; after that
+        each upsert adds its rows incrementally.
+        """
+        if self.ann is None:
+            return
+        if self.ann.ready:
+            if len(rows):
+                self.ann.update(self.vectors, rows)
+        elif len(self.ids) >= ANN_MIN_ROWS:
+            self.ann.build(self.vectors)
+
+    @staticmethod
+    def _normalize(vectors: np.ndarray) -> np.ndarray:
+        norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return (vectors / norms).astype(np.float32)
+
+    def upsert(
+        self,
+        ids: List[str],
+        vectors: np.ndarray,
+        metadata: List[Dict],
+        persist: bool = True,
+    ):
+        """Insert or replace rows and publish them to readers.
+
+        New rows are appended to the shared lists and row map, so the cost
+        is proportional to the batch rather than the catalog. A batch that
+        replaces rows writes them to copies of the matrix, codes, metadata
+        and filters instead, since readers of the current view see them.
+        """
+        vectors = self._normalize(np.asarray(vectors, dtype=np.float32))
+        with self._lock:
+            if any(vector_id in self._rows for vector_id in ids):
+                self._detach(vectors=True)
+            used = len(self.ids)
+            writes = {}
+            previous = {}
+            for vector_id, vector, meta in zip(ids, vectors, metadata):
+                row = self._rows.get(vector_id)
+                if row is None:
+                    row = len(self.ids)
+                    self._rows[vector_id] = row
+                    self.ids.append(vector_id)
+                    self.metadata.append(meta)
+                    previous[row] = None
+                else:
+                    previous.setdefault(row, self.metadata[row])
+                    self.metadata[row] = meta
+                writes[row] = vector
+            if not writes:
+                return
+            rows = len(self.ids)
+            written = np.fromiter(writes, dtype=np.int64, count=len(writes))
+            self._buffer = self._grow(self._buffer, used, rows)
+            self._buffer[written] = np.stack(list(writes.values()))
+            self.vectors = self._buffer[:rows]
+            if self.codec is not None:
+                self._encode_rows(written)
+            self.filters.update(
+                writes, [self.metadata[row] for row in writes], [previous[row] for row in writes]
+            )
+            self._publish()
+            self._index_rows(written)
+            self._dirty.update(writes)
+            if persist:
+                self.save()
+
+    def delete(self, ids: List[str], persist: bool = True) -> int:
+        """Remove rows by id and return how many were deleted."""
+        doomed = set(ids)
+        with self._lock:
+            keep = [row for row, vector_id in enumerate(self.ids) if vector_id not in doomed]
+            deleted = len(self.ids) - len(keep)
+            if not deleted:
+                return 0
+            # Fresh compacted buffers and lists: rows shift, so readers of
+            # the old view must keep seeing the old ones.
+            keep = np.asarray(keep, dtype=np.int64)
+            self._buffer = self._buffer[keep]
+            self.vectors = self._buffer
+            if self.codec is not None:
+                self._codes_buffer = self._codes_buffer[keep]
+                self.codes = self._codes_buffer
+            self.metadata = [self.metadata[row] for row in keep]
+            self.ids = [self.ids[row] for row in keep]
+            self._rows = {vector_id: row for row, vector_id in enumerate(self.ids)}
+            self.filters = FilterIndex(self.metadata)
+            self._publish()
+            if self.ann is not None and self.ann.ready:
+                self.ann.compact(self.vectors, keep)
+            self._rewrite = True
+            if persist:
+                self.save()
+        return deleted
+
+    def list_ids(self) -> List[str]:
+        ids, _, matrix, *_ = self._snapshot()
+        return ids[: len(matrix)]
+
+    def fetch(self, ids: List[str]) -> Dict[str, np.ndarray]:
+        """Stored (normalised) rows by id, without a scan of the matrix."""
+        _, _, matrix, _, _, _, positions = self._snapshot()
+        found = {}
+        for vector_id in ids:
+            row = positions.get(vector_id)
+            # Rows appended after this snapshot are not visible yet
+            if row is not None and row < len(matrix):
+                found[vector_id] = np.array(matrix[row])
+        return found
+
+    def upsert_tests(self, tests: List[Any], embeddings: np.ndarray) -> int:
+        """Stage one embedded batch in memory; add_tests persists once."""
+        self.upsert(
+            [f"{test['id']}" for test in tests],
+            embeddings,
+            [test_metadata(test) for test in tests],
+            persist=False,
+        )
+        return len(tests)
+
+    def add_tests(self, data: List[Any], input_type: str = "passage", **kwargs):
+        """Embed and upsert tests, writing the index to disk once at the end."""
+        summary = super().add_tests(data, input_type, **kwargs)
+        with self._lock:
+            self.save()
+        return summary
+
+    def _snapshot(self):
+        """Consistent (ids, metadata, vectors, codes, codec, filters, rows) view for lock-free readers.
+
+        Only the first len(vectors) entries of ids, metadata and rows belong
+        to the view; later ones were appended after it was published.
+        """
+        return self._view
+
+    @staticmethod
+    def _top_k_rows(scores: np.ndarray, top_k: int) -> np.ndarray:
+        """Row indices of the top_k scores, best first."""
+        if top_k < len(scores):
+            candidates = np.argpartition(-scores, top_k - 1)[:top_k]
+        else:
+            candidates = np.arange(len(scores))
+        return candidates[np.argsort(-scores[candidates])]
+
+    def search(
+        self,
+        vector: np.ndarray,
+        top_k: int,
+        filters: Optional[SearchFilters] = None,
+    ) -> List[VectorMatch]:
+        """Cosine top-k over the eligible rows for a query vector."""
+        return self.search_many([vector], [top_k], [filters])[0]
+
+    def search_many(
+        self,
+        vectors: List[np.ndarray],
+        top_ks: List[int],
+        filters: Optional[List[Optional[SearchFilters]]] = None,
+    ) -> List[List[VectorMatch]]:
+        """Score every query against the catalog with one matrix multiply.
+
+        Filters are applied as precomputed row masks before ranking, so each
+        query gets a full top_k of eligible tests when enough exist. With a
+        codec the multiply runs over the codes, a chunk of rows at a time.
+        """
+        view = self._snapshot()
+        _, _, matrix, codes, codec, filter_index, _ = view
+        size = len(matrix)
+        if not size or not len(vectors):
+            return [[] for _ in vectors]
+        filters = filters or [None] * len(vectors)
+        queries = self._normalize(np.asarray(vectors, dtype=np.float32))
+        if self.ann is not None and self.ann.ready and size >= ANN_MIN_ROWS:
+            return [
+                self._approximate_search(view, query, top_k, query_filters)
+                for query, top_k, query_filters in zip(queries, top_ks, filters)
+            ]
+        if codes is None:
+            scores = queries @ matrix.T
+        else:
+            scores = codec.scores(codes, queries)
+        results = []
+        for query, row_scores, top_k, query_filters in zip(queries, scores, top_ks, filters):
+            eligible = filter_index.mask(query_filters, size)
+            if eligible is not None:
+                row_scores = np.where(eligible, row_scores, -np.inf)
+                top_k = min(top_k, int(eligible.sum()))
+            top_k = min(top_k, size)
+            if top_k <= 0:
+                results.append([])
+                continue
+            results.append(self._ranked(view, query, row_scores, None, top_k))
+        return results
+
+    def _ranked(
+        self,
+        view,
+        query: np.ndarray,
+        scores: np.ndarray,
+        rows: Optional[np.ndarray],
+        top_k: int,
+    ) -> List[VectorMatch]:
+        """Matches for the top_k scores, which belong to rows (None for all rows).
+
+        Scores computed from codes are approximate, so the best
+        RESCORE_FACTOR * top_k are rescored against the float32 rows first.
+        """
+        ids, metadata, matrix, codes, _, _, _ = view
+        if codes is not None and RESCORE_FACTOR > 0:
+            shortlist = self._top_k_rows(scores, min(len(scores), top_k * RESCORE_FACTOR))
+            shortlist = shortlist[np.isfinite(scores[shortlist])]
+            rows = shortlist if rows is None else rows[shortlist]
+            scores = matrix[rows] @ query
+        best = self._top_k_rows(scores, min(top_k, len(scores)))
+        positions = best if rows is None else rows[best]
+        return [
+            VectorMatch(ids[row], float(scores[i]), dict(metadata[row]))
+            for i, row in zip(best, positions)
+        ]
+
+    def _approximate_search(
+        self,
+        view,
+        query: np.ndarray,
+        top_k: int,
+        filters: Optional[SearchFilters],
+    ) -> List[VectorMatch]:
+        """Top-k over the ANN index's candidates, rescored against matrix.
+
+        Filters that leave fewer than ANN_MIN_ROWS eligible rows are served
+        by scoring those rows exactly, which is cheaper than walking the
+        index; if the index yields fewer than top_k eligible candidates the
+        query falls back to exact search as well.
+        """
+        _, _, matrix, codes, codec, filter_index, _ = view
+        size = len(matrix)
+        eligible = filter_index.mask(filters, size)
+        eligible_count = size if eligible is None else int(np.count_nonzero(eligible))
+        top_k = min(top_k, eligible_count)
+        if top_k <= 0:
+            return []
+        rows = None
+        if eligible_count >= ANN_MIN_ROWS:
+            rows = self.ann.candidates(query, top_k, size, eligible)
+            if len(rows) < top_k:
+                rows = None
+        if rows is None and eligible is not None:
+            rows = np.flatnonzero(eligible)
+        if codes is not None:
+            scores = codec.scores(codes if rows is None else codes[rows], query[None])[0]
+        else:
+            scores = matrix @ query if rows is None else matrix[rows] @ query
+        return self._ranked(view, query, scores, rows, top_k)
+
+    def import_from_pinecone(
+        self,
+        index_name: str = None,
+        namespace: str = "shl-tests",
+        api_key: str = None,
+    ) -> int:
+        """Copy every vector in a Pinecone namespace into the local index."""
+        index = pinecone_index(index_name or PINECONE_INDEX_NAME, api_key)
+        imported = 0
+        for id_page in index.list(namespace=namespace):
+            fetched = index.fetch(ids=list(id_page), namespace=namespace).vectors
+            ids = list(fetched.keys())
+            self.upsert(
+                ids,
+                np.asarray([fetched[i].values for i in ids], dtype=np.float32),
+                [dict(fetched[i].metadata or {}) for i in ids],
+                persist=False,
+            )
+            imported += len(ids)
+        with self._lock:
+            self.save()
+        return imported
+
+
+if __name__ == "__main__":
+    store = LocalVectorStore()
+    if not store.writable:
+        raise SystemExit(f"Local index at {store.path} is in use by another process")
+    count = store.import_from_pinecone()
+    print(f"Imported {count} vectors into {store.path}")
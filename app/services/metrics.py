@@ -0,0 +1,369 @@
+import bisect
+import logging
+import threading
+from contextlib import contextmanager
+from functools import wraps
+from time import perf_counter
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Tuple
+from app.config import METRICS_ENABLED, OTEL_TRACING, OTEL_SERVICE_NAME
+
+logger = logging.getLogger(__name__)
+
+LabelValues = Tuple[str, ...]
+# (labels, value) pairs produced by a collector at scrape time
+Samples = Iterable[Tuple[Dict[str, Any], float]]
+
+# Seconds; spans sub-millisecond in-process stages up to slow upstream calls
+LATENCY_BUCKETS = (
+    0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05,
+    0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0,
+)
+SIZE_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 96, 128, 256, 512, 1024)
+
+
+def _escape(value: Any) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(labels: Dict[str, Any]) -> str:
+    if not labels:
+        return ""
+    pairs = ",".join(f'{name}="{_escape(value)}"' for name, value in labels.items())
+    return "{" + pairs + "}"
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class _Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Tuple[str, ...] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, Any]) -> LabelValues:
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def header(self) -> List[str]:
+        return [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} {self.kind}",
+        ]
+
+
+class Counter(_Metric):
+    """A monotonically increasing count per label set."""
+
+    kind = "counter"
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, amount: float = 1.0, **labels: Any) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def render(self) -> List[str]:
+        with self._lock:
+            values = dict(self._values)
+        lines = self.header()
+        for key, value in sorted(values.items()):
+            labels = dict(zip(self.labelnames, key))
+            lines.append(f"{self.name}{_format_labels(labels)} {_format_value(value)}")
+        return lines
+
+
+class Histogram(_Metric):
+    """Bucketed observations per label set, rendered cumulatively."""
+
+    kind = "histogram"
+
+    def __init__(self, *args, buckets: Tuple[float, ...] = LATENCY_BUCKETS, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.buckets = tuple(sorted(buckets))
+        # label values -> [per-bucket counts (+Inf last), sum]
+        self._values: Dict[LabelValues, List] = {}
+
+    def observe(self, value: float, **labels: Any) -> None:
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0]
+            state[0][index] += 1
+            state[1] += value
+
+    def render(self) -> List[str]:
+        with self._lock:
+            values = {key: (list(counts), total) for key, (counts, total) in self._values.items()}
+        lines = self.header()
+        for key, (counts, total) in sorted(values.items()):
+            labels = dict(zip(self.labelnames, key))
+            cumulative = 0
+            for bound, count in zip((*self.buckets, float("inf")), counts):
+                cumulative += count
+                bucket_labels = _format_labels({**labels, "le": _format_value(bound)})
+                lines.append(f"{self.name}_bucket{bucket_labels} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(labels)} {_format_value(total)}")
+            lines.append(f"{self.name}_count{_format_labels(labels)} {cumulative}")
+        return lines
+
+
+class MetricsRegistry:
+    """Metrics owned by this process plus callbacks read at scrape time.
+
+    Collectors expose numbers other components already keep (cache hit
+    counters and the like) without touching their hot paths.
+    """
+
+    def __init__(self):
+        self._metrics: List[_Metric] = []
+        self._collectors: List[Tuple[str, str, str, Callable[[], Samples]]] = []
+
+    def register(self, metric: _Metric) -> _Metric:
+        self._metrics.append(metric)
+        return metric
+
+    def add_collector(
+        self, name: str, kind: str, documentation: str, collect: Callable[[], Samples]
+    ) -> None:
+        self._collectors.append((name, kind, documentation, collect))
+
+    def render(self) -> str:
+        """Everything in the Prometheus text exposition format."""
+        lines: List[str] = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        for name, kind, documentation, collect in self._collectors:
+            try:
+                samples = list(collect())
+            except Exception:
+                logger.exception("Metrics collector %s failed", name)
+                continue
+            lines.append(f"# HELP {name} {documentation}")
+            lines.append(f"# TYPE {name} {kind}")
+            for labels, value in samples:
+                lines.append(f"{name}{_format_labels(labels)} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = MetricsRegistry()
+
+STAGE_SECONDS = REGISTRY.register(
+    Histogram(
+        "shl_stage_duration_seconds",
+        "Time spent in each instrumented stage of the request path.",
+        ("stage",),
+    )
+)
+STAGE_ERRORS = REGISTRY.register(
+    Counter(
+        "shl_stage_errors_total",
+        "Exceptions raised inside each instrumented stage (upstream errors included).",
+        ("stage",),
+    )
+)
+HTTP_REQUEST_SECONDS = REGISTRY.register(
+    Histogram(
+        "shl_http_request_duration_seconds",
+        "HTTP request latency by route template and status code.",
+        ("method", "route", "status"),
+    )
+)
+EMBEDDING_BATCH_SIZE = REGISTRY.register(
+    Histogram(
+        "shl_embedding_batch_size",
+        "Texts per call to the embedding provider.",
+        ("input_type",),
+        buckets=SIZE_BUCKETS,
+    )
+)
+TESTS_WRITTEN = REGISTRY.register(
+    Counter(
+        "shl_tests_written_total",
+        "Tests written by the bulk create endpoint, by outcome.",
+        ("outcome",),
+    )
+)
+
+
+def _tracer():
+    """An OpenTelemetry tracer when OTEL_TRACING is on, else None.
+
+    With opentelemetry-sdk and the OTLP exporter installed, spans are
+    exported to OTEL_EXPORTER_OTLP_ENDPOINT; with only opentelemetry-api
+    they go to whatever provider is configured (e.g. opentelemetry-instrument).
+    """
+    if not OTEL_TRACING:
+        return None
+    try:
+        from opentelemetry import trace
+    except ImportError:
+        logger.warning("OTEL_TRACING is set but opentelemetry-api is not installed")
+        return None
+    try:
+        from opentelemetry.exporter.otlp.proto.http.trace_exporter import OTLPSpanExporter
+        from opentelemetry.sdk.resources import Resource
+        from opentelemetry.sdk.trace import TracerProvider
+        from opentelemetry.sdk.trace.export import BatchSpanProcessor
+
+        provider = TracerProvider(resource=Resource.create({"service.name": OTEL_SERVICE_NAME}))
+        provider.add_span_processor(BatchSpanProcessor(OTLPSpanExporter()))
+        trace.set_tracer_provider(provider)
+    except ImportError:
+        logger.info("opentelemetry-sdk not installed; using the configured tracer provider")
+    return trace.get_tracer("app")
+
+
+tracer = _tracer()
+
+
+_recording = threading.local()
+
+
+@contextmanager
+def recorded_stages() -> Iterator[Dict[str, float]]:
+    """Collect the seconds spent in each stage entered on this thread.
+
+    Stages recorded this way are left out of shl_stage_duration_seconds, so
+    offline runs such as search evaluation do not skew the API's latencies.
+    """
+    previous = getattr(_recording, "timings", None)
+    timings: Dict[str, float] = {}
+    _recording.timings = timings
+    try:
+        yield timings
+    finally:
+        _recording.timings = previous
+
+
+class stage:
+    """Time a block (or, as a decorator, a function) as a named stage.
+
+    Records shl_stage_duration_seconds, counts exceptions in
+    shl_stage_errors_total and, when tracing is on, wraps the block in a
+    span. With METRICS_ENABLED and OTEL_TRACING both off it does nothing.
+    """
+
+    __slots__ = ("name", "_start", "_span")
+
+    def __init__(self, name: str):
+        self.name = name
+        self._span = None
+
+    def __enter__(self) -> "stage":
+        if tracer is not None:
+            self._span = tracer.start_as_current_span(self.name)
+            self._span.__enter__()
+        self._start = perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        timings = getattr(_recording, "timings", None)
+        if timings is not None:
+            timings[self.name] = timings.get(self.name, 0.0) + perf_counter() - self._start
+        elif METRICS_ENABLED:
+            STAGE_SECONDS.observe(perf_counter() - self._start, stage=self.name)
+        if METRICS_ENABLED and exc_type is not None:
+            STAGE_ERRORS.inc(stage=self.name)
+        if self._span is not None:
+            span, self._span = self._span, None
+            span.__exit__(exc_type, exc, tb)
+
+    def __call__(self, fn: Callable) -> Callable:
+        name = self.name
+
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            with stage(name):
+                return fn(*args, **kwargs)
+
+        return wrapper
+
+
+def observe_batch(size: int, input_type: str) -> None:
+    if METRICS_ENABLED:
+        EMBEDDING_BATCH_SIZE.observe(size, input_type=input_type)
+
+
+class MetricsMiddleware:
+    """ASGI middleware timing every HTTP request by its route template."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not METRICS_ENABLED:
+            await self.app(scope, receive, send)
+            return
+        status = [500]
+
+        async def send_with_status(message):
+            if message["type"] == "http.response.start":
+                status[0] = message["status"]
+            await send(message)
+
+        start = perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            route = scope.get("route")
+            HTTP_REQUEST_SECONDS.observe(
+                perf_counter() - start,
+                method=scope["method"],
+                route=getattr(route, "path", "unmatched"),
+                status=status[0],
+            )
+
+
+def _cache_samples(stat: str) -> Samples:
+    from app.services.embedding_cache import query_embedding_cache
+    from app.services.search_cache import search_result_cache
+
+    for cache, stats in (
+        ("query_embedding", query_embedding_cache.stats()),
+        ("search_result", search_result_cache.stats()),
+    ):
+        yield {"cache": cache}, stats[stat]
+    if stat == "hits":
+        yield {"cache": "query_embedding_disk"}, query_embedding_cache.stats()["disk_hits"]
+
+
+def _batcher_samples(stat: str) -> Samples:
+    from app.services.embedding_batcher import batcher_stats
+
+    for model, stats in batcher_stats().items():
+        yield {"model": model}, stats[stat]
+
+
+REGISTRY.add_collector(
+    "shl_cache_hits_total", "counter", "Cache hits by cache.", lambda: _cache_samples("hits")
+)
+REGISTRY.add_collector(
+    "shl_cache_misses_total", "counter", "Cache misses by cache.", lambda: _cache_samples("misses")
+)
+REGISTRY.add_collector(
+    "shl_cache_entries", "gauge", "Entries held by each cache.", lambda: _cache_samples("size")
+)
+REGISTRY.add_collector(
+    "shl_coalesced_embedding_batches_total",
+    "counter",
+    "Batches formed by the query-embedding coalescer.",
+    lambda: _batcher_samples("batches"),
+)
+REGISTRY.add_collector(
+    "shl_coalesced_embedding_texts_total",
+    "counter",
+    "Distinct texts embedded by the query-embedding coalescer.",
+    lambda: _batcher_samples("texts"),
+)
+
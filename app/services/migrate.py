@@ -0,0 +1,44 @@
+import asyncio
+import logging
+import os
+from alembic import command
+from alembic.config import Config
+from sqlalchemy import text
+from app.database import async_engine, create_tables
+
+logger = logging.getLogger(__name__)
+
+ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def alembic_config() -> Config:
+    config = Config(os.path.join(ROOT, "alembic.ini"))
+    config.set_main_option("script_location", os.path.join(ROOT, "migrations"))
+    return config
+
+
+async def migrate() -> None:
+    """Bring the schema up to the latest Alembic revision.
+
+    The first revisions expect tables the app used to create on import,
+    so a database Alembic has never versioned is created from the models
+    and stamped at head instead of replayed.
+    """
+    async with async_engine.connect() as connection:
+        versioned = await connection.scalar(
+            text("SELECT to_regclass('alembic_version') IS NOT NULL")
+        )
+    config = alembic_config()
+    if versioned:
+        logger.info("Upgrading the database to the latest revision")
+        await asyncio.to_thread(command.upgrade, config, "head")
+    else:
+        logger.info("Creating tables in an unversioned database")
+        await create_tables()
+        await asyncio.to_thread(command.stamp, config, "head")
+    await async_engine.dispose()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(migrate())
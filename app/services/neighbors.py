@@ -0,0 +1,186 @@
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+from sqlalchemy import Integer, and_, cast, delete, select
+from sqlalchemy.dialects.postgresql import ARRAY, insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette.concurrency import run_in_threadpool
+from app.config import SIMILAR_NEIGHBORS_K
+from app.database import Test as DBTest, TestNeighbors, VectorSyncState, utcnow
+from app.models.models import SearchFilters
+from app.services.ingestion import batched
+from app.services.vector_store import VectorMatch, VectorStore
+
+NEIGHBORS_BATCH = 32  # Lists computed per search_many call; bounds the score matrix
+WRITE_BATCH = 5000  # Rows per INSERT/SELECT statement
+# A re-embedded test is offered to this many times k of its nearest tests
+OFFER_FACTOR = 4
+
+Neighbors = List[Tuple[int, float]]  # (test id, score), best first
+
+
+def _ranked(test_id: int, matches: List[VectorMatch], k: int) -> Neighbors:
+    return [
+        (int(match.id), float(match.score))
+        for match in matches
+        if int(match.id) != test_id
+    ][:k]
+
+
+def compute_neighbors(store: VectorStore, test_ids: List[int], k: int) -> Dict[int, Neighbors]:
+    """Each test's k nearest neighbors, queried with its stored vector."""
+    lists = {}
+    for batch in batched(test_ids, NEIGHBORS_BATCH):
+        vectors = store.fetch([str(test_id) for test_id in batch])
+        present = [test_id for test_id in batch if str(test_id) in vectors]
+        matches = store.search_many(
+            [vectors[str(test_id)] for test_id in present], [k + 1] * len(present)
+        )
+        for test_id, test_matches in zip(present, matches):
+            lists[test_id] = _ranked(test_id, test_matches, k)
+    return lists
+
+
+async def _ids(db: AsyncSession, query) -> Set[int]:
+    return set((await db.execute(query)).scalars())
+
+
+async def _load(db: AsyncSession, target: str, test_ids: Iterable[int]) -> Dict[int, Neighbors]:
+    lists = {}
+    for batch in batched(sorted(test_ids), WRITE_BATCH):
+        result = await db.execute(
+            select(TestNeighbors).where(
+                TestNeighbors.target == target, TestNeighbors.test_id.in_(batch)
+            )
+        )
+        for row in result.scalars():
+            lists[row.test_id] = list(zip(row.neighbor_ids, row.scores))
+    return lists
+
+
+async def _save(db: AsyncSession, target: str, model: str, lists: Dict[int, Neighbors]) -> None:
+    now = utcnow()
+    rows = [
+        {
+            "target": target,
+            "test_id": test_id,
+            "neighbor_ids": [neighbor for neighbor, _ in neighbors],
+            "scores": [score for _, score in neighbors],
+            "embedding_model": model,
+            "updated_at": now,
+        }
+        for test_id, neighbors in lists.items()
+    ]
+    for batch in batched(rows, WRITE_BATCH):
+        statement = insert(TestNeighbors).values(batch)
+        await db.execute(
+            statement.on_conflict_do_update(
+                index_elements=[TestNeighbors.target, TestNeighbors.test_id],
+                set_={
+                    "neighbor_ids": statement.excluded.neighbor_ids,
+                    "scores": statement.excluded.scores,
+                    "embedding_model": statement.excluded.embedding_model,
+                    "updated_at": statement.excluded.updated_at,
+                },
+            )
+        )
+
+
+async def refresh_neighbors(
+    db: AsyncSession,
+    store: VectorStore,
+    changed: List[int],
+    deleted: List[int],
+    k: int = None,
+) -> int:
+    """Bring the neighbor lists of store's index up to date after a sync.
+
+    Recomputed: lists of re-embedded tests, lists naming a re-embedded or
+    deleted test, and synced tests with no list for the current model (the
+    first run computes them all). Each re-embedded test is then offered to
+    the lists of its OFFER_FACTOR * k nearest tests, joining those whose
+    last entry it beats. Similarity is symmetric, so this misses a list
+    only when the test belongs in it without being among those nearest.
+    Returns how many lists were written.
+    """
+    k = SIMILAR_NEIGHBORS_K if k is None else k
+    if k <= 0:
+        return 0
+    target, model = store.sync_target, store.embedder.model
+    for batch in batched(deleted, WRITE_BATCH):
+        await db.execute(
+            delete(TestNeighbors).where(
+                TestNeighbors.target == target, TestNeighbors.test_id.in_(batch)
+            )
+        )
+    stale = set(changed)
+    touched = sorted(set(changed) | set(deleted))
+    for batch in batched(touched, WRITE_BATCH):
+        stale |= await _ids(
+            db,
+            select(TestNeighbors.test_id).where(
+                TestNeighbors.target == target,
+                TestNeighbors.neighbor_ids.op("&&")(cast(batch, ARRAY(Integer))),
+            ),
+        )
+    stale |= await _ids(
+        db,
+        select(VectorSyncState.test_id)
+        # Tests deleted since their last sync keep state rows until a full sync
+        .join(DBTest, DBTest.id == VectorSyncState.test_id)
+        .outerjoin(
+            TestNeighbors,
+            and_(
+                TestNeighbors.target == VectorSyncState.target,
+                TestNeighbors.test_id == VectorSyncState.test_id,
+                TestNeighbors.embedding_model == model,
+            ),
+        )
+        .where(VectorSyncState.target == target, TestNeighbors.test_id.is_(None)),
+    )
+    stale -= set(deleted)
+
+    wide = await run_in_threadpool(compute_neighbors, store, changed, k * OFFER_FACTOR)
+    lists = await run_in_threadpool(compute_neighbors, store, sorted(stale - set(changed)), k)
+    lists.update({test_id: neighbors[:k] for test_id, neighbors in wide.items()})
+    offers: Dict[int, Neighbors] = {}
+    for test_id, neighbors in wide.items():
+        for neighbor, score in neighbors:
+            if neighbor not in lists:
+                offers.setdefault(neighbor, []).append((test_id, score))
+    for neighbor, current in (await _load(db, target, offers)).items():
+        merged = {test_id: score for test_id, score in current}
+        merged.update(offers[neighbor])
+        ranked = sorted(merged.items(), key=lambda item: item[1], reverse=True)[:k]
+        if ranked != current:
+            lists[neighbor] = ranked
+    await _save(db, target, model, lists)
+    await db.commit()
+    return len(lists)
+
+
+async def stored_neighbors(
+    db: AsyncSession, store: VectorStore, test_id: int, top_k: int
+) -> Optional[List[VectorMatch]]:
+    """The precomputed top_k for a test, or None when there is no usable list."""
+    if top_k > SIMILAR_NEIGHBORS_K:
+        return None
+    row = await db.get(TestNeighbors, (store.sync_target, test_id))
+    if row is None or row.embedding_model != store.embedder.model:
+        return None
+    return [
+        VectorMatch(str(neighbor), score)
+        for neighbor, score in zip(row.neighbor_ids[:top_k], row.scores[:top_k])
+    ]
+
+
+def similar_tests(
+    store: VectorStore,
+    test_id: int,
+    top_k: int,
+    filters: Optional[SearchFilters] = None,
+) -> Optional[List[VectorMatch]]:
+    """Nearest tests to a test's stored vector, or None if it is not indexed."""
+    vectors = store.fetch([str(test_id)])
+    if not vectors:
+        return None
+    matches = store.search(vectors[str(test_id)], top_k + 1, filters)
+    return [match for match in matches if int(match.id) != test_id][:top_k]
@@ -0,0 +1,153 @@
+from contextlib import contextmanager
+from typing import Any, Dict, List, Optional
+import numpy as np
+from sqlalchemy import Float, delete, literal, select, text
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.engine import Connection
+from app.config import PGVECTOR_EF_SEARCH
+from app.database import Test as DBTest, TestEmbedding, get_sync_engine, utcnow
+from app.models.models import SearchFilters
+from app.services.embeddings import EmbeddingProvider, get_embedding_provider
+from app.services.filters import has_filters
+from app.services.ingestion import batched
+from app.services.metrics import stage
+from app.services.test_listing import sql_filters
+from app.services.vector_store import VectorMatch, VectorStore, test_metadata
+
+MAX_EF_SEARCH = 1000  # pgvector's upper bound for hnsw.ef_search
+
+
+class PgVectorStore(VectorStore):
+    """Test embeddings stored in Postgres and searched with pgvector.
+
+    A search is one SQL statement: the HNSW index on test_embeddings ranks
+    by cosine distance, filters apply to the joined tests row and the row
+    itself comes back as the match metadata, so nothing is looked up after.
+    """
+
+    def __init__(self, embedder: EmbeddingProvider = None, engine=None):
+        self.embedder = embedder or get_embedding_provider()
+        dimension = TestEmbedding.embedding.type.dimension
+        if self.embedder.dimension != dimension:
+            raise ValueError(
+                f"test_embeddings holds {dimension}-dimensional vectors but the "
+                f"{self.embedder.model} embedder produces {self.embedder.dimension}"
+            )
+        self.engine = engine or get_sync_engine()
+        self.sync_target = "pgvector:test_embeddings"
+
+    @contextmanager
+    def _connect(self):
+        # Autocommit: psycopg2 would otherwise spend a round trip on BEGIN
+        with self.engine.connect() as connection:
+            yield connection.execution_options(isolation_level="AUTOCOMMIT")
+
+    @stage("pgvector_upsert")
+    def upsert_tests(self, tests: List[Any], embeddings: List[List[float]]) -> int:
+        """Insert or replace one batch of embeddings."""
+        statement = insert(TestEmbedding)
+        statement = statement.on_conflict_do_update(
+            index_elements=[TestEmbedding.test_id],
+            set_={
+                "embedding": statement.excluded.embedding,
+                "updated_at": statement.excluded.updated_at,
+            },
+        )
+        now = utcnow()
+        rows = [
+            {"test_id": int(test["id"]), "embedding": embedding, "updated_at": now}
+            for test, embedding in zip(tests, embeddings)
+        ]
+        with self.engine.begin() as connection:
+            connection.execute(statement, rows)
+        return len(rows)
+
+    @stage("pgvector_delete")
+    def delete(self, ids: List[str]) -> int:
+        with self.engine.begin() as connection:
+            for batch in batched([int(i) for i in ids], 1000):
+                connection.execute(
+                    delete(TestEmbedding).where(TestEmbedding.test_id.in_(batch))
+                )
+        return len(ids)
+
+    def list_ids(self) -> List[str]:
+        with self._connect() as connection:
+            return [str(i) for i in connection.scalars(select(TestEmbedding.test_id))]
+
+    def fetch(self, ids: List[str]) -> Dict[str, np.ndarray]:
+        query = select(TestEmbedding.test_id, TestEmbedding.embedding).where(
+            TestEmbedding.test_id.in_([int(i) for i in ids])
+        )
+        with self._connect() as connection:
+            return {str(test_id): embedding for test_id, embedding in connection.execute(query)}
+
+    @staticmethod
+    @contextmanager
+    def _session_settings(connection: Connection, settings: Dict[str, Any]):
+        """Apply planner settings for one query; pooled connections get them reset."""
+        for name, value in settings.items():
+            connection.execute(text(f"SET {name} = {value}"))
+        try:
+            yield
+        finally:
+            for name in settings:
+                connection.execute(text(f"RESET {name}"))
+
+    def _search(
+        self,
+        connection: Connection,
+        vector: np.ndarray,
+        top_k: int,
+        filters: Optional[SearchFilters],
+    ) -> List[VectorMatch]:
+        query = literal(np.asarray(vector, dtype=np.float32), TestEmbedding.embedding.type)
+        distance = TestEmbedding.embedding.op("<=>", return_type=Float)(query)
+        statement = (
+            select(*DBTest.__table__.c, distance.label("distance"))
+            .join(TestEmbedding, TestEmbedding.test_id == DBTest.id)
+            .where(*sql_filters(filters))
+            .order_by(text("distance"))
+            .limit(top_k)
+        )
+        settings = {}
+        if top_k > PGVECTOR_EF_SEARCH:
+            # The index scan yields at most ef_search rows
+            settings["hnsw.ef_search"] = min(int(top_k), MAX_EF_SEARCH)
+        with self._session_settings(connection, settings):
+            rows = connection.execute(statement).mappings().all()
+        if len(rows) < top_k and (has_filters(filters) or top_k > MAX_EF_SEARCH):
+            # pgvector filters the ef_search candidates after the index scan,
+            # so a selective filter can leave too few; rank exactly instead.
+            with self._session_settings(connection, {"enable_indexscan": "off"}):
+                rows = connection.execute(statement).mappings().all()
+        return [
+            VectorMatch(str(row["id"]), 1.0 - float(row["distance"]), test_metadata(row))
+            for row in rows
+        ]
+
+    @stage("pgvector_query")
+    def search(
+        self,
+        vector: np.ndarray,
+        top_k: int,
+        filters: Optional[SearchFilters] = None,
+    ) -> List[VectorMatch]:
+        """Nearest tests with their rows, filtered in the same statement."""
+        with self._connect() as connection:
+            return self._search(connection, vector, top_k, filters)
+
+    @stage("pgvector_query")
+    def search_many(
+        self,
+        vectors: List[np.ndarray],
+        top_ks: List[int],
+        filters: Optional[List[Optional[SearchFilters]]] = None,
+    ) -> List[List[VectorMatch]]:
+        """Run the searches back to back on one pooled connection."""
+        filters = filters or [None] * len(vectors)
+        with self._connect() as connection:
+            return [
+                self._search(connection, vector, top_k, query_filters)
+                for vector, top_k, query_filters in zip(vectors, top_ks, filters)
+            ]
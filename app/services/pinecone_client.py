@@ -0,0 +1,31 @@
+import threading
+from typing import Any, Dict
+from pinecone import Pinecone
+from app.config import PINECONE_API_KEY, PINECONE_POOL_MAXSIZE
+
+_clients: Dict[str, Pinecone] = {}
+_lock = threading.Lock()
+
+
+def pinecone_client(api_key: str = None) -> Pinecone:
+    """The process-wide Pinecone client for an API key.
+
+    Embedding calls and index operations share its keep-alive HTTP pool,
+    sized so concurrent queries reuse connections instead of the default
+    5 x CPUs discarding the overflow after every burst.
+    """
+    api_key = api_key or PINECONE_API_KEY
+    with _lock:
+        client = _clients.get(api_key)
+        if client is None:
+            client = Pinecone(api_key=api_key)
+            client.openapi_config.connection_pool_maxsize = PINECONE_POOL_MAXSIZE
+            _clients[api_key] = client
+        return client
+
+
+def pinecone_index(name: str, api_key: str = None) -> Any:
+    """A data-plane handle for an index with the same pool sizing."""
+    return pinecone_client(api_key).Index(
+        name, connection_pool_maxsize=PINECONE_POOL_MAXSIZE
+    )
@@ -1,94 +1,118 @@
 import time
-from typing import List, Dict, Any
-from pinecone import Pinecone, ServerlessSpec
-from app.config import PINECONE_API_KEY, PINECONE_INDEX_NAME
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Any, Optional
+import numpy as np
+from pinecone import ServerlessSpec
+from app.config import PINECONE_INDEX_NAME
+from app.models.models import SearchFilters
+from app.services.embeddings import EmbeddingProvider, get_embedding_provider
+from app.services.filters import pinecone_filter
+from app.services.ingestion import batched
+from app.services.metrics import stage
+from app.services.pinecone_client import pinecone_client, pinecone_index
+from app.services.vector_store import VectorStore, test_metadata
 
 
-class PineconeDatabase:
+class PineconeDatabase(VectorStore):
     """A class to handle Pinecone database operations."""
 
-    def __init__(self, api_key: str = None, index_name: str = None):
+    def __init__(
+        self,
+        api_key: str = None,
+        index_name: str = None,
+        embedder: EmbeddingProvider = None,
+    ):
         """Initialize the database connection."""
-        self.pc = Pinecone(api_key=api_key or PINECONE_API_KEY)
+        self.pc = pinecone_client(api_key)
+        self.embedder = embedder or get_embedding_provider()
         self.index_name = index_name or PINECONE_INDEX_NAME
         self.namespace = "shl-tests"
+        self.sync_target = f"pinecone:{self.index_name}/{self.namespace}"
         self.index = self._initialize_index()
 
     def _initialize_index(self) -> Any:
         """Initialize or create the Pinecone index."""
         try:
-            return self.pc.Index(self.index_name)
+            return pinecone_index(self.index_name, self.pc.config.api_key)
         except Exception:
             self.pc.create_index(
                 name=self.index_name,
-                dimension=1024,  # Dimension for multilingual-e5-large model
+                dimension=self.embedder.dimension,
                 metric="cosine",
                 spec=ServerlessSpec(cloud="aws", region="us-east-1"),
             )
             # Wait for the index to be ready
             while not self.pc.describe_index(self.index_name).status["ready"]:
                 time.sleep(1)
-            return self.pc.Index(self.index_name)
+            return pinecone_index(self.index_name, self.pc.config.api_key)
 
-    def add_tests(self, data: List[Any], input_type: str = "passage") -> List[Dict]:
-        """Upsert vectors to the database."""
-        # Extract descriptions from test objects
-        # print(data)
-        for i in range(0, len(data)):
-            batch_data = data[i : i + 50]
-            descriptions = [test["description"] for test in batch_data]
-            embedding_response = self.pc.inference.embed(
-                model="multilingual-e5-large",
-                inputs=descriptions,
-                parameters={"input_type": input_type, "truncate": "END"},
+    @stage("pinecone_upsert")
+    def upsert_tests(self, tests: List[Any], embeddings: List[List[float]]) -> int:
+        """Upsert one batch of embedded tests to the index."""
+        vectors = []
+        for test, embedding in zip(tests, embeddings):
+            vectors.append(
+                {
+                    "id": f"{test['id']}",
+                    "values": np.asarray(embedding, dtype=np.float32).tolist(),
+                    "metadata": test_metadata(test),
+                }
             )
+        self.index.upsert(vectors=vectors, namespace=self.namespace)
+        return len(vectors)
 
-            # Extract the actual vector values from the embedding response
-            embeddings = [embedding["values"] for embedding in embedding_response]
+    @stage("pinecone_delete")
+    def delete(self, ids: List[str]) -> int:
+        """Delete vectors by id, 1000 per request (Pinecone's limit)."""
+        for batch in batched(list(ids), 1000):
+            self.index.delete(ids=batch, namespace=self.namespace)
+        return len(ids)
 
-            # Prepare vectors for upserting
-            vectors = []
-            for test, embedding in zip(batch_data, embeddings):
-                vectors.append(
-                    {
-                        "id": f"{test['id']}",
-                        "values": embedding,
-                        "metadata": {
-                            "id": test["id"],
-                            "name": test["name"],
-                            "link": test["link"],
-                            "remote_testing": test["remote_testing"],
-                            "adaptive_irt": test["adaptive_irt"],
-                            "test_type": test["test_type"],
-                            "description": test["description"],
-                            "full_link": test["full_link"],
-                            "job_levels": test["job_levels"],
-                            "languages": test["languages"],
-                            "assessment_length": test["assessment_length"],
-                        },
-                    }
-                )
+    @stage("pinecone_list")
+    def list_ids(self) -> List[str]:
+        return [
+            vector_id
+            for page in self.index.list(namespace=self.namespace)
+            for vector_id in page
+        ]
 
-            # Upsert vectors to the database
-            self.index.upsert(vectors=vectors, namespace=self.namespace)
-        return True
-
-    def query(self, query: List[float], top_k: int) -> List[Dict]:
-        """Query vectors from the database."""
-        if top_k==0:
-            top_k = 1
-        top_k = min(10, top_k)
-        embedding = self.pc.inference.embed(
-            model="multilingual-e5-large",
-            inputs=[query],
-            parameters={"input_type": "query"},
-        )
+    @stage("pinecone_fetch")
+    def fetch(self, ids: List[str]) -> Dict[str, np.ndarray]:
+        vectors = {}
+        for batch in batched(list(ids), 1000):
+            fetched = self.index.fetch(ids=batch, namespace=self.namespace).vectors
+            vectors.update(
+                {i: np.asarray(v.values, dtype=np.float32) for i, v in fetched.items()}
+            )
+        return vectors
 
+    @stage("pinecone_query")
+    def search(
+        self,
+        vector: np.ndarray,
+        top_k: int,
+        filters: Optional[SearchFilters] = None,
+    ) -> List[Dict]:
+        """Query vectors from the database, filtering on metadata server-side."""
         results = self.index.query(
             namespace=self.namespace,
-            vector=embedding[0]["values"],
+            vector=np.asarray(vector).tolist(),
             top_k=top_k,
+            filter=pinecone_filter(filters),
             include_values=False,
             include_metadata=True,
         )
         return results.matches
+
+    def search_many(
+        self,
+        vectors: List[np.ndarray],
+        top_ks: List[int],
+        filters: Optional[List[Optional[SearchFilters]]] = None,
+    ) -> List[List[Dict]]:
+        """Issue the index queries concurrently; results keep input order."""
+        filters = filters or [None] * len(vectors)
+        if len(vectors) <= 1:
+            return super().search_many(vectors, top_ks, filters)
+        with ThreadPoolExecutor(max_workers=min(len(vectors), 16)) as pool:
+            return list(pool.map(self.search, vectors, top_ks, filters))
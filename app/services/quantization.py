@@ -0,0 +1,142 @@
+import os
+from typing import Optional
+import numpy as np
+
+SCORE_CHUNK = 256  # Rows widened to float32 at a time; small enough to stay in cache
+PARAMS_FILE = "quantization.npz"
+
+
+class VectorCodec:
+    """Compact storage for the rows of a LocalVectorStore matrix.
+
+    Codes are what a query scans; the float32 matrix stays on disk for
+    full-precision rescoring and re-encoding. A codec is never changed
+    once in use: fit and load return a new one, which the store publishes
+    together with the codes it encoded.
+    """
+
+    kind: str
+    dtype: type
+
+    def needs_refit(self, rows: int) -> bool:
+        return False
+
+    def fit(self, vectors: np.ndarray) -> "VectorCodec":
+        """A codec fitted to vectors."""
+        return self
+
+    def encode(self, vectors: np.ndarray) -> np.ndarray:
+        raise NotImplementedError
+
+    def _prepare(self, queries: np.ndarray):
+        """Query weights and per-query bias so that scores = codes @ weights.T + bias."""
+        return queries, None
+
+    def scores(self, codes: np.ndarray, queries: np.ndarray) -> np.ndarray:
+        """Approximate queries @ vectors.T, widening a chunk of rows at a time."""
+        weights, bias = self._prepare(queries)
+        out = np.empty((len(queries), len(codes)), dtype=np.float32)
+        # One reused buffer: a fresh allocation per chunk costs more than the multiply
+        buffer = np.empty((min(SCORE_CHUNK, len(codes)), codes.shape[1]), dtype=np.float32)
+        for start in range(0, len(codes), SCORE_CHUNK):
+            chunk = codes[start : start + SCORE_CHUNK]
+            widened = buffer[: len(chunk)]
+            np.copyto(widened, chunk, casting="unsafe")
+            out[:, start : start + len(chunk)] = weights @ widened.T
+        if bias is not None:
+            out += bias[:, None]
+        return out
+
+    def save(self, path: str, rows: int) -> None:
+        pass
+
+    def load(self, path: str, rows: int) -> Optional["VectorCodec"]:
+        """A codec with the persisted parameters; None if missing or out of date."""
+        return self
+
+
+class Float16Codec(VectorCodec):
+    """Half-precision copies: 2 bytes per dimension, no parameters."""
+
+    kind = "float16"
+    dtype = np.float16
+
+    def encode(self, vectors: np.ndarray) -> np.ndarray:
+        return np.asarray(vectors, dtype=np.float32).astype(np.float16)
+
+
+class Int8Codec(VectorCodec):
+    """Affine int8 codes with a per-dimension scale and offset.
+
+    A value is stored as round((x - offset) / scale) in [-128, 127], with
+    scale and offset fitted to each dimension's observed range. Rows added
+    later that fall outside it are clipped until the catalog has doubled,
+    when the store refits and re-encodes every row.
+    """
+
+    kind = "int8"
+    dtype = np.int8
+
+    def __init__(
+        self,
+        scale: Optional[np.ndarray] = None,
+        offset: Optional[np.ndarray] = None,
+        fitted_rows: int = 0,
+    ):
+        self.scale = scale
+        self.offset = offset
+        self.fitted_rows = fitted_rows
+
+    def needs_refit(self, rows: int) -> bool:
+        return self.scale is None or rows >= 2 * self.fitted_rows
+
+    def fit(self, vectors: np.ndarray) -> "Int8Codec":
+        low = vectors.min(axis=0).astype(np.float32)
+        high = vectors.max(axis=0).astype(np.float32)
+        scale = (high - low) / 255.0
+        scale[scale == 0] = 1.0
+        return Int8Codec(scale, low + 128.0 * scale, len(vectors))
+
+    def encode(self, vectors: np.ndarray) -> np.ndarray:
+        codes = np.empty(vectors.shape, dtype=np.int8)
+        for start in range(0, len(vectors), SCORE_CHUNK):
+            chunk = (vectors[start : start + SCORE_CHUNK] - self.offset) / self.scale
+            codes[start : start + len(chunk)] = np.clip(np.rint(chunk), -128, 127)
+        return codes
+
+    def _prepare(self, queries: np.ndarray):
+        # q . (code * scale + offset) = code . (q * scale) + q . offset
+        return (queries * self.scale).astype(np.float32), queries @ self.offset
+
+    def save(self, path: str, rows: int) -> None:
+        target = os.path.join(path, PARAMS_FILE)
+        tmp = target + ".tmp.npz"
+        np.savez(
+            tmp,
+            scale=self.scale,
+            offset=self.offset,
+            fitted_rows=self.fitted_rows,
+            rows=rows,
+        )
+        os.replace(tmp, target)
+
+    def load(self, path: str, rows: int) -> Optional["Int8Codec"]:
+        target = os.path.join(path, PARAMS_FILE)
+        if not os.path.exists(target):
+            return None
+        with np.load(target) as stored:
+            if int(stored["rows"]) != rows:
+                return None
+            return Int8Codec(stored["scale"], stored["offset"], int(stored["fitted_rows"]))
+
+
+def get_codec(kind: str) -> Optional[VectorCodec]:
+    """The codec selected by LOCAL_INDEX_DTYPE, or None to scan float32 directly."""
+    kind = (kind or "float32").lower()
+    if kind == "float32":
+        return None
+    if kind == "float16":
+        return Float16Codec()
+    if kind == "int8":
+        return Int8Codec()
+    raise ValueError(f"Unknown local index dtype: {kind}")
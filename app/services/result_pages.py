@@ -0,0 +1,55 @@
+import secrets
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, List, Optional, Tuple
+from app.config import RESULT_PAGES_SIZE, RESULT_PAGES_TTL
+
+
+class ResultPageStore:
+    """Keeps ranked result lists briefly so clients can page through them.
+
+    A cursor is ``<token>.<offset>``; the token names a stored list and the
+    offset is where the next page starts. Lists are per process, so with
+    several workers a cursor must reach the worker that issued it.
+    """
+
+    def __init__(self, max_size: int = None, ttl: float = None):
+        self.max_size = RESULT_PAGES_SIZE if max_size is None else max_size
+        self.ttl = RESULT_PAGES_TTL if ttl is None else ttl
+        self._entries: "OrderedDict[str, Tuple[float, int, List[Any]]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _cursor(self, token: str, offset: int, total: int) -> Optional[str]:
+        return f"{token}.{offset}" if offset < total else None
+
+    def start(self, results: List[Any], page_size: int) -> Tuple[List[Any], Optional[str]]:
+        """Store a ranked list and return its first page and next cursor."""
+        if len(results) <= page_size:
+            return results, None
+        token = secrets.token_urlsafe(12)
+        with self._lock:
+            self._entries[token] = (time.monotonic(), page_size, results)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+        return results[:page_size], self._cursor(token, page_size, len(results))
+
+    def page(self, cursor: str) -> Optional[Tuple[List[Any], Optional[str], int]]:
+        """Return (page, next cursor, total) for a cursor, or None if expired."""
+        token, _, offset = cursor.rpartition(".")
+        if not token or not offset.isdigit():
+            return None
+        offset = int(offset)
+        with self._lock:
+            entry = self._entries.get(token)
+            if entry is None:
+                return None
+            created, page_size, results = entry
+            if self.ttl and time.monotonic() - created > self.ttl:
+                del self._entries[token]
+                return None
+        end = offset + page_size
+        return results[offset:end], self._cursor(token, end, len(results)), len(results)
+
+
+result_pages = ResultPageStore()
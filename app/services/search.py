@@ -0,0 +1,102 @@
+from typing import List, Optional, Tuple
+import numpy as np
+from app.config import HYBRID_SEARCH
+from app.models.models import PineconeMatch, PineconeQueryRequest, PineconeQueryResponse
+from app.services.catalog import CatalogSnapshot, TestRecord
+from app.services.hybrid import hybrid_query_batch, hybrid_search_batch
+from app.services.metrics import stage
+from app.services.vector_store import VectorMatch, VectorStore
+
+
+def use_hybrid(query_request: PineconeQueryRequest) -> bool:
+    if query_request.hybrid is None:
+        return HYBRID_SEARCH
+    return query_request.hybrid
+
+
+def retrieve(
+    store: VectorStore,
+    query_requests: List[PineconeQueryRequest],
+    snapshot: CatalogSnapshot,
+    vectors: Optional[List[np.ndarray]] = None,
+) -> List[List[VectorMatch]]:
+    """Ranked matches for each request, fusing BM25 results where enabled.
+
+    vectors, if given, are the requests' query embeddings, used instead of
+    embedding the queries through the cache.
+    """
+    results = [None] * len(query_requests)
+    for hybrid in (True, False):
+        group = [
+            i for i, request in enumerate(query_requests)
+            if use_hybrid(request) == hybrid
+        ]
+        if not group:
+            continue
+        queries = [query_requests[i].query for i in group]
+        top_ks = [query_requests[i].top_k for i in group]
+        filters = [query_requests[i].filters for i in group]
+        if vectors is not None:
+            group_vectors = [vectors[i] for i in group]
+            if hybrid:
+                matches = hybrid_search_batch(
+                    store, snapshot, queries, group_vectors, top_ks, filters
+                )
+            else:
+                with stage("vector_query"):
+                    matches = store.search_many(group_vectors, top_ks, filters)
+        elif hybrid:
+            matches = hybrid_query_batch(store, snapshot, queries, top_ks, filters)
+        elif len(group) == 1:
+            matches = [store.query(queries[0], top_ks[0], filters[0])]
+        else:
+            matches = store.query_batch(queries, top_ks, filters)
+        for i, group_matches in zip(group, matches):
+            results[i] = group_matches
+    return results
+
+
+def hydrate(
+    matches: List[VectorMatch], snapshot: CatalogSnapshot
+) -> List[Tuple[PineconeMatch, Optional[TestRecord]]]:
+    """Fill in each match's test details from the catalog snapshot."""
+    hydrated = []
+    for match in matches:
+        match_obj = PineconeMatch(
+            id=match.id, score=match.score, metadata=dict(match.metadata or {})
+        )
+        test_data = snapshot.get(int(match.id))
+        if test_data is not None:
+            match_obj.metadata.update(test_data.as_metadata())
+        hydrated.append((match_obj, test_data))
+    return hydrated
+
+
+def filter_by_time(
+    hydrated: List[Tuple[PineconeMatch, Optional[TestRecord]]], time: Optional[int]
+) -> List[PineconeMatch]:
+    """Drop strong matches whose assessment runs longer than the time budget."""
+    kept = []
+    for match_obj, test_data in hydrated:
+        if time is not None and test_data is not None and test_data.assessment_length:
+            try:
+                assessment_length = int(test_data.assessment_length)
+                if assessment_length > time and float(match_obj.score) > 0.5:
+                    continue
+            except (ValueError, TypeError):
+                pass
+        kept.append(match_obj)
+    return kept
+
+
+def build_response(
+    query_request: PineconeQueryRequest,
+    matches: List[VectorMatch],
+    snapshot: CatalogSnapshot,
+) -> PineconeQueryResponse:
+    """Hydrate matches from the catalog snapshot and apply the duration filter."""
+    with stage("hydration"):
+        hydrated = hydrate(matches, snapshot)
+    with stage("filter"):
+        kept = filter_by_time(hydrated, query_request.time)
+    return PineconeQueryResponse(matches=kept)
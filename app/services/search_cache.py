@@ -0,0 +1,95 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional, Tuple
+from app.config import SEARCH_CACHE_SIZE, SEARCH_CACHE_TTL
+from app.services.embedding_cache import normalize_query
+
+
+class CatalogVersion:
+    """A monotonically increasing counter bumped on every catalog write."""
+
+    def __init__(self):
+        self._value = 0
+        self._lock = threading.Lock()
+
+    @property
+    def value(self) -> int:
+        return self._value
+
+    def bump(self) -> int:
+        """Advance the version, invalidating anything keyed on the old one."""
+        with self._lock:
+            self._value += 1
+            return self._value
+
+
+class SearchResultCache:
+    """An LRU cache of complete /search/ responses.
+
+    Keys embed the catalog version, so bumping the version makes every
+    earlier entry unreachable; the TTL bounds staleness across workers,
+    whose in-process versions are not shared.
+    """
+
+    def __init__(
+        self, catalog_version: CatalogVersion, max_size: int = None, ttl: float = None
+    ):
+        self.catalog_version = catalog_version
+        self.max_size = SEARCH_CACHE_SIZE if max_size is None else max_size
+        self.ttl = SEARCH_CACHE_TTL if ttl is None else ttl
+        self._entries: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def key(self, query: str, *params: Hashable) -> Tuple:
+        """Build a cache key from the normalised request and catalog version."""
+        return (self.catalog_version.value, normalize_query(query), *params)
+
+    def get(self, key: Tuple) -> Optional[Any]:
+        """Return a cached response for key, or None."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and (
+                not self.ttl or time.monotonic() - entry[0] <= self.ttl
+            ):
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            if entry is not None:
+                del self._entries[key]
+            self.misses += 1
+            return None
+
+    def put(self, key: Tuple, response: Any) -> None:
+        """Store a response unless the catalog changed while it was computed."""
+        if self.max_size <= 0 or key[0] != self.catalog_version.value:
+            return
+        with self._lock:
+            self._entries[key] = (time.monotonic(), response)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def invalidate(self) -> int:
+        """Bump the catalog version and drop every cached response."""
+        version = self.catalog_version.bump()
+        with self._lock:
+            self._entries.clear()
+        return version
+
+    def stats(self) -> Dict[str, int]:
+        """Hit/miss counters and current size."""
+        with self._lock:
+            return {
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "hits": self.hits,
+                "misses": self.misses,
+                "catalog_version": self.catalog_version.value,
+            }
+
+
+catalog_version = CatalogVersion()
+search_result_cache = SearchResultCache(catalog_version)
@@ -0,0 +1,236 @@
+import argparse
+import asyncio
+import json
+import logging
+import time
+from typing import Any, Dict, List, Optional
+from sqlalchemy import Text, and_, cast, delete, exists, func, or_, select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette.concurrency import run_in_threadpool
+from app.database import Test as DBTest, VectorSyncState, utcnow
+from app.services.catalog import TEST_FIELDS
+from app.services.ingestion import batched
+from app.services.neighbors import refresh_neighbors
+from app.services.search_cache import search_result_cache
+from app.services.sync_plan import SYNCED_FIELDS
+from app.services.vector_store import VectorStore
+
+logger = logging.getLogger(__name__)
+
+# Rows per INSERT/DELETE statement (asyncpg allows 32767 bind parameters)
+STATE_WRITE_BATCH = 5000
+
+
+def vector_record(row: Any) -> Dict[str, Any]:
+    """The dict add_tests expects, from a tests row or result tuple."""
+    record = {field: getattr(row, field) for field in SYNCED_FIELDS}
+    record["id"] = str(row.id)
+    return record
+
+
+async def _save_state(
+    db: AsyncSession,
+    target: str,
+    model: str,
+    hashes: Dict[str, str],
+    deletes: List[str],
+) -> None:
+    now = utcnow()
+    rows = [
+        {
+            "target": target,
+            "test_id": int(vector_id),
+            "content_hash": digest,
+            "embedding_model": model,
+            "synced_at": now,
+        }
+        for vector_id, digest in hashes.items()
+    ]
+    for batch in batched(rows, STATE_WRITE_BATCH):
+        statement = insert(VectorSyncState).values(batch)
+        await db.execute(
+            statement.on_conflict_do_update(
+                index_elements=[VectorSyncState.target, VectorSyncState.test_id],
+                set_={
+                    "content_hash": statement.excluded.content_hash,
+                    "embedding_model": statement.excluded.embedding_model,
+                    "synced_at": statement.excluded.synced_at,
+                },
+            )
+        )
+    test_ids = [int(vector_id) for vector_id in deletes if vector_id.isdigit()]
+    for batch in batched(test_ids, STATE_WRITE_BATCH):
+        await db.execute(
+            delete(VectorSyncState).where(
+                VectorSyncState.target == target, VectorSyncState.test_id.in_(batch)
+            )
+        )
+    await db.commit()
+
+
+def content_hash_sql():
+    """SHA-256 of a tests row's synced fields, computed by Postgres.
+
+    Hashing in the database lets an unchanged catalog be diffed against
+    vector_sync_state without transferring any rows.
+    """
+    fields = func.json_build_array(*[getattr(DBTest, field) for field in SYNCED_FIELDS])
+    return func.encode(
+        func.sha256(func.convert_to(cast(fields, Text), "UTF8")), "hex"
+    ).label("content_hash")
+
+
+async def _changed(
+    db: AsyncSession, target: str, model: str, test_ids: Optional[List[int]] = None
+) -> Dict[int, str]:
+    """{test id: current hash} for tests that need (re-)embedding."""
+    digest = content_hash_sql()
+    query = (
+        select(DBTest.id, digest)
+        .outerjoin(
+            VectorSyncState,
+            and_(VectorSyncState.target == target, VectorSyncState.test_id == DBTest.id),
+        )
+        .where(
+            or_(
+                VectorSyncState.test_id.is_(None),
+                VectorSyncState.content_hash != digest,
+                VectorSyncState.embedding_model != model,
+            )
+        )
+    )
+    if test_ids is None:
+        return dict((await db.execute(query)).all())
+    changed = {}
+    for batch in batched(test_ids, STATE_WRITE_BATCH):
+        changed.update((await db.execute(query.where(DBTest.id.in_(batch)))).all())
+    return changed
+
+
+async def _removed(db: AsyncSession, target: str) -> List[str]:
+    """Ids synced into the index whose tests no longer exist."""
+    result = await db.execute(
+        select(VectorSyncState.test_id).where(
+            VectorSyncState.target == target,
+            ~exists().where(DBTest.id == VectorSyncState.test_id),
+        )
+    )
+    return [str(test_id) for test_id in result.scalars()]
+
+
+async def _reconcile(db: AsyncSession, store: VectorStore, target: str) -> List[str]:
+    """Forget state for vectors missing from the index; return stray ids."""
+    indexed = set(await run_in_threadpool(store.list_ids))
+    result = await db.execute(select(DBTest.id))
+    test_ids = {str(test_id) for test_id in result.scalars()}
+    result = await db.execute(
+        select(VectorSyncState.test_id).where(VectorSyncState.target == target)
+    )
+    synced = {str(test_id) for test_id in result.scalars()}
+    lost = [int(test_id) for test_id in synced - indexed]
+    for batch in batched(lost, STATE_WRITE_BATCH):
+        await db.execute(
+            delete(VectorSyncState).where(
+                VectorSyncState.target == target, VectorSyncState.test_id.in_(batch)
+            )
+        )
+    await db.commit()
+    return sorted(indexed - test_ids - synced)
+
+
+async def sync_tests(
+    db: AsyncSession,
+    store: VectorStore,
+    rows: Optional[List[DBTest]] = None,
+    reconcile: bool = False,
+) -> Dict[str, Any]:
+    """Bring the vector index in line with the tests table.
+
+    Only tests whose content hash or embedding model changed since the last
+    sync are embedded and upserted, and vectors of deleted tests are
+    removed. Given rows, only those tests are synced and nothing is
+    deleted. reconcile also lists the index itself, repairing vectors lost
+    or left behind outside of a sync.
+    """
+    start = time.perf_counter()
+    target, model = store.sync_target, store.embedder.model
+    full = rows is None
+    deletes: List[str] = []
+    if full:
+        if reconcile:
+            deletes.extend(await _reconcile(db, store, target))
+        changed = await _changed(db, target, model)
+        deletes.extend(await _removed(db, target))
+        rows = []
+        columns = [getattr(DBTest, field) for field in TEST_FIELDS]
+        for batch in batched(sorted(changed), STATE_WRITE_BATCH):
+            result = await db.execute(select(*columns).where(DBTest.id.in_(batch)))
+            rows.extend(result.all())
+        scanned = (await db.execute(select(func.count()).select_from(DBTest))).scalar()
+    else:
+        scanned = len(rows)
+        changed = await _changed(db, target, model, [row.id for row in rows])
+        rows = [row for row in rows if row.id in changed]
+
+    upserts = [vector_record(row) for row in rows]
+    if upserts:
+        await run_in_threadpool(store.add_tests, upserts)
+    if deletes:
+        await run_in_threadpool(store.delete, deletes)
+    hashes = {record["id"]: changed[int(record["id"])] for record in upserts}
+    await _save_state(db, target, model, hashes, deletes)
+    neighbors = await refresh_neighbors(
+        db,
+        store,
+        [int(record["id"]) for record in upserts],
+        [int(vector_id) for vector_id in deletes if vector_id.isdigit()],
+    )
+
+    summary = {
+        "scanned": scanned,
+        "embedded": len(upserts),
+        "deleted": len(deletes),
+        "unchanged": scanned - len(upserts),
+        "neighbor_lists": neighbors,
+        "seconds": round(time.perf_counter() - start, 3),
+    }
+    logger.info("Synced %s: %s", target, summary)
+    return summary
+
+
+async def sync_job(
+    db: AsyncSession, payload: Dict[str, Any], store: VectorStore
+) -> Dict[str, Any]:
+    """Job handler: sync payload["test_ids"], or everything when absent."""
+    rows = None
+    if payload.get("test_ids") is not None:
+        rows = []
+        for batch in batched(payload["test_ids"], STATE_WRITE_BATCH):
+            result = await db.execute(select(DBTest).where(DBTest.id.in_(batch)))
+            rows.extend(result.scalars())
+    summary = await sync_tests(db, store, rows, reconcile=payload.get("reconcile", False))
+    if summary["embedded"] or summary["deleted"]:
+        search_result_cache.invalidate()
+    return summary
+
+
+async def _main(reconcile: bool) -> None:
+    from app.database import AsyncSessionLocal
+    from app.services.vector_store import get_vector_store
+
+    store = get_vector_store()
+    if not store.writable:
+        raise SystemExit("The local index is in use by another process; queue POST /tests/sync")
+    async with AsyncSessionLocal() as db:
+        print(json.dumps(await sync_tests(db, store, reconcile=reconcile)))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Sync the tests table into the vector index.")
+    parser.add_argument(
+        "--reconcile",
+        action="store_true",
+        help="also list the index to repair vectors changed outside of a sync",
+    )
+    asyncio.run(_main(parser.parse_args().reconcile))
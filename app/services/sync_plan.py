@@ -0,0 +1,68 @@
+import hashlib
+import json
+from typing import Any, Dict, Iterable, List, Tuple
+
+# Every field written to the index with a test's vector; changing any of
+# them means the stored vector or its metadata is stale.
+SYNCED_FIELDS = (
+    "name",
+    "link",
+    "remote_testing",
+    "adaptive_irt",
+    "test_type",
+    "description",
+    "full_link",
+    "job_levels",
+    "languages",
+    "assessment_length",
+)
+
+
+def content_hash(record: Dict[str, Any]) -> str:
+    """Stable SHA-256 of a record's synced fields."""
+    payload = json.dumps(
+        {field: record.get(field) for field in SYNCED_FIELDS},
+        sort_keys=True,
+        separators=(",", ":"),
+        ensure_ascii=False,
+        default=str,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class SyncPlan:
+    """The index writes needed to match a set of source records."""
+
+    __slots__ = ("upserts", "hashes", "deletes", "unchanged")
+
+    def __init__(self):
+        self.upserts: List[Dict[str, Any]] = []
+        self.hashes: Dict[str, str] = {}
+        self.deletes: List[str] = []
+        self.unchanged = 0
+
+
+def plan_sync(
+    records: Iterable[Dict[str, Any]],
+    state: Dict[str, Tuple[str, str]],
+    model: str,
+    deletions: bool = True,
+) -> SyncPlan:
+    """Diff records against {id: (content_hash, embedding_model)} state.
+
+    Records whose hash or embedding model differ are re-embedded; with
+    deletions, ids present in state but not in records are removed.
+    """
+    plan = SyncPlan()
+    seen = set()
+    for record in records:
+        digest = content_hash(record)
+        seen.add(record["id"])
+        if state.get(record["id"]) == (digest, model):
+            plan.unchanged += 1
+        else:
+            plan.upserts.append(record)
+            plan.hashes[record["id"]] = digest
+    if deletions:
+        plan.deletes = [vector_id for vector_id in state if vector_id not in seen]
+    return plan
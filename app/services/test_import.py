@@ -0,0 +1,209 @@
+import argparse
+import asyncio
+import json
+import logging
+import time
+from typing import Any, AsyncIterable, AsyncIterator, Dict, List, Optional, Tuple
+from pydantic import ValidationError
+from app.config import BULK_INSERT_BATCH_SIZE
+from app.database import AsyncSessionLocal
+from app.models.models import ConflictStrategy, TestCreate
+from app.services.catalog import catalog
+from app.services.jobs import enqueue
+from app.services.search_cache import search_result_cache
+from app.services.sync import sync_tests
+from app.services.test_upsert import DuplicateTestsError, upsert_tests
+from app.services.vector_store import VectorStore
+
+logger = logging.getLogger(__name__)
+
+MAX_LINE_BYTES = 1 << 20  # One test per line; anything longer is malformed
+MAX_REPORTED_ERRORS = 100
+
+
+class LineTooLongError(ValueError):
+    pass
+
+
+async def ndjson_lines(
+    chunks: AsyncIterable[bytes],
+) -> AsyncIterator[Tuple[int, bytes]]:
+    """Split a byte stream into (line number, line), skipping blank lines."""
+    buffer = b""
+    line_no = 0
+    async for chunk in chunks:
+        buffer += chunk
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            line_no += 1
+            if len(line) > MAX_LINE_BYTES:
+                raise LineTooLongError(f"Line {line_no} is longer than {MAX_LINE_BYTES} bytes")
+            if line.strip():
+                yield line_no, line
+        if len(buffer) > MAX_LINE_BYTES:
+            raise LineTooLongError(f"Line {line_no + 1} is longer than {MAX_LINE_BYTES} bytes")
+    if buffer.strip():
+        yield line_no + 1, buffer
+
+
+class ImportProgress:
+    """Running totals reported after every chunk of a streaming import."""
+
+    __slots__ = (
+        "lines",
+        "created",
+        "updated",
+        "skipped",
+        "invalid",
+        "embedded",
+        "job_ids",
+        "errors",
+        "started",
+    )
+
+    def __init__(self):
+        self.lines = 0
+        self.created = 0
+        self.updated = 0
+        self.skipped = 0
+        self.invalid = 0
+        self.embedded = 0
+        self.job_ids: List[int] = []
+        self.errors: List[Dict[str, Any]] = []
+        self.started = time.perf_counter()
+
+    def as_dict(self, **extra: Any) -> Dict[str, Any]:
+        elapsed = time.perf_counter() - self.started
+        return {
+            "lines": self.lines,
+            "created": self.created,
+            "updated": self.updated,
+            "skipped": self.skipped,
+            "invalid": self.invalid,
+            "embedded": self.embedded,
+            "job_ids": self.job_ids,
+            "seconds": round(elapsed, 3),
+            "lines_per_second": round(self.lines / elapsed, 1) if elapsed > 0 else 0.0,
+            **extra,
+        }
+
+
+async def import_tests(
+    lines: AsyncIterable[Tuple[int, bytes]],
+    store: VectorStore,
+    strategy: ConflictStrategy = ConflictStrategy.UPDATE,
+    chunk_size: int = None,
+    session_factory=AsyncSessionLocal,
+) -> AsyncIterator[Dict[str, Any]]:
+    """Validate, write and index tests from NDJSON lines in bounded chunks.
+
+    Each chunk is upserted into Postgres while the previous chunk is still
+    being embedded and written to the vector index, and at most one chunk
+    is in each stage, so memory stays flat however long the stream is.
+    Yields a progress dict after every chunk and a final one with done=True.
+
+    A chunk that fails to embed, or that this process may not write to
+    the index, stays committed and is handed to a sync_tests job instead,
+    listed in job_ids. An import that stops early
+    reports why in the final dict's error and reason ("conflict",
+    "line_too_long" or "malformed").
+    """
+    chunk_size = chunk_size or BULK_INSERT_BATCH_SIZE
+    progress = ImportProgress()
+    indexing: Optional[asyncio.Task] = None
+
+    async def index(rows) -> None:
+        async with session_factory() as db:
+            if not store.writable:
+                job = await enqueue(db, "sync_tests", {"test_ids": [row.id for row in rows]})
+                progress.job_ids.append(job.id)
+                return
+            try:
+                summary = await sync_tests(db, store, rows)
+            except Exception:
+                logger.exception("Indexing %d imported tests failed; queued for sync", len(rows))
+                await db.rollback()
+                job = await enqueue(db, "sync_tests", {"test_ids": [row.id for row in rows]})
+                progress.job_ids.append(job.id)
+                return
+        progress.embedded += summary["embedded"]
+        search_result_cache.invalidate()
+
+    async def write(chunk: List[TestCreate]) -> None:
+        nonlocal indexing
+        async with session_factory() as db:
+            result = await upsert_tests(db, chunk, strategy)
+        progress.created += result.created
+        progress.updated += result.updated
+        progress.skipped += result.skipped
+        if indexing is not None:
+            await indexing
+            indexing = None
+        if result.rows:
+            catalog.add(result.rows)
+            indexing = asyncio.create_task(index(result.rows))
+
+    chunk: List[TestCreate] = []
+    try:
+        async for line_no, line in lines:
+            progress.lines += 1
+            try:
+                chunk.append(TestCreate.model_validate_json(line))
+            except ValidationError as e:
+                progress.invalid += 1
+                if len(progress.errors) < MAX_REPORTED_ERRORS:
+                    progress.errors.append({"line": line_no, "error": e.errors()[0]["msg"]})
+                continue
+            if len(chunk) >= chunk_size:
+                await write(chunk)
+                chunk = []
+                report = progress.as_dict()
+                logger.info("Import progress: %s", report)
+                yield report
+        if chunk:
+            await write(chunk)
+        if indexing is not None:
+            await indexing
+    except (DuplicateTestsError, ValueError) as e:
+        if indexing is not None:
+            await indexing
+        if isinstance(e, DuplicateTestsError):
+            details = {"reason": "conflict", "links": e.links}
+        elif isinstance(e, LineTooLongError):
+            details = {"reason": "line_too_long"}
+        else:
+            details = {"reason": "malformed"}
+        logger.warning("Import stopped after %d lines: %s", progress.lines, e)
+        yield progress.as_dict(done=True, error=str(e), errors=progress.errors, **details)
+        return
+    logger.info("Imported %d lines: %s", progress.lines, progress.as_dict())
+    yield progress.as_dict(done=True, errors=progress.errors)
+
+
+async def _file_chunks(path: str, size: int = 1 << 16) -> AsyncIterator[bytes]:
+    with open(path, "rb") as file:
+        while chunk := await asyncio.to_thread(file.read, size):
+            yield chunk
+
+
+async def _main(path: str, strategy: ConflictStrategy, chunk_size: int) -> None:
+    from app.services.vector_store import get_vector_store
+
+    store = get_vector_store()
+    async for event in import_tests(
+        ndjson_lines(_file_chunks(path)), store, strategy, chunk_size
+    ):
+        print(json.dumps(event), flush=True)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Stream an NDJSON file of tests into the catalog.")
+    parser.add_argument("path", help="file with one TestCreate JSON object per line")
+    parser.add_argument(
+        "--conflict-strategy",
+        choices=[strategy.value for strategy in ConflictStrategy],
+        default=ConflictStrategy.UPDATE.value,
+    )
+    parser.add_argument("--chunk-size", type=int, default=None)
+    args = parser.parse_args()
+    asyncio.run(_main(args.path, ConflictStrategy(args.conflict_strategy), args.chunk_size))
@@ -0,0 +1,96 @@
+import base64
+import hashlib
+from typing import Any, List, Optional, Tuple
+from sqlalchemy import cast, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.database import Test as DBTest
+from app.models.models import SearchFilters, TestPage, TestResponse
+from app.services.filters import FLAG_FILTERS, has_filters
+
+# SearchFilters list fields -> array columns on tests
+LIST_COLUMNS = {
+    "job_levels": DBTest.job_levels,
+    "languages": DBTest.languages,
+    "test_types": DBTest.test_type,
+}
+FLAG_COLUMNS = {field: getattr(DBTest, key) for field, key in FLAG_FILTERS.items()}
+
+
+class InvalidCursorError(ValueError):
+    pass
+
+
+def sql_filters(filters: Optional[SearchFilters]) -> List[Any]:
+    """Translate SearchFilters into WHERE clauses on the tests table.
+
+    List filters use the array overlap operator (&&), which the GIN indexes
+    on those columns serve; max_duration uses the B-tree on assessment_length.
+    """
+    if not has_filters(filters):
+        return []
+    clauses = []
+    if filters.max_duration is not None:
+        clauses.append(DBTest.assessment_length <= filters.max_duration)
+    for field, column in LIST_COLUMNS.items():
+        values = getattr(filters, field)
+        if values:
+            clauses.append(column.op("&&")(cast(list(values), column.type)))
+    for field, column in FLAG_COLUMNS.items():
+        value = getattr(filters, field)
+        if value is not None:
+            clauses.append(column == ("Yes" if value else "No"))
+    return clauses
+
+
+def encode_cursor(last_id: int) -> str:
+    return base64.urlsafe_b64encode(str(last_id).encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> int:
+    """The id a page ends at; raises InvalidCursorError for anything else."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        return int(base64.urlsafe_b64decode(padded.encode()).decode())
+    except (ValueError, UnicodeDecodeError) as e:
+        raise InvalidCursorError(cursor) from e
+
+
+async def list_tests(
+    db: AsyncSession,
+    filters: Optional[SearchFilters],
+    limit: int,
+    cursor: Optional[str] = None,
+) -> TestPage:
+    """One page of tests in id order, continuing after cursor.
+
+    Keyset pagination: the next page starts at ``id > last id`` through the
+    primary key, so page 1000 costs the same as page 1, and rows inserted
+    or deleted meanwhile do not shift later pages.
+    """
+    query = select(DBTest).where(*sql_filters(filters)).order_by(DBTest.id)
+    if cursor is not None:
+        query = query.where(DBTest.id > decode_cursor(cursor))
+    # One extra row says whether another page follows
+    rows = list((await db.execute(query.limit(limit + 1))).scalars())
+    next_cursor = encode_cursor(rows[limit - 1].id) if len(rows) > limit else None
+    return TestPage(
+        tests=[TestResponse.model_validate(row) for row in rows[:limit]],
+        next_cursor=next_cursor,
+    )
+
+
+def page_etag(body: bytes) -> str:
+    """A strong validator for one serialized page."""
+    return '"' + hashlib.sha256(body).hexdigest()[:32] + '"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    candidates = [tag.strip() for tag in if_none_match.split(",")]
+    return "*" in candidates or any(tag.removeprefix("W/") == etag for tag in candidates)
+
+
+def serialize_page(page: TestPage) -> Tuple[bytes, str]:
+    body = page.model_dump_json().encode()
+    return body, page_etag(body)
@@ -0,0 +1,160 @@
+from typing import Any, Dict, List, Tuple
+from sqlalchemy import func, literal_column, select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.config import BULK_INSERT_BATCH_SIZE
+from app.database import Test as DBTest
+from app.models.models import ConflictStrategy, TestCreate, assessment_minutes
+from app.services.ingestion import batched
+
+# Columns written from a TestCreate; link is the natural key conflicts are detected on
+WRITTEN_FIELDS = (
+    "name",
+    "link",
+    "remote_testing",
+    "adaptive_irt",
+    "test_type",
+    "description",
+    "full_link",
+    "job_levels",
+    "languages",
+    "assessment_length",
+)
+
+
+class DuplicateTestsError(Exception):
+    """Raised under ConflictStrategy.FAIL when tests with these links exist."""
+
+    def __init__(self, links: List[str]):
+        self.links = links
+        super().__init__(
+            f"{len(links)} test(s) already exist: {', '.join(links[:10])}"
+        )
+
+
+class BulkWriteResult:
+    """Rows written by upsert_tests, in input order, with per-outcome counts."""
+
+    __slots__ = ("rows", "created", "updated", "skipped")
+
+    def __init__(self):
+        self.rows: List[DBTest] = []
+        self.created = 0
+        self.updated = 0
+        self.skipped = 0
+
+
+def _values(test: TestCreate) -> Dict[str, Any]:
+    values = {field: getattr(test, field) for field in WRITTEN_FIELDS}
+    values["assessment_length"] = assessment_minutes(test.assessment_length)
+    return values
+
+
+def _dedupe(
+    tests: List[TestCreate], strategy: ConflictStrategy
+) -> Tuple[List[Tuple[int, Dict[str, Any]]], int]:
+    """(input position, values) per distinct link, plus how many were dropped.
+
+    A single INSERT cannot touch one row twice, so repeated links inside a
+    request resolve like conflicts: first wins for skip, last for update.
+    """
+    by_link: Dict[str, Tuple[int, Dict[str, Any]]] = {}
+    unlinked: List[Tuple[int, Dict[str, Any]]] = []
+    repeated: List[str] = []
+    for position, test in enumerate(tests):
+        values = _values(test)
+        link = values["link"]
+        if link is None:
+            unlinked.append((position, values))
+        elif link not in by_link:
+            by_link[link] = (position, values)
+        else:
+            repeated.append(link)
+            if strategy == ConflictStrategy.UPDATE:
+                by_link[link] = (position, values)
+    if repeated and strategy == ConflictStrategy.FAIL:
+        raise DuplicateTestsError(sorted(set(repeated)))
+    pending = sorted([*by_link.values(), *unlinked], key=lambda item: item[0])
+    return pending, len(repeated)
+
+
+def _statement(strategy: ConflictStrategy):
+    statement = insert(DBTest)
+    if strategy == ConflictStrategy.UPDATE:
+        statement = statement.on_conflict_do_update(
+            index_elements=[DBTest.link],
+            set_={
+                field: getattr(statement.excluded, field)
+                for field in WRITTEN_FIELDS
+                if field != "link"
+            },
+        )
+    else:
+        statement = statement.on_conflict_do_nothing(index_elements=[DBTest.link])
+    # xmax is 0 only for rows this statement inserted rather than updated
+    return statement.returning(DBTest, literal_column("xmax = 0").label("inserted"))
+
+
+async def _reserve_ids(db: AsyncSession, count: int) -> List[int]:
+    """Take count ids from the tests id sequence."""
+    if not count:
+        return []
+    rows = await db.execute(
+        select(func.nextval(func.pg_get_serial_sequence("tests", "id"))).select_from(
+            func.generate_series(1, count)
+        )
+    )
+    return list(rows.scalars())
+
+
+async def upsert_tests(
+    db: AsyncSession,
+    tests: List[TestCreate],
+    strategy: ConflictStrategy = ConflictStrategy.FAIL,
+    batch_size: int = None,
+) -> BulkWriteResult:
+    """Write tests with one INSERT ... ON CONFLICT ... RETURNING per chunk.
+
+    Everything commits in one transaction; under FAIL nothing is written
+    if any link already exists.
+    """
+    result = BulkWriteResult()
+    pending, result.skipped = _dedupe(tests, strategy)
+    written: List[Tuple[int, DBTest]] = []
+    for chunk in batched(pending, batch_size or BULK_INSERT_BATCH_SIZE):
+        # RETURNING order is not guaranteed, so each row is matched back to
+        # its input position by link, or by an id reserved up front if it has none
+        positions = {values["link"]: pos for pos, values in chunk if values["link"]}
+        unlinked = [(pos, values) for pos, values in chunk if values["link"] is None]
+        reserved = await _reserve_ids(db, len(unlinked))
+        by_id = dict(zip(reserved, (pos for pos, _ in unlinked)))
+        parameters = [values for _, values in chunk if values["link"]]
+        parameters += [
+            {**values, "id": test_id} for test_id, (_, values) in zip(reserved, unlinked)
+        ]
+        returned = 0
+        # One statement per parameter shape: executemany needs the same keys in every set
+        for shape in (parameters[: len(positions)], parameters[len(positions) :]):
+            if not shape:
+                continue
+            rows = await db.execute(
+                _statement(strategy), shape, execution_options={"populate_existing": True}
+            )
+            for row, inserted in rows:
+                returned += 1
+                if row.link is not None:
+                    written.append((positions.pop(row.link), row))
+                else:
+                    written.append((by_id[row.id], row))
+                if inserted:
+                    result.created += 1
+                else:
+                    result.updated += 1
+        if returned < len(chunk):
+            if strategy == ConflictStrategy.FAIL:
+                await db.rollback()
+                raise DuplicateTestsError(sorted(positions))
+            result.skipped += len(chunk) - returned
+    await db.commit()
+    result.rows = [row for _, row in sorted(written, key=lambda item: item[0])]
+    return result
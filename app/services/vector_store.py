@@ -0,0 +1,178 @@
+from typing import List, Dict, Any, Optional
+import numpy as np
+from app.models.models import SearchFilters, assessment_minutes
+from app.config import (
+    VECTOR_BACKEND,
+    EMBEDDING_BATCH_SIZE,
+)
+from app.services.embedding_cache import query_embedding_cache
+from app.services.embedding_batcher import query_batcher
+from app.services.embeddings import EmbeddingProvider
+from app.services.ingestion import batched, ingest
+from app.services.metrics import observe_batch, stage
+
+
+class VectorMatch:
+    """A single query hit, shaped like the matches returned by Pinecone."""
+
+    __slots__ = ("id", "score", "metadata")
+
+    def __init__(self, id: str, score: float, metadata: Optional[Dict] = None):
+        self.id = id
+        self.score = score
+        self.metadata = metadata if metadata is not None else {}
+
+
+def test_metadata(test: Dict[str, Any]) -> Dict[str, Any]:
+    """Build the metadata stored alongside a test's vector."""
+    metadata = {
+        "id": test["id"],
+        "name": test["name"],
+        "link": test["link"],
+        "remote_testing": test["remote_testing"],
+        "adaptive_irt": test["adaptive_irt"],
+        "test_type": test["test_type"],
+        "description": test["description"],
+        "full_link": test["full_link"],
+        "job_levels": test["job_levels"],
+        "languages": test["languages"],
+        "assessment_length": test["assessment_length"],
+    }
+    # Numeric copy so duration filters can use range operators
+    minutes = assessment_minutes(test["assessment_length"])
+    if minutes is not None:
+        metadata["assessment_minutes"] = minutes
+    return metadata
+
+
+class VectorStore:
+    """Interface shared by every vector-store backend used by the API."""
+
+    embedder: EmbeddingProvider
+    sync_target: str  # Identifies the index in vector_sync_state
+    writable: bool = True  # False when another process owns a per-host index
+
+    def embed(self, inputs: List[str], input_type: str) -> np.ndarray:
+        """Embed a batch of texts with the store's embedding provider."""
+        observe_batch(len(inputs), input_type)
+        return self.embedder.embed(inputs, input_type)
+
+    def upsert_tests(self, tests: List[Any], embeddings: List[List[float]]) -> int:
+        """Write one batch of embedded tests and return how many were stored."""
+        raise NotImplementedError
+
+    def add_tests(
+        self,
+        data: List[Any],
+        input_type: str = "passage",
+        batch_size: int = None,
+        max_workers: int = None,
+    ) -> Dict[str, Any]:
+        """Embed and upsert test records, returning an ingestion summary."""
+
+        def write_batch(batch: List[Any]) -> int:
+            embeddings = self.embed([test["description"] for test in batch], input_type)
+            return self.upsert_tests(batch, embeddings)
+
+        return ingest(data, write_batch, batch_size=batch_size, max_workers=max_workers)
+
+    def delete(self, ids: List[str]) -> int:
+        """Remove vectors by id and return how many were requested."""
+        raise NotImplementedError
+
+    def list_ids(self) -> List[str]:
+        """Every vector id currently stored."""
+        raise NotImplementedError
+
+    def fetch(self, ids: List[str]) -> Dict[str, np.ndarray]:
+        """Stored vectors by id; ids not in the index are left out."""
+        raise NotImplementedError
+
+    def refresh(self) -> bool:
+        """Pick up writes other processes made to a per-host index; True if any."""
+        return False
+
+    def embed_query_texts(self, texts: List[str]) -> List[np.ndarray]:
+        """Embed uncached queries, coalescing them with concurrent requests."""
+        batcher = query_batcher(self.embedder)
+        if batcher is not None:
+            return batcher.embed(texts)
+        vectors = []
+        for batch in batched(texts, EMBEDDING_BATCH_SIZE):
+            vectors.extend(self.embed(batch, "query"))
+        return vectors
+
+    def embed_query(self, query: str) -> np.ndarray:
+        """Embed a search query, reusing cached embeddings where possible."""
+        return query_embedding_cache.get_or_compute(
+            self.embedder.model, query, lambda: self.embed_query_texts([query])[0]
+        )
+
+    def embed_queries(self, queries: List[str]) -> List[np.ndarray]:
+        """Embed many queries, sending only cache misses to the model in batches."""
+        return query_embedding_cache.get_or_compute_many(
+            self.embedder.model, queries, self.embed_query_texts
+        )
+
+    def search(
+        self,
+        vector: np.ndarray,
+        top_k: int,
+        filters: Optional[SearchFilters] = None,
+    ) -> List[VectorMatch]:
+        """Return the top_k eligible tests nearest to an embedded query."""
+        raise NotImplementedError
+
+    def search_many(
+        self,
+        vectors: List[np.ndarray],
+        top_ks: List[int],
+        filters: Optional[List[Optional[SearchFilters]]] = None,
+    ) -> List[List[VectorMatch]]:
+        """Run several searches; backends override this to batch the work."""
+        filters = filters or [None] * len(vectors)
+        return [
+            self.search(vector, top_k, query_filters)
+            for vector, top_k, query_filters in zip(vectors, top_ks, filters)
+        ]
+
+    def query(
+        self, query: str, top_k: int, filters: Optional[SearchFilters] = None
+    ) -> List[VectorMatch]:
+        """Return the top_k eligible tests most similar to the query text."""
+        with stage("embed"):
+            vector = self.embed_query(query)
+        with stage("vector_query"):
+            return self.search(vector, top_k, filters)
+
+    def query_batch(
+        self,
+        queries: List[str],
+        top_ks: List[int],
+        filters: Optional[List[Optional[SearchFilters]]] = None,
+    ) -> List[List[VectorMatch]]:
+        """Embed all queries together and return each one's matches, in order."""
+        if not queries:
+            return []
+        with stage("embed"):
+            vectors = self.embed_queries(queries)
+        with stage("vector_query"):
+            return self.search_many(vectors, top_ks, filters)
+
+
+def get_vector_store(backend: str = None) -> VectorStore:
+    """Build the vector store selected by the VECTOR_BACKEND setting."""
+    backend = (backend or VECTOR_BACKEND).lower()
+    if backend == "pinecone":
+        from app.services.pinecone_db import PineconeDatabase
+
+        return PineconeDatabase()
+    if backend == "local":
+        from app.services.local_index import LocalVectorStore
+
+        return LocalVectorStore()
+    if backend == "pgvector":
+        from app.services.pgvector_store import PgVectorStore
+
+        return PgVectorStore()
+    raise ValueError(f"Unknown vector backend: {backend}")
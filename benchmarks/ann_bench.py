@@ -0,0 +1,180 @@
+"""Recall and throughput of the local ANN indexes against exact search.
+
+Builds a synthetic catalog of clustered unit vectors (random Gaussian
+vectors have no neighbourhood structure, which no real embedding space
+looks like), times building each index, then sweeps its recall/latency
+knob (``nprobe`` for IVF, ``ef_search`` for HNSW). Each setting reports
+recall@k against exact top-k and single-query QPS, with and without a
+broad metadata filter. It also times inserting rows into the built index,
+as ``POST /tests/`` does:
+
+    python benchmarks/ann_bench.py --sizes 100000 1000000 --methods ivf hnsw
+
+HNSW needs ``pip install hnswlib``; building it over 1M vectors on a
+single core takes a long time, so lower ``--ef-construction`` for quick runs.
+"""
+
+import argparse
+import itertools
+import os
+import random
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from common import emit, latency_ms, timed  # noqa: E402
+from micro_bench import FILTERS, synthetic_metadata  # noqa: E402
+from app.services.ann import HNSWIndex, IVFIndex  # noqa: E402
+from app.services.embeddings import HashingEmbeddingProvider  # noqa: E402
+from app.services.local_index import LocalVectorStore  # noqa: E402
+
+UPSERT_CHUNK = 100_000
+INSERT_ROWS = 1_000
+
+
+def clustered(rng, centers, count, spread):
+    picks = rng.integers(0, len(centers), count)
+    noise = rng.standard_normal((count, centers.shape[1]), dtype=np.float32)
+    return centers[picks] + spread * noise
+
+
+def build_store(size, args):
+    rng = np.random.default_rng(args.seed)
+    centers = rng.standard_normal((args.clusters, args.dim), dtype=np.float32)
+    store = LocalVectorStore(
+        path=os.path.join(tempfile.gettempdir(), f"ann-bench-{os.getpid()}"),
+        embedder=HashingEmbeddingProvider(args.dim),
+    )
+    store.ann = None
+    metadata_rng = random.Random(args.seed)
+    for offset in range(0, size, UPSERT_CHUNK):
+        count = min(UPSERT_CHUNK, size - offset)
+        store.upsert(
+            [str(offset + i) for i in range(count)],
+            clustered(rng, centers, count, args.spread),
+            synthetic_metadata(metadata_rng, count),
+            persist=False,
+        )
+    queries = store._normalize(clustered(rng, centers, args.queries, args.spread))
+    return store, centers, queries
+
+
+def top_ids(store, queries, top_k, filters=None):
+    return [[match.id for match in store.search(q, top_k, filters)] for q in queries]
+
+
+def recall(found, exact):
+    hits = sum(len(set(a) & set(e)) / max(len(e), 1) for a, e in zip(found, exact))
+    return round(hits / len(exact), 4)
+
+
+def sweep(store, queries, exact, knob, values, args):
+    """recall@k and QPS for each value of the index's knob."""
+    points = []
+    for value in values:
+        setattr(store.ann, knob, value)
+        point = {knob: value}
+        for name, filters in (("unfiltered", None), ("broad", FILTERS["broad"])):
+            found = top_ids(store, queries, args.top_k, filters)
+            cursor = itertools.count()
+            durations = timed(
+                lambda: store.search(queries[next(cursor) % len(queries)], args.top_k, filters),
+                args.repeat,
+            )
+            point[name] = {
+                "recall": recall(found, exact[name]),
+                "latency_ms": latency_ms(durations),
+                "queries_per_second": round(len(durations) / sum(durations), 1),
+            }
+        points.append(point)
+    return points
+
+
+def bench_size(size, args):
+    store, centers, queries = build_store(size, args)
+    exact = {
+        "unfiltered": top_ids(store, queries, args.top_k),
+        "broad": top_ids(store, queries, args.top_k, FILTERS["broad"]),
+    }
+    cursor = itertools.count()
+    durations = timed(
+        lambda: store.search(queries[next(cursor) % len(queries)], args.top_k), args.repeat
+    )
+    result = {
+        "size": size,
+        "dim": args.dim,
+        "exact": {
+            "latency_ms": latency_ms(durations),
+            "queries_per_second": round(len(durations) / sum(durations), 1),
+        },
+        "methods": {},
+    }
+
+    rng = np.random.default_rng(args.seed + 1)
+    metadata_rng = random.Random(args.seed + 1)
+    for method in args.methods:
+        if method == "ivf":
+            ann, knob, values = IVFIndex(nlist=args.nlist), "nprobe", args.nprobe
+        else:
+            ann = HNSWIndex(args.dim, m=args.m, ef_construction=args.ef_construction)
+            knob, values = "ef_search", args.ef_search
+        print(f"Building {method} over {size} vectors...", file=sys.stderr)
+        start = time.perf_counter()
+        ann.build(store.vectors)
+        build_seconds = time.perf_counter() - start
+        store.ann = ann
+        result["methods"][method] = {
+            "build_seconds": round(build_seconds, 3),
+            "sweep": sweep(store, queries, exact, knob, values, args),
+        }
+
+        # Incremental insert on top of the built index, then drop the rows again
+        ids = [f"insert-{i}" for i in range(INSERT_ROWS)]
+        start = time.perf_counter()
+        store.upsert(
+            ids,
+            clustered(rng, centers, INSERT_ROWS, args.spread),
+            synthetic_metadata(metadata_rng, INSERT_ROWS),
+            persist=False,
+        )
+        result["methods"][method]["insert_rows_per_second"] = round(
+            INSERT_ROWS / (time.perf_counter() - start), 1
+        )
+        store.ann = None
+        store.delete(ids, persist=False)
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100_000, 1_000_000])
+    parser.add_argument("--dim", type=int, default=256)
+    parser.add_argument("--methods", nargs="+", choices=["ivf", "hnsw"], default=["ivf", "hnsw"])
+    parser.add_argument("--top-k", type=int, default=10)
+    parser.add_argument("--queries", type=int, default=200, help="queries used for recall")
+    parser.add_argument("--repeat", type=int, default=200, help="queries timed per setting")
+    parser.add_argument("--clusters", type=int, default=1000, help="synthetic topic clusters")
+    parser.add_argument("--spread", type=float, default=1.0, help="noise around each topic")
+    parser.add_argument("--nlist", type=int, default=0, help="IVF clusters (0 = sqrt(size))")
+    parser.add_argument("--nprobe", type=int, nargs="+", default=[1, 4, 8, 16, 32, 64])
+    parser.add_argument("--m", type=int, default=16)
+    parser.add_argument("--ef-construction", type=int, default=100)
+    parser.add_argument("--ef-search", type=int, nargs="+", default=[16, 32, 64, 128, 256])
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="Also write the JSON result to this file")
+    args = parser.parse_args()
+
+    results = []
+    for size in args.sizes:
+        print(f"Benchmarking {size} vectors...", file=sys.stderr)
+        results.append(bench_size(size, args))
+    settings = {key: value for key, value in vars(args).items() if key != "output"}
+    emit("ann", settings, results, args.output)
+
+
+if __name__ == "__main__":
+    main()
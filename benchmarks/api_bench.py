@@ -0,0 +1,234 @@
+"""End-to-end benchmarks for the API hot paths.
+
+Starts ``app.main`` under uvicorn in a child process, using the local vector
+store (a fresh index in a temp directory) and the hashing embedder, so the
+numbers reflect this codebase rather than Pinecone's network. It then
+measures:
+
+* ``POST /tests/`` bulk ingest: rows committed per second, and rows
+  indexed per second once the background sync jobs have finished;
+* ``POST /token`` login latency (dominated by password hashing);
+* ``POST /search/`` throughput and tail latency at each concurrency level.
+
+Without ``--database-url`` it runs self-contained: a throwaway Postgres is
+started in a temp directory with ``pgserver`` (``pip install pgserver``) and
+deleted afterwards. The job queue, upserts and pgvector need real Postgres,
+so the database is embedded rather than stubbed. To use an existing server,
+point it at a dedicated database, since the synthetic tests it writes stay
+there; the DATABASE_URL in .env is never used:
+
+    python benchmarks/api_bench.py --concurrency 1 8 32 64 --output api.json
+    python benchmarks/api_bench.py --database-url postgresql://localhost/shl_bench
+
+Requires ``httpx`` and ``uvicorn``.
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import uuid
+
+import httpx
+
+from common import emit, latency_ms, synthetic_test
+from load_test import run as run_load
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def embedded_database():
+    """A throwaway Postgres server in a temp directory, deleted on cleanup()."""
+    try:
+        import pgserver
+    except ImportError:
+        raise SystemExit("Pass --database-url, or pip install pgserver to run self-contained")
+    return pgserver.get_server(tempfile.mkdtemp(prefix="api-bench-db-"), cleanup_mode="delete")
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_server(args, port):
+    env = {
+        **os.environ,
+        "DATABASE_URL": args.database_url,
+        "VECTOR_BACKEND": "local",
+        "EMBEDDING_BACKEND": "hashing",
+        "LOCAL_INDEX_PATH": tempfile.mkdtemp(prefix="api-bench-index-"),
+        "PINECONE_API_KEY": "unused",
+        "DB_CREATE_TABLES": "true",
+    }
+    return subprocess.Popen(
+        [
+            sys.executable, "-m", "uvicorn", "app.main:app",
+            "--host", "127.0.0.1",
+            "--port", str(port),
+            "--workers", str(args.workers),
+            "--log-level", "warning",
+        ],
+        cwd=ROOT,
+        env=env,
+    )
+
+
+async def wait_until_healthy(client, server, timeout=60.0):
+    deadline = time.perf_counter() + timeout
+    while time.perf_counter() < deadline:
+        if server.poll() is not None:
+            raise RuntimeError(f"API exited with status {server.returncode}")
+        try:
+            if (await client.get("/health")).status_code == 200:
+                return
+        except httpx.TransportError:
+            pass
+        await asyncio.sleep(0.2)
+    raise RuntimeError("API did not become healthy in time")
+
+
+async def bench_ingest(client, args, run_id):
+    rng = random.Random(args.seed)
+    request_seconds, job_ids = [], []
+    start = time.perf_counter()
+    for batch in range(args.ingest_batches):
+        tests = [
+            synthetic_test(rng, batch * args.ingest_batch_size + i, f"bench-{run_id}")
+            for i in range(args.ingest_batch_size)
+        ]
+        sent = time.perf_counter()
+        response = await client.post(
+            "/tests/", json={"tests": tests, "conflict_strategy": "update"}
+        )
+        response.raise_for_status()
+        request_seconds.append(time.perf_counter() - sent)
+        if response.json().get("job_id") is not None:
+            job_ids.append(response.json()["job_id"])
+    committed = time.perf_counter() - start
+
+    failed = 0
+    pending = list(job_ids)
+    while pending:
+        await asyncio.sleep(0.1)
+        still_pending = []
+        for job_id in pending:
+            job = (await client.get(f"/jobs/{job_id}")).json()
+            if job["status"] == "failed":
+                failed += 1
+            elif job["status"] != "succeeded":
+                still_pending.append(job_id)
+        pending = still_pending
+    indexed = time.perf_counter() - start
+
+    rows = args.ingest_batches * args.ingest_batch_size
+    return {
+        "rows": rows,
+        "rows_per_request": args.ingest_batch_size,
+        "request_latency_ms": latency_ms(request_seconds),
+        "committed_rows_per_second": round(rows / committed, 1),
+        "indexed_rows_per_second": round(rows / indexed, 1),
+        "failed_jobs": failed,
+    }
+
+
+async def bench_login(client, args, run_id):
+    credentials = {"username": f"bench-{run_id}", "password": "bench-password"}
+    response = await client.post("/users/", json=credentials)
+    response.raise_for_status()
+    durations = []
+    for _ in range(args.logins):
+        start = time.perf_counter()
+        response = await client.post("/token", data=credentials)
+        response.raise_for_status()
+        durations.append(time.perf_counter() - start)
+    return {
+        "logins": len(durations),
+        "latency_ms": latency_ms(durations),
+        "logins_per_second": round(len(durations) / sum(durations), 1),
+    }
+
+
+async def bench_search(url, args):
+    results = []
+    for concurrency in args.concurrency:
+        load_args = argparse.Namespace(
+            url=url,
+            concurrency=concurrency,
+            duration=args.duration,
+            top_k=args.top_k,
+            time=args.time,
+            timeout=args.timeout,
+            cached=args.cached,
+        )
+        result = await run_load(load_args)
+        result.pop("url")
+        results.append(result)
+    return results
+
+
+async def run(args):
+    port = free_port()
+    url = f"http://127.0.0.1:{port}"
+    run_id = uuid.uuid4().hex[:8]
+    server = start_server(args, port)
+    try:
+        async with httpx.AsyncClient(base_url=url, timeout=args.timeout) as client:
+            await wait_until_healthy(client, server)
+            results = {"ingest": await bench_ingest(client, args, run_id)}
+            results["login"] = await bench_login(client, args, run_id)
+        results["search"] = await bench_search(url, args)
+        return results
+    finally:
+        server.terminate()
+        server.wait(timeout=30)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--database-url",
+        default=os.environ.get("BENCH_DATABASE_URL"),
+        help="Postgres database to benchmark against (or set BENCH_DATABASE_URL); "
+        "a throwaway one is started when omitted",
+    )
+    parser.add_argument("--workers", type=int, default=1, help="uvicorn worker processes")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8, 32, 64])
+    parser.add_argument("--duration", type=float, default=10.0, help="seconds per level")
+    parser.add_argument("--top-k", type=int, default=5)
+    parser.add_argument("--time", type=int, default=60)
+    parser.add_argument("--cached", action="store_true")
+    parser.add_argument("--ingest-batches", type=int, default=20)
+    parser.add_argument("--ingest-batch-size", type=int, default=500)
+    parser.add_argument("--logins", type=int, default=20)
+    parser.add_argument("--timeout", type=float, default=60.0)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="Also write the JSON result to this file")
+    args = parser.parse_args()
+    database = None
+    if not args.database_url:
+        database = embedded_database()
+        args.database_url = database.get_uri()
+
+    try:
+        results = asyncio.run(run(args))
+    finally:
+        if database is not None:
+            database.cleanup()
+    settings = {
+        key: value
+        for key, value in vars(args).items()
+        if key not in ("database_url", "output")
+    }
+    settings["database"] = "embedded" if database is not None else "external"
+    emit("api", settings, results, args.output)
+
+
+if __name__ == "__main__":
+    main()
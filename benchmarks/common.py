@@ -0,0 +1,139 @@
+"""Helpers shared by the benchmark scripts.
+
+Every script prints one JSON document with an ``environment`` block (commit,
+interpreter, CPU count, benchmark settings) and a ``results`` block, so runs
+from two commits can be diffed with ``benchmarks/compare.py``.
+"""
+
+import json
+import os
+import platform
+import statistics
+import subprocess
+import time
+from datetime import datetime, timezone
+
+# Vocabularies used to generate synthetic tests; they mirror the real catalog
+JOB_LEVELS = [
+    "Entry-Level",
+    "Graduate",
+    "Mid-Professional",
+    "Professional Individual Contributor",
+    "Manager",
+    "Director",
+    "Executive",
+    "Front Line Manager",
+    "Supervisor",
+    "General Population",
+]
+LANGUAGES = [
+    "English (USA)",
+    "English International",
+    "French",
+    "German",
+    "Spanish",
+    "Portuguese (Brazil)",
+    "Chinese Simplified",
+    "Japanese",
+    "Dutch",
+    "Italian",
+]
+TEST_TYPES = [
+    "Ability & Aptitude",
+    "Biodata & Situational Judgement",
+    "Competencies",
+    "Development & 360",
+    "Assessment Exercises",
+    "Knowledge & Skills",
+    "Personality & Behavior",
+    "Simulations",
+]
+WORDS = (
+    "python java sql excel sales service customer manager graduate analyst "
+    "leadership communication numerical verbal reasoning accounting finance "
+    "support engineer developer retail banking insurance call centre safety "
+    "teamwork personality judgement coding cloud data marketing operations"
+).split()
+
+
+def synthetic_test(rng, index: int, prefix: str = "bench"):
+    """One TestCreate-shaped dict with random but plausible field values."""
+    return {
+        "name": f"{prefix} test {index}",
+        "link": f"/{prefix}/{index}/",
+        "remote_testing": rng.choice(["Yes", "No"]),
+        "adaptive_irt": rng.choice(["Yes", "No"]),
+        "test_type": rng.sample(TEST_TYPES, rng.randint(1, 3)),
+        "description": " ".join(rng.choices(WORDS, k=rng.randint(8, 30))),
+        "full_link": f"https://example.com/{prefix}/{index}/",
+        "job_levels": rng.sample(JOB_LEVELS, rng.randint(1, 4)),
+        "languages": rng.sample(LANGUAGES, rng.randint(1, 3)),
+        "assessment_length": str(rng.randint(5, 90)),
+    }
+
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def latency_ms(seconds):
+    """mean/p50/p95/p99 in milliseconds for a list of durations in seconds."""
+    return {
+        "mean": round(statistics.fmean(seconds) * 1000, 3) if seconds else 0.0,
+        "p50": round(percentile(seconds, 50) * 1000, 3),
+        "p95": round(percentile(seconds, 95) * 1000, 3),
+        "p99": round(percentile(seconds, 99) * 1000, 3),
+    }
+
+
+def timed(fn, repeat: int):
+    """Call fn repeat times and return each call's duration in seconds."""
+    durations = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        durations.append(time.perf_counter() - start)
+    return durations
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def environment(settings):
+    return {
+        "commit": git_commit(),
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "settings": settings,
+    }
+
+
+def emit(benchmark, settings, results, output=None):
+    """Print the result document and optionally write it to output."""
+    document = {
+        "benchmark": benchmark,
+        "environment": environment(settings),
+        "results": results,
+    }
+    text = json.dumps(document, indent=2)
+    print(text)
+    if output:
+        with open(output, "w", encoding="utf-8") as file:
+            file.write(text + "\n")
+    return document
@@ -0,0 +1,95 @@
+"""Compare two benchmark result files and flag regressions.
+
+Walks both JSON documents, pairs up every numeric metric by its path and
+prints the relative change. Latencies and durations are lower-is-better,
+rates (``*_per_second``) higher-is-better; anything that got worse by more
+than --threshold percent is reported as a regression and makes the script
+exit with status 1, so it can gate CI:
+
+    python benchmarks/compare.py before.json after.json --threshold 10
+"""
+
+import argparse
+import json
+import sys
+
+# Metric names whose change is reported; other numbers are settings or counts
+LOWER_IS_BETTER = ("mean", "p50", "p95", "p99", "seconds")
+HIGHER_IS_BETTER = ("per_second",)
+IGNORED = ("duration_seconds",)  # How long a load level ran, not how fast
+
+
+def _label(item, index):
+    """Key list entries by their parameters so reordering does not matter."""
+    for key in ("size", "concurrency", "nprobe", "ef_search", "dtype"):
+        if isinstance(item, dict) and key in item:
+            return f"{key}={item[key]}"
+    return str(index)
+
+
+def flatten(value, prefix=""):
+    if isinstance(value, dict):
+        for key, child in value.items():
+            yield from flatten(child, f"{prefix}.{key}" if prefix else key)
+    elif isinstance(value, list):
+        for index, child in enumerate(value):
+            yield from flatten(child, f"{prefix}[{_label(child, index)}]")
+    elif isinstance(value, (int, float)) and not isinstance(value, bool):
+        yield prefix, float(value)
+
+
+def direction(path):
+    """+1 if higher is better, -1 if lower is better, 0 if not a metric."""
+    name = path.rsplit(".", 1)[-1]
+    if name in IGNORED:
+        return 0
+    if any(name.endswith(suffix) for suffix in HIGHER_IS_BETTER):
+        return 1
+    if name in LOWER_IS_BETTER or name.endswith("_seconds"):
+        return -1
+    return 0
+
+
+def compare(before, after, threshold):
+    old = dict(flatten(before["results"]))
+    new = dict(flatten(after["results"]))
+    rows, regressions = [], []
+    for path, old_value in old.items():
+        sign = direction(path)
+        if not sign or path not in new or old_value == 0:
+            continue
+        change = (new[path] - old_value) / old_value * 100
+        worse = -change * sign
+        rows.append((path, old_value, new[path], change))
+        if worse > threshold:
+            regressions.append(path)
+    return rows, regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("before")
+    parser.add_argument("after")
+    parser.add_argument("--threshold", type=float, default=10.0, help="percent")
+    args = parser.parse_args()
+
+    with open(args.before, encoding="utf-8") as file:
+        before = json.load(file)
+    with open(args.after, encoding="utf-8") as file:
+        after = json.load(file)
+    rows, regressions = compare(before, after, args.threshold)
+
+    print(
+        f"{before['environment'].get('commit')} -> {after['environment'].get('commit')}"
+    )
+    width = max((len(path) for path, *_ in rows), default=0)
+    for path, old_value, new_value, change in rows:
+        flag = "  REGRESSION" if path in regressions else ""
+        print(f"{path:<{width}}  {old_value:>12.3f}  {new_value:>12.3f}  {change:+7.1f}%{flag}")
+    if regressions:
+        print(f"{len(regressions)} metric(s) regressed by more than {args.threshold}%")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
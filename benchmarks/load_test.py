@@ -0,0 +1,109 @@
+"""Concurrent load test for POST /search/.
+
+Runs N clients against a running API for a fixed duration and prints
+requests/sec and latency percentiles as JSON. Compare two builds by
+running it against each with the same settings, e.g.:
+
+    python benchmarks/load_test.py --url http://localhost:8000 --concurrency 50
+
+Queries get a per-request suffix by default so neither the query-embedding
+nor the search-result cache can hide upstream latency; pass --cached to
+measure the warm-cache path instead. Requires ``httpx``.
+"""
+
+import argparse
+import asyncio
+import json
+import statistics
+import time
+
+import httpx
+
+QUERIES = [
+    "Looking to hire mid-level professionals who are proficient in Python, SQL and Java Script.",
+    "Entry-level customer service representatives with strong communication skills.",
+    "Senior sales manager able to lead a regional team.",
+    "Graduate data analyst comfortable with Excel and statistics.",
+    "Front line supervisor for a manufacturing plant.",
+]
+
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+async def client_loop(client, args, deadline, worker, latencies, errors):
+    sent = 0
+    while time.perf_counter() < deadline:
+        query = QUERIES[(worker + sent) % len(QUERIES)]
+        if not args.cached:
+            query = f"{query} #{worker}-{sent}"
+        payload = {"query": query, "top_k": args.top_k, "time": args.time}
+        start = time.perf_counter()
+        try:
+            response = await client.post("/search/", json=payload)
+            if response.status_code != 200:
+                errors.append(response.status_code)
+            else:
+                latencies.append(time.perf_counter() - start)
+        except httpx.HTTPError as e:
+            errors.append(type(e).__name__)
+        sent += 1
+
+
+async def run(args):
+    latencies, errors = [], []
+    limits = httpx.Limits(max_connections=args.concurrency)
+    async with httpx.AsyncClient(
+        base_url=args.url, timeout=args.timeout, limits=limits
+    ) as client:
+        start = time.perf_counter()
+        deadline = start + args.duration
+        await asyncio.gather(
+            *(
+                client_loop(client, args, deadline, worker, latencies, errors)
+                for worker in range(args.concurrency)
+            )
+        )
+        elapsed = time.perf_counter() - start
+    return {
+        "url": args.url,
+        "concurrency": args.concurrency,
+        "duration_seconds": round(elapsed, 2),
+        "requests": len(latencies),
+        "errors": len(errors),
+        "requests_per_second": round(len(latencies) / elapsed, 1),
+        "latency_ms": {
+            "mean": round(statistics.fmean(latencies) * 1000, 2) if latencies else 0.0,
+            "p50": round(percentile(latencies, 50) * 1000, 2),
+            "p95": round(percentile(latencies, 95) * 1000, 2),
+            "p99": round(percentile(latencies, 99) * 1000, 2),
+        },
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--url", default="http://localhost:8000")
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--duration", type=float, default=30.0)
+    parser.add_argument("--top-k", type=int, default=5)
+    parser.add_argument("--time", type=int, default=60)
+    parser.add_argument("--timeout", type=float, default=30.0)
+    parser.add_argument("--cached", action="store_true")
+    parser.add_argument("--output", help="Also write the JSON result to this file")
+    args = parser.parse_args()
+
+    result = asyncio.run(run(args))
+    print(json.dumps(result, indent=2))
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as file:
+            json.dump(result, file, indent=2)
+
+
+if __name__ == "__main__":
+    main()
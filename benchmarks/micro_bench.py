@@ -0,0 +1,154 @@
+"""Micro-benchmarks for local-index top-k search and metadata filtering.
+
+Builds synthetic catalogs (random unit vectors plus filterable metadata)
+of each requested size in a LocalVectorStore and times single-query top-k,
+batched top-k and filtered search, with no API, database or network in
+the way:
+
+    python benchmarks/micro_bench.py --sizes 1000 100000 1000000 --dim 256
+
+A 1M x 1024 float32 matrix alone is 4 GB, so the default dimension is
+smaller than the production model's; pass --dim 1024 to match it exactly.
+"""
+
+import argparse
+import itertools
+import os
+import random
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from common import JOB_LEVELS, LANGUAGES, TEST_TYPES, emit, latency_ms, timed  # noqa: E402
+from app.models.models import SearchFilters  # noqa: E402
+from app.services.embeddings import HashingEmbeddingProvider  # noqa: E402
+from app.services.filters import FilterIndex  # noqa: E402
+from app.services.local_index import LocalVectorStore  # noqa: E402
+
+# Typical UI filter (broad) and a narrow one that leaves few eligible rows
+FILTERS = {
+    "broad": SearchFilters(max_duration=60, remote_testing=True),
+    "narrow": SearchFilters(
+        max_duration=20,
+        job_levels=["Director"],
+        languages=["Japanese"],
+        test_types=["Simulations"],
+    ),
+}
+UPSERT_CHUNK = 100_000
+
+
+def synthetic_metadata(rng, count):
+    """Only the fields the filter index reads, to keep 1M rows in memory."""
+    return [
+        {
+            "remote_testing": rng.choice(("Yes", "No")),
+            "adaptive_irt": rng.choice(("Yes", "No")),
+            "test_type": rng.sample(TEST_TYPES, rng.randint(1, 3)),
+            "job_levels": rng.sample(JOB_LEVELS, rng.randint(1, 4)),
+            "languages": rng.sample(LANGUAGES, rng.randint(1, 3)),
+            "assessment_length": str(rng.randint(5, 90)),
+        }
+        for _ in range(count)
+    ]
+
+
+def build_store(size, dim, seed):
+    rng = random.Random(seed)
+    vectors_rng = np.random.default_rng(seed)
+    store = LocalVectorStore(
+        path=os.path.join(tempfile.gettempdir(), f"micro-bench-{os.getpid()}"),
+        embedder=HashingEmbeddingProvider(dim),
+    )
+    start = time.perf_counter()
+    for offset in range(0, size, UPSERT_CHUNK):
+        count = min(UPSERT_CHUNK, size - offset)
+        store.upsert(
+            [str(offset + i) for i in range(count)],
+            vectors_rng.standard_normal((count, dim), dtype=np.float32),
+            synthetic_metadata(rng, count),
+            persist=False,
+        )
+    return store, time.perf_counter() - start
+
+
+def bench_size(size, args):
+    store, build_seconds = build_store(size, args.dim, args.seed)
+    _, metadata, *_ = store._snapshot()
+    start = time.perf_counter()
+    filter_index = FilterIndex(metadata)
+    filter_index_seconds = time.perf_counter() - start
+
+    queries = np.random.default_rng(args.seed + 1).standard_normal(
+        (args.repeat, args.dim), dtype=np.float32
+    )
+    cursor = itertools.count()
+
+    def next_query():
+        return queries[next(cursor) % len(queries)]
+
+    result = {
+        "size": size,
+        "dim": args.dim,
+        "build_seconds": round(build_seconds, 3),
+        "filter_index_build_seconds": round(filter_index_seconds, 3),
+        "top_k": {},
+        "filtered": {},
+    }
+    for top_k in args.top_k:
+        durations = timed(lambda: store.search(next_query(), top_k), args.repeat)
+        result["top_k"][str(top_k)] = {
+            "latency_ms": latency_ms(durations),
+            "queries_per_second": round(len(durations) / sum(durations), 1),
+        }
+
+    batch = [queries[i % len(queries)] for i in range(args.batch)]
+    durations = timed(
+        lambda: store.search_many(batch, [args.top_k[0]] * len(batch)),
+        max(1, args.repeat // args.batch),
+    )
+    result["batch"] = {
+        "queries_per_batch": args.batch,
+        "latency_ms": latency_ms(durations),
+        "queries_per_second": round(args.batch * len(durations) / sum(durations), 1),
+    }
+
+    for name, filters in FILTERS.items():
+        mask_durations = timed(lambda: filter_index.mask(filters), args.repeat)
+        durations = timed(
+            lambda: store.search(next_query(), args.top_k[0], filters), args.repeat
+        )
+        result["filtered"][name] = {
+            "eligible_share": round(float(filter_index.mask(filters).mean()), 4),
+            "mask_latency_ms": latency_ms(mask_durations),
+            "latency_ms": latency_ms(durations),
+            "queries_per_second": round(len(durations) / sum(durations), 1),
+        }
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1_000, 100_000, 1_000_000])
+    parser.add_argument("--dim", type=int, default=256)
+    parser.add_argument("--top-k", type=int, nargs="+", default=[10, 100])
+    parser.add_argument("--batch", type=int, default=32)
+    parser.add_argument("--repeat", type=int, default=200, help="queries timed per case")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="Also write the JSON result to this file")
+    args = parser.parse_args()
+
+    results = []
+    for size in args.sizes:
+        print(f"Benchmarking {size} vectors...", file=sys.stderr)
+        results.append(bench_size(size, args))
+    settings = {key: value for key, value in vars(args).items() if key != "output"}
+    emit("micro", settings, results, args.output)
+
+
+if __name__ == "__main__":
+    main()
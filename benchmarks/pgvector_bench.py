@@ -0,0 +1,180 @@
+"""Two-hop retrieval against a single pgvector statement.
+
+The two-hop path is what the Pinecone backend does: ask the vector index
+for ids, then fetch those tests from Postgres. Pinecone is not reachable
+from a benchmark, so the local vector store stands in for the first hop
+and the numbers exclude its network time. The pgvector path ranks, filters
+and returns the test rows in one statement (``VECTOR_BACKEND=pgvector``).
+
+For the unfiltered query and the broad and narrow filters of
+``micro_bench.py`` it reports p50/p95 latency of both paths and
+recall@k of pgvector's HNSW index against exact search.
+
+The script writes synthetic tests and their embeddings, so point it at a
+dedicated database with the pgvector extension available:
+
+    python benchmarks/pgvector_bench.py --database-url postgresql://localhost/shl_bench \\
+        --size 20000 --ef-search 40 100 200
+"""
+
+import argparse
+import asyncio
+import itertools
+import os
+import random
+import sys
+import tempfile
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from common import emit, latency_ms, synthetic_test, timed  # noqa: E402
+
+DIMENSION = 1024  # test_embeddings.embedding is vector(1024)
+INSERT_CHUNK = 1_000
+PREFIX = "pgvector-bench"
+
+
+def clustered(rng, centers, count):
+    picks = rng.integers(0, len(centers), count)
+    return centers[picks] + rng.standard_normal((count, DIMENSION), dtype=np.float32)
+
+
+def seed(engine, store, args):
+    """Replace earlier benchmark rows with size synthetic tests and embeddings."""
+    from sqlalchemy import delete, insert
+    from app.database import Test as DBTest
+
+    rng = np.random.default_rng(args.seed)
+    centers = rng.standard_normal((args.clusters, DIMENSION), dtype=np.float32)
+    metadata_rng = random.Random(args.seed)
+    with engine.begin() as connection:
+        connection.execute(delete(DBTest).where(DBTest.link.like(f"/{PREFIX}/%")))
+    tests, vectors = [], []
+    for offset in range(0, args.size, INSERT_CHUNK):
+        count = min(INSERT_CHUNK, args.size - offset)
+        rows = [synthetic_test(metadata_rng, offset + i, PREFIX) for i in range(count)]
+        for row in rows:
+            row["assessment_length"] = int(row["assessment_length"])
+        with engine.begin() as connection:
+            ids = connection.execute(insert(DBTest).returning(DBTest.id), rows).scalars().all()
+        chunk = clustered(rng, centers, count)
+        store.upsert_tests([{"id": i} for i in ids], chunk)
+        tests.extend({**row, "id": i} for row, i in zip(rows, ids))
+        vectors.append(chunk)
+        print(f"  {offset + count}/{args.size}", file=sys.stderr)
+    return tests, np.concatenate(vectors), clustered(rng, centers, args.queries)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--database-url",
+        default=os.environ.get("BENCH_DATABASE_URL"),
+        help="Postgres database to benchmark against (or set BENCH_DATABASE_URL)",
+    )
+    parser.add_argument("--size", type=int, default=20_000)
+    parser.add_argument("--top-k", type=int, default=10)
+    parser.add_argument("--ef-search", type=int, nargs="+", default=[100])
+    parser.add_argument("--queries", type=int, default=100, help="queries used for recall")
+    parser.add_argument("--repeat", type=int, default=200, help="queries timed per path")
+    parser.add_argument("--clusters", type=int, default=200, help="synthetic topic clusters")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="Also write the JSON result to this file")
+    args = parser.parse_args()
+    if not args.database_url:
+        parser.error("--database-url or BENCH_DATABASE_URL is required")
+    os.environ.update(
+        DATABASE_URL=args.database_url,
+        EMBEDDING_BACKEND="hashing",
+        EMBEDDING_DIMENSION=str(DIMENSION),
+        LOCAL_INDEX_ANN="none",
+        LOCAL_INDEX_DTYPE="float32",
+        PINECONE_API_KEY="unused",
+    )
+
+    from sqlalchemy import select, text
+    from micro_bench import FILTERS
+    from app.database import Test as DBTest, create_tables, get_sync_engine
+    from app.services.embeddings import HashingEmbeddingProvider
+    from app.services.local_index import LocalVectorStore
+    from app.services.pgvector_store import PgVectorStore
+    from app.services.vector_store import test_metadata
+
+    asyncio.run(create_tables())
+    engine = get_sync_engine()
+    embedder = HashingEmbeddingProvider(DIMENSION)
+    pgvector = PgVectorStore(embedder=embedder, engine=engine)
+    print(f"Writing {args.size} tests and embeddings...", file=sys.stderr)
+    tests, vectors, queries = seed(engine, pgvector, args)
+    with engine.connect() as connection:
+        connection.execute(text("ANALYZE tests"))
+        connection.execute(text("ANALYZE test_embeddings"))
+
+    local = LocalVectorStore(
+        path=tempfile.mkdtemp(prefix="pgvector-bench-"), embedder=embedder
+    )
+    local.upsert(
+        [str(test["id"]) for test in tests],
+        vectors,
+        [test_metadata(test) for test in tests],
+        persist=False,
+    )
+    columns = DBTest.__table__.c
+
+    def two_hop(connection, query, filters):
+        ids = [int(match.id) for match in local.search(query, args.top_k, filters)]
+        return connection.execute(select(columns).where(columns.id.in_(ids))).all()
+
+    cases = {"unfiltered": None, **FILTERS}
+    results = {"size": args.size, "dim": DIMENSION, "two_hop": {}, "pgvector": []}
+    exact = {}
+    for name, filters in cases.items():
+        exact[name] = [
+            {match.id for match in local.search(query, args.top_k, filters)}
+            for query in queries
+        ]
+        cursor = itertools.count()
+        with engine.connect() as connection:
+            durations = timed(
+                lambda: two_hop(connection, queries[next(cursor) % len(queries)], filters),
+                args.repeat,
+            )
+        results["two_hop"][name] = {"latency_ms": latency_ms(durations)}
+
+    for ef_search in args.ef_search:
+        point = {"ef_search": ef_search}
+        for name, filters in cases.items():
+            with engine.connect() as connection:
+                connection.execute(text(f"SET hnsw.ef_search = {int(ef_search)}"))
+                found = [
+                    {m.id for m in pgvector._search(connection, q, args.top_k, filters)}
+                    for q in queries
+                ]
+                cursor = itertools.count()
+                durations = timed(
+                    lambda: pgvector._search(
+                        connection, queries[next(cursor) % len(queries)], args.top_k, filters
+                    ),
+                    args.repeat,
+                )
+                connection.execute(text("RESET hnsw.ef_search"))
+            hits = sum(len(f & e) / max(len(e), 1) for f, e in zip(found, exact[name]))
+            point[name] = {
+                "recall": round(hits / len(queries), 4),
+                "latency_ms": latency_ms(durations),
+            }
+        results["pgvector"].append(point)
+
+    settings = {
+        key: value
+        for key, value in vars(args).items()
+        if key not in ("database_url", "output")
+    }
+    emit("pgvector", settings, results, args.output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,206 @@
+"""Resident memory, latency and recall of the local index storage formats.
+
+Writes one synthetic catalog to disk, then loads it in a fresh process per
+storage format (``LOCAL_INDEX_DTYPE`` float32, float16 and int8, memory-
+mapped) and runs the same queries in each. Every format reports:
+
+* resident memory after the queries, split into private (anonymous) pages
+  and file pages mapped from the index, which worker processes share;
+* single-query latency and QPS;
+* recall@k against float32 exact search, with and without full-precision
+  rescoring (``RESCORE_FACTOR``).
+
+    python benchmarks/quant_bench.py --size 1000000 --dim 1024
+
+Memory figures come from /proc/self/status, so they are Linux only. The
+index files are evicted from the page cache before each format is loaded,
+so file pages count only what that format actually reads.
+"""
+
+import argparse
+import itertools
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from common import emit, latency_ms, timed  # noqa: E402
+
+DTYPES = ("float32", "float16", "int8")
+UPSERT_CHUNK = 100_000
+
+
+def memory_mb():
+    """Resident, anonymous and file-backed memory of this process in MB."""
+    fields = {}
+    with open("/proc/self/status", encoding="utf-8") as file:
+        for line in file:
+            name, _, value = line.partition(":")
+            if name in ("VmRSS", "RssAnon", "RssFile"):
+                fields[name] = round(int(value.split()[0]) / 1024, 1)
+    return {
+        "rss_mb": fields.get("VmRSS"),
+        "anon_mb": fields.get("RssAnon"),
+        "file_mb": fields.get("RssFile"),
+    }
+
+
+def evict(path):
+    """Drop the index files from the page cache (no root needed)."""
+    for name in os.listdir(path):
+        fd = os.open(os.path.join(path, name), os.O_RDONLY)
+        try:
+            os.fsync(fd)
+            os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_DONTNEED)
+        finally:
+            os.close(fd)
+
+
+def build_index(path, args):
+    """Persist a catalog of clustered unit vectors with every codec's files."""
+    from app.services.embeddings import HashingEmbeddingProvider
+    from app.services.local_index import LocalVectorStore
+    from app.services.quantization import get_codec
+
+    rng = np.random.default_rng(args.seed)
+    centers = rng.standard_normal((args.clusters, args.dim), dtype=np.float32)
+
+    def clustered(count):
+        picks = rng.integers(0, len(centers), count)
+        return centers[picks] + rng.standard_normal((count, args.dim), dtype=np.float32)
+
+    store = LocalVectorStore(path=path, embedder=HashingEmbeddingProvider(args.dim))
+    for offset in range(0, args.size, UPSERT_CHUNK):
+        count = min(UPSERT_CHUNK, args.size - offset)
+        store.upsert(
+            [str(offset + i) for i in range(count)],
+            clustered(count),
+            [{} for _ in range(count)],
+            persist=False,
+        )
+    with store._lock:
+        store.save()
+    # Codes files for the other formats, encoded from the saved matrix
+    for kind in DTYPES[1:]:
+        LocalVectorStore(
+            path=path, embedder=HashingEmbeddingProvider(args.dim), codec=get_codec(kind)
+        ).save()
+    return store._normalize(clustered(args.queries))
+
+
+def measure(args):
+    """Child process: load the index in one format and time the queries."""
+    import app.services.local_index as local_index
+    from app.services.embeddings import HashingEmbeddingProvider
+
+    store = local_index.LocalVectorStore(
+        path=args.path, embedder=HashingEmbeddingProvider(args.dim)
+    )
+    queries = np.load(os.path.join(args.path, "queries.npy"))
+    with open(os.path.join(args.path, "exact.json"), encoding="utf-8") as file:
+        exact = json.load(file)
+
+    def recall():
+        hits = 0.0
+        for query, expected in zip(queries, exact):
+            found = {match.id for match in store.search(query, args.top_k)}
+            hits += len(found & set(expected)) / len(expected)
+        return round(hits / len(exact), 4)
+
+    cursor = itertools.count()
+    durations = timed(
+        lambda: store.search(queries[next(cursor) % len(queries)], args.top_k), args.repeat
+    )
+    result = {
+        "dtype": args.measure,
+        **memory_mb(),
+        "latency_ms": latency_ms(durations),
+        "queries_per_second": round(len(durations) / sum(durations), 1),
+        "recall": recall(),
+    }
+    if store.codec is not None:
+        local_index.RESCORE_FACTOR = 0
+        result["recall_without_rescoring"] = recall()
+    print(json.dumps(result))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--size", type=int, default=200_000)
+    parser.add_argument("--dim", type=int, default=1024)
+    parser.add_argument("--dtypes", nargs="+", choices=DTYPES, default=list(DTYPES))
+    parser.add_argument("--top-k", type=int, default=10)
+    parser.add_argument("--queries", type=int, default=100, help="queries used for recall")
+    parser.add_argument("--repeat", type=int, default=100, help="queries timed per format")
+    parser.add_argument("--rescore-factor", type=int, default=4)
+    parser.add_argument("--clusters", type=int, default=1000, help="synthetic topic clusters")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="Also write the JSON result to this file")
+    parser.add_argument("--measure", help=argparse.SUPPRESS)
+    parser.add_argument("--path", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.measure:
+        measure(args)
+        return
+
+    path = tempfile.mkdtemp(prefix="quant-bench-")
+    env = {
+        **os.environ,
+        "LOCAL_INDEX_MMAP": "true",
+        "LOCAL_INDEX_ANN": "none",
+        "RESCORE_FACTOR": str(args.rescore_factor),
+    }
+    os.environ.update(env)
+    try:
+        print(f"Writing {args.size} x {args.dim} index to {path}...", file=sys.stderr)
+        queries = build_index(path, args)
+        np.save(os.path.join(path, "queries.npy"), queries)
+
+        from app.services.embeddings import HashingEmbeddingProvider
+        from app.services.local_index import LocalVectorStore
+
+        store = LocalVectorStore(path=path, embedder=HashingEmbeddingProvider(args.dim))
+        exact = [[match.id for match in store.search(q, args.top_k)] for q in queries]
+        del store
+        with open(os.path.join(path, "exact.json"), "w", encoding="utf-8") as file:
+            json.dump(exact, file)
+
+        results = {"size": args.size, "dim": args.dim, "formats": []}
+        for dtype in args.dtypes:
+            print(f"Measuring {dtype}...", file=sys.stderr)
+            evict(path)
+            child = subprocess.run(
+                [
+                    sys.executable, os.path.abspath(__file__),
+                    "--measure", dtype,
+                    "--path", path,
+                    "--dim", str(args.dim),
+                    "--top-k", str(args.top_k),
+                    "--repeat", str(args.repeat),
+                ],
+                env={**env, "LOCAL_INDEX_DTYPE": dtype},
+                capture_output=True,
+                text=True,
+                check=True,
+            )
+            results["formats"].append(json.loads(child.stdout.strip().splitlines()[-1]))
+    finally:
+        shutil.rmtree(path, ignore_errors=True)
+
+    settings = {
+        key: value
+        for key, value in vars(args).items()
+        if key not in ("output", "measure", "path")
+    }
+    emit("quant", settings, results, args.output)
+
+
+if __name__ == "__main__":
+    main()
@@ -9,9 +9,9 @@ set -e
 # done
 # echo "Database is ready!"
 
-# Run database migrations
-# echo "Running database migrations..."
-# alembic upgrade head
+# Run database migrations; a fresh database gets its tables created and stamped
+echo "Running database migrations..."
+python -m app.services.migrate
 
 # Start the application
 echo "Starting the application..."
@@ -0,0 +1,55 @@
+"""add jobs
+
+Revision ID: 5e8b2f7c4a10
+Revises: a93f0c6d15e2
+Create Date: 2026-10-17 13:05:27.402816
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "5e8b2f7c4a10"
+down_revision: Union[str, None] = "a93f0c6d15e2"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "jobs",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("kind", sa.String(), nullable=False),
+        sa.Column("payload", sa.JSON(), nullable=False),
+        sa.Column("status", sa.String(), nullable=False),
+        sa.Column("attempts", sa.Integer(), nullable=False),
+        sa.Column("max_attempts", sa.Integer(), nullable=False),
+        sa.Column("run_after", sa.DateTime(), nullable=False),
+        sa.Column("locked_at", sa.DateTime(), nullable=True),
+        sa.Column("last_error", sa.Text(), nullable=True),
+        sa.Column("result", sa.JSON(), nullable=True),
+        sa.Column("created_at", sa.DateTime(), nullable=True),
+        sa.Column("updated_at", sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index("ix_jobs_id", "jobs", ["id"], unique=False)
+    op.create_index("ix_jobs_status_run_after", "jobs", ["status", "run_after"], unique=False)
+    # a93f0c6d15e2 may have removed duplicate tests whose vectors were never
+    # tracked in vector_sync_state; only a reconcile sync finds and deletes them.
+    op.execute(
+        """
+        INSERT INTO jobs (kind, payload, status, attempts, max_attempts, run_after, created_at, updated_at)
+        SELECT 'sync_tests', '{"reconcile": true}', 'queued', 0, 5, utc_now, utc_now, utc_now
+        FROM (SELECT timezone('utc', now()) AS utc_now) AS clock
+        WHERE EXISTS (SELECT 1 FROM tests)
+        """
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_jobs_status_run_after", table_name="jobs")
+    op.drop_index("ix_jobs_id", table_name="jobs")
+    op.drop_table("jobs")
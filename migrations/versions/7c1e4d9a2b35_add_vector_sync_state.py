@@ -0,0 +1,34 @@
+"""add vector_sync_state
+
+Revision ID: 7c1e4d9a2b35
+Revises: 2df5c6c17b2a
+Create Date: 2026-10-17 09:12:44.031522
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "7c1e4d9a2b35"
+down_revision: Union[str, None] = "2df5c6c17b2a"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "vector_sync_state",
+        sa.Column("target", sa.String(), nullable=False),
+        sa.Column("test_id", sa.Integer(), nullable=False),
+        sa.Column("content_hash", sa.String(length=64), nullable=False),
+        sa.Column("embedding_model", sa.String(), nullable=False),
+        sa.Column("synced_at", sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint("target", "test_id"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("vector_sync_state")
@@ -0,0 +1,32 @@
+"""index test filters
+
+Revision ID: 9d3b6e0f5a21
+Revises: c4f1a8e92d67
+Create Date: 2026-10-17 17:20:44.906153
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "9d3b6e0f5a21"
+down_revision: Union[str, None] = "c4f1a8e92d67"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index("ix_tests_test_type", "tests", ["test_type"], postgresql_using="gin")
+    op.create_index("ix_tests_job_levels", "tests", ["job_levels"], postgresql_using="gin")
+    op.create_index("ix_tests_languages", "tests", ["languages"], postgresql_using="gin")
+    op.create_index("ix_tests_assessment_length", "tests", ["assessment_length"], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index("ix_tests_assessment_length", table_name="tests")
+    op.drop_index("ix_tests_languages", table_name="tests")
+    op.drop_index("ix_tests_job_levels", table_name="tests")
+    op.drop_index("ix_tests_test_type", table_name="tests")
@@ -0,0 +1,63 @@
+"""unique test link
+
+Revision ID: a93f0c6d15e2
+Revises: 7c1e4d9a2b35
+Create Date: 2026-10-17 11:48:09.718244
+
+"""
+import logging
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+logger = logging.getLogger("alembic.runtime.migration")
+
+
+# revision identifiers, used by Alembic.
+revision: str = "a93f0c6d15e2"
+down_revision: Union[str, None] = "7c1e4d9a2b35"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# Every column copied into the vector index; rows equal on all of them are
+# true duplicates and safe to drop.
+SYNCED_COLUMNS = (
+    "name",
+    "link",
+    "remote_testing",
+    "adaptive_irt",
+    "test_type",
+    "description",
+    "full_link",
+    "job_levels",
+    "languages",
+    "assessment_length",
+)
+
+
+def upgrade() -> None:
+    # Bulk upserts resolve conflicts on link, so keep only the oldest of
+    # identical rows before enforcing uniqueness. Their vectors are left to
+    # the reconcile sync queued by the next revision.
+    bind = op.get_bind()
+    same = " AND ".join(f"t.{column} IS NOT DISTINCT FROM d.{column}" for column in SYNCED_COLUMNS)
+    deleted = bind.execute(
+        sa.text(f"DELETE FROM tests t USING tests d WHERE {same} AND t.id > d.id RETURNING t.id")
+    ).scalars().all()
+    if deleted:
+        logger.warning("Removed %d duplicate tests: %s", len(deleted), sorted(set(deleted)))
+    conflicts = bind.execute(
+        sa.text("SELECT link FROM tests GROUP BY link HAVING count(*) > 1 ORDER BY link")
+    ).scalars().all()
+    if conflicts:
+        raise RuntimeError(
+            "Tests sharing a link differ in other columns; merge or delete them "
+            f"before upgrading: {', '.join(conflicts)}"
+        )
+    op.create_index("ix_tests_link", "tests", ["link"], unique=True)
+
+
+def downgrade() -> None:
+    op.drop_index("ix_tests_link", table_name="tests")
@@ -0,0 +1,51 @@
+"""add test embeddings
+
+Revision ID: c4f1a8e92d67
+Revises: 5e8b2f7c4a10
+Create Date: 2026-10-17 15:42:10.518337
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "c4f1a8e92d67"
+down_revision: Union[str, None] = "5e8b2f7c4a10"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _pgvector_available() -> bool:
+    return bool(
+        op.get_bind().scalar(
+            sa.text("SELECT count(*) FROM pg_available_extensions WHERE name = 'vector'")
+        )
+    )
+
+
+def upgrade() -> None:
+    # Like create_tables(): servers without pgvector skip the table, so the
+    # pgvector backend is unavailable there but later revisions still apply.
+    if not _pgvector_available():
+        return
+    op.execute("CREATE EXTENSION IF NOT EXISTS vector")
+    op.create_table(
+        "test_embeddings",
+        sa.Column("test_id", sa.Integer(), nullable=False),
+        sa.Column("updated_at", sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(["test_id"], ["tests.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("test_id"),
+    )
+    op.execute("ALTER TABLE test_embeddings ADD COLUMN embedding vector(1024) NOT NULL")
+    op.execute(
+        "CREATE INDEX ix_test_embeddings_embedding_hnsw ON test_embeddings "
+        "USING hnsw (embedding vector_cosine_ops) WITH (m = 16, ef_construction = 64)"
+    )
+
+
+def downgrade() -> None:
+    op.execute("DROP INDEX IF EXISTS ix_test_embeddings_embedding_hnsw")
+    op.execute("DROP TABLE IF EXISTS test_embeddings")
@@ -0,0 +1,44 @@
+"""add test neighbors
+
+Revision ID: e6a2c9d14b83
+Revises: 9d3b6e0f5a21
+Create Date: 2026-10-17 19:02:31.274690
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = "e6a2c9d14b83"
+down_revision: Union[str, None] = "9d3b6e0f5a21"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "test_neighbors",
+        sa.Column("target", sa.String(), nullable=False),
+        sa.Column("test_id", sa.Integer(), nullable=False),
+        sa.Column("neighbor_ids", postgresql.ARRAY(sa.Integer()), nullable=False),
+        sa.Column("scores", postgresql.ARRAY(sa.Float()), nullable=False),
+        sa.Column("embedding_model", sa.String(), nullable=False),
+        sa.Column("updated_at", sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(["test_id"], ["tests.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("target", "test_id"),
+    )
+    op.create_index(
+        "ix_test_neighbors_neighbor_ids",
+        "test_neighbors",
+        ["neighbor_ids"],
+        postgresql_using="gin",
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_test_neighbors_neighbor_ids", table_name="test_neighbors")
+    op.drop_table("test_neighbors")
@@ -0,0 +1,103 @@
+import numpy as np
+import pytest
+from app.models.models import SearchFilters
+from app.services.embeddings import HashingEmbeddingProvider
+from app.services.local_index import LocalVectorStore
+from app.services.quantization import get_codec
+
+DIMENSION = 16
+CODECS = ["float16", "int8"]
+
+
+def make_store(path, kind="float16"):
+    return LocalVectorStore(
+        path=str(path),
+        embedder=HashingEmbeddingProvider(DIMENSION),
+        codec=get_codec(kind),
+    )
+
+
+def rows(start, count, test_type="K"):
+    ids = [str(i) for i in range(start, start + count)]
+    vectors = np.random.default_rng(start).standard_normal((count, DIMENSION))
+    metadata = [{"name": f"test {i}", "test_type": [test_type]} for i in ids]
+    return ids, vectors, metadata
+
+
+def state(store):
+    ids, metadata, vectors, *_ = store._snapshot()
+    return list(ids[: len(vectors)]), list(metadata[: len(vectors)]), np.array(vectors)
+
+
+@pytest.fixture
+def stores():
+    opened = []
+
+    def open_store(path, kind="float16"):
+        store = make_store(path, kind)
+        opened.append(store)
+        return store
+
+    yield open_store
+    for store in opened:
+        if store._writer_lock is not None:
+            store._writer_lock.close()
+
+
+@pytest.mark.parametrize("kind", CODECS)
+def test_reload_matches_saved_rows(tmp_path, stores, kind):
+    store = stores(tmp_path, kind)
+    store.upsert(*rows(0, 50))
+    store.upsert(*rows(50, 10))  # logged after the first checkpoint
+    store.upsert(*rows(5, 3, test_type="P"))  # replaced in place
+    expected = state(store)
+    store._writer_lock.close()
+    store._writer_lock = None
+
+    reloaded = stores(tmp_path, kind)
+    ids, metadata, vectors = state(reloaded)
+    assert ids == expected[0]
+    assert metadata == expected[1]
+    np.testing.assert_allclose(vectors, expected[2])
+
+
+def test_reader_refreshes_saved_rows(tmp_path, stores):
+    writer = stores(tmp_path)
+    writer.upsert(*rows(0, 20))
+    reader = stores(tmp_path)
+    assert writer.writable and not reader.writable
+
+    writer.upsert(*rows(20, 5))
+    writer.upsert(*rows(0, 2, test_type="P"))
+    assert reader.refresh()
+    assert not reader.refresh()
+    ids, metadata, vectors = state(reader)
+    expected = state(writer)
+    assert ids == expected[0]
+    assert metadata == expected[1]
+    np.testing.assert_allclose(vectors, expected[2])
+
+
+def test_reader_cannot_save(tmp_path, stores):
+    stores(tmp_path).upsert(*rows(0, 5))
+    reader = stores(tmp_path)
+    with pytest.raises(RuntimeError):
+        reader.upsert(*rows(5, 1))
+
+
+@pytest.mark.parametrize("kind", CODECS)
+def test_replace_leaves_published_view_alone(tmp_path, stores, kind):
+    store = stores(tmp_path, kind)
+    store.upsert(*rows(0, 10))
+    ids, metadata, vectors, codes, codec, filters, _ = store._snapshot()
+    before = (list(metadata), np.array(vectors), np.array(codes))
+    knowledge = SearchFilters(test_types=["K"])
+    mask = filters.mask(knowledge, len(vectors))
+
+    store.upsert(*rows(0, 3, test_type="P"))
+
+    assert list(metadata) == before[0]
+    np.testing.assert_array_equal(vectors, before[1])
+    np.testing.assert_array_equal(codes, before[2])
+    np.testing.assert_array_equal(filters.mask(knowledge, len(vectors)), mask)
+    assert store.filters.mask(knowledge).sum() == 7